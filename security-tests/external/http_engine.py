@@ -0,0 +1,1005 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- SHARED HTTP ENGINE (used by every scanner in external/)
+============================================================================
+
+Um unico cliente HTTP para todos os scanners, no lugar das copias de
+make_session/mksession/_create_session, GET/POST/g/p/_req e _FakeResponse.
+
+  * AsyncEngine  -- nucleo asyncio (aiohttp) rodando em uma thread de loop
+                    propria: pool de conexoes keep-alive, limite de
+                    concorrencia por host, retry igual ao
+                    Retry(total=2, backoff_factor=0.5, [502, 503, 504]) e
+                    pipelining HTTP/1.1 para GET/HEAD (idempotentes).
+  * Session      -- fachada sincrona compativel com o subconjunto de
+                    requests.Session usado pelos scripts (headers, get, post,
+                    put, patch, delete, head, options, request). Todas as
+                    Sessions compartilham o mesmo pool; headers e cookies
+                    continuam isolados por Session.
+  * GET/POST/... -- wrappers dos pentests: nunca levantam excecao, devolvem
+                    FakeResponse (status_code=0) em erro de conexao.
+
+Com FANDREAMS_RPS_BUDGET=N (definido pelo scan_orchestrator.py), o engine
+padrao limita o trafego das Sessions a N req/s (token bucket).
+
+Com um observador de timing registrado (add_timing_observer, usado pelo
+request_trace.py), cada request gera um `RequestTiming` com as fases
+(fila do pool, DNS, connect, TTFB, transferencia, espera de retry),
+retries e bytes, rotulado com a categoria em `request_label`.
+
+Benchmark local (stub HTTP em processo, conta handshakes TCP):
+    python http_engine.py --bench [--requests 300]
+
+Dependencias:
+    pip install aiohttp requests   (requests apenas para o --bench legado)
+============================================================================
+"""
+
+import argparse
+import asyncio
+import atexit
+import contextvars
+import json as _json
+import os
+import ssl
+import sys
+import threading
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+try:
+    import aiohttp
+    from multidict import CIMultiDict
+    from yarl import URL
+except ImportError:
+    print("[!] Dependencia ausente: pip install aiohttp")
+    sys.exit(1)
+
+# --- Defaults (mirror the old per-script requests adapters) ---
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"})
+POOL_LIMIT = 100
+POOL_LIMIT_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30
+PIPELINE_DEPTH = 8
+RPS_BUDGET_ENV = "FANDREAMS_RPS_BUDGET"   # req/s cap of the default engine (orchestrator)
+
+# Category (or any caller label) attached to the RequestTiming of each request.
+# Set in the calling thread; AsyncEngine.run() carries it onto the loop.
+request_label: "contextvars.ContextVar[str]" = contextvars.ContextVar("request_label", default="")
+
+# requests.utils.requote_uri: quote only what is unsafe, keep existing %XX
+_SAFE_URL_CHARS = "!#$%&'()*+,/:;=?@[]~"
+
+
+class RequestError(Exception):
+    """Raised by Session when a request fails (connection, timeout, retries exhausted)."""
+
+
+# === Responses ================================================================
+
+class Response:
+    """Fully-read HTTP response with the requests.Response attributes the scanners use."""
+
+    __slots__ = ("status_code", "headers", "content", "url", "elapsed", "reason")
+
+    def __init__(self, status_code: int, headers, content: bytes, url: str,
+                 elapsed: float = 0.0, reason: str = ""):
+        self.status_code = status_code
+        self.headers = CIMultiDict(headers)
+        self.content = content
+        self.url = url
+        self.elapsed = timedelta(seconds=elapsed)
+        self.reason = reason
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return 0 < self.status_code < 400
+
+    def __bool__(self):
+        # Same truthiness as requests.Response: `if r:` means "status < 400"
+        return self.ok
+
+    def json(self):
+        return _json.loads(self.content)
+
+    def __repr__(self):
+        return f"<Response [{self.status_code}]>"
+
+
+class FakeResponse:
+    """Stand-in response for connection errors (status_code 0)."""
+
+    def __init__(self, error):
+        self.status_code = 0
+        self._error = str(error)
+        self.text = str(error)
+        self.headers = {}
+        self.content = b""
+        self.elapsed = timedelta(0)
+
+    @property
+    def ok(self) -> bool:
+        return False
+
+    def json(self):
+        return {"error": self._error}
+
+
+def safe_json(r):
+    """Safely parse JSON response."""
+    try:
+        return r.json()
+    except Exception:
+        return {"_raw": r.text[:500] if hasattr(r, "text") else str(r)}
+
+
+# === Engine statistics ========================================================
+
+class EngineStats:
+    """Counters shared by the pooled client and the raw HTTP/1.1 connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.reused = 0
+            self.retries = 0
+            self.pipelined = 0
+            self.errors = 0
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {k: getattr(self, k) for k in
+                    ("requests", "connections", "reused", "retries", "pipelined", "errors")}
+
+
+class RequestTiming:
+    """Phases of one logical request, all attempts included.
+
+    `spans` holds (phase, t0, t1) in perf_counter seconds, filled by the
+    aiohttp trace hooks: "queued" (wait for a pool slot), "dns", "connect"
+    (TCP + TLS handshake: aiohttp reports them as a single step), "ttfb"
+    (request sent -> response headers), "transfer" (body) and "retry_wait"
+    (backoff between attempts).
+    """
+
+    __slots__ = ("method", "url", "label", "start", "end", "status", "error", "retries",
+                 "bytes_sent", "bytes_received", "pipelined", "spans", "_mark")
+
+    def __init__(self, method: str, url: str, label: str = "", pipelined: bool = False):
+        self.method = method
+        self.url = url
+        self.label = label
+        self.start = self.end = self._mark = time.perf_counter()
+        self.status = 0
+        self.error = ""
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.pipelined = pipelined
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def span(self, phase: str, t0: Optional[float] = None):
+        """Close `phase` at now, starting at `t0` (default: end of the previous phase)."""
+        now = time.perf_counter()
+        self.spans.append((phase, self._mark if t0 is None else t0, now))
+        self._mark = now
+
+    def mark(self):
+        self._mark = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        return self.end - self.start
+
+
+# === Raw HTTP/1.1 connection (pipelining; reused by the race engine) ==========
+
+def encode_url(url: str) -> str:
+    """Percent-encode unsafe characters without normalizing '..' segments."""
+    return quote(url, safe=_SAFE_URL_CHARS)
+
+
+def split_origin(url: str) -> Tuple[str, str, int, str]:
+    """Return (scheme, host, port, path_with_query) for an absolute URL."""
+    parts = urlsplit(encode_url(url))
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return scheme, parts.hostname or "", port, path
+
+
+def build_request(method: str, host: str, path: str, headers=None,
+                  body: bytes = b"") -> bytes:
+    """Serialize an HTTP/1.1 request (headers validated against CRLF injection)."""
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+    hdrs = CIMultiDict(headers or {})
+    hdrs.pop("Host", None)
+    if body or method in ("POST", "PUT", "PATCH"):
+        hdrs["Content-Length"] = str(len(body))
+    for k, v in hdrs.items():
+        if any(c in f"{k}{v}" for c in "\r\n"):
+            raise ValueError("Newline or carriage return character detected in header")
+        lines.append(f"{k}: {v}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class RawConnection:
+    """Minimal keep-alive HTTP/1.1 connection over asyncio streams."""
+
+    def __init__(self, scheme: str, host: str, port: int, stats: Optional[EngineStats] = None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.closed = True
+
+    @property
+    def host_header(self) -> str:
+        default = 443 if self.scheme == "https" else 80
+        return self.host if self.port == default else f"{self.host}:{self.port}"
+
+    async def open(self, timeout: float = DEFAULT_TIMEOUT):
+        ctx = ssl.create_default_context() if self.scheme == "https" else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ctx,
+                                    server_hostname=self.host if ctx else None),
+            timeout)
+        self.closed = False
+        if self.stats:
+            self.stats.incr("connections")
+        return self
+
+    def write(self, data: bytes):
+        self.writer.write(data)
+
+    async def drain(self):
+        await self.writer.drain()
+
+    async def read_response(self, method: str = "GET") -> Tuple[int, CIMultiDict, bytes, str]:
+        """Read one response; returns (status, headers, body, reason)."""
+        status_line = await self.reader.readline()
+        if not status_line:
+            self.closed = True
+            raise ConnectionError("connection closed by peer")
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers = CIMultiDict()
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            headers.add(k.strip(), v.strip())
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in headers.get("Transfer-Encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            body = b"".join(chunks)
+        elif "Content-Length" in headers:
+            body = await self.reader.readexactly(int(headers["Content-Length"]))
+        else:
+            body = await self.reader.read()
+            self.closed = True
+
+        if headers.get("Connection", "").lower() == "close":
+            self.closed = True
+        return status, headers, body, reason
+
+    def close(self):
+        self.closed = True
+        if self.writer is not None:
+            self.writer.close()
+
+
+# === Async engine =============================================================
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` banked."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    async def take(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _trace_config(stats: EngineStats) -> "aiohttp.TraceConfig":
+    tc = aiohttp.TraceConfig()
+
+    async def _on_conn_create(session, ctx, params):
+        stats.incr("connections")
+
+    async def _on_conn_reuse(session, ctx, params):
+        stats.incr("reused")
+
+    tc.on_connection_create_end.append(_on_conn_create)
+    tc.on_connection_reuseconn.append(_on_conn_reuse)
+
+    # Phase hooks: only requests sent with a RequestTiming as trace_request_ctx
+    async def _on_mark(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx.mark()
+
+    def _span(phase):
+        async def _hook(session, ctx, params):
+            if ctx.trace_request_ctx is not None:
+                ctx.trace_request_ctx.span(phase)
+        return _hook
+
+    async def _on_chunk_sent(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx.bytes_sent += len(params.chunk)
+
+    for hooks in (tc.on_request_start, tc.on_connection_queued_start,
+                  tc.on_connection_create_start, tc.on_dns_resolvehost_start,
+                  tc.on_request_headers_sent):
+        hooks.append(_on_mark)
+    tc.on_connection_queued_end.append(_span("queued"))
+    tc.on_dns_resolvehost_end.append(_span("dns"))
+    tc.on_connection_create_end.append(_span("connect"))
+    tc.on_request_end.append(_span("ttfb"))
+    tc.on_request_chunk_sent.append(_on_chunk_sent)
+    return tc
+
+
+def _form_data(data, files) -> "aiohttp.FormData":
+    form = aiohttp.FormData()
+    for k, v in (data or {}).items():
+        form.add_field(k, str(v))
+    for field_name, spec in files.items():
+        if isinstance(spec, (tuple, list)):
+            filename, content = spec[0], spec[1]
+            ctype = spec[2] if len(spec) > 2 else None
+        else:
+            filename, content, ctype = field_name, spec, None
+        form.add_field(field_name, content, filename=filename, content_type=ctype)
+    return form
+
+
+async def _labelled(label: str, coro):
+    # Runs as its own task on the loop: the label reaches every task it spawns
+    request_label.set(label)
+    return await coro
+
+
+class AsyncEngine:
+    """asyncio HTTP core: one pooled aiohttp session on a private loop thread."""
+
+    def __init__(self, limit: int = POOL_LIMIT, limit_per_host: int = POOL_LIMIT_PER_HOST,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF, rps_budget: float = 0.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.stats = EngineStats()
+        # Caps Session traffic only: race/rate/load engines burst on purpose
+        self.budget = TokenBucket(rps_budget, max(1.0, rps_budget)) if rps_budget > 0 else None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._start_lock = threading.Lock()
+
+    # -- loop management --
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="http-engine", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def run(self, coro):
+        """Run a coroutine on the engine loop and block for its result."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncEngine.run() called from the engine loop; await instead")
+        label = request_label.get()
+        if label:
+            coro = _labelled(label, coro)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout,
+                                             ttl_dns_cache=300)
+            # Cookies live on each Session facade, never in the shared pool
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  cookie_jar=aiohttp.DummyCookieJar(),
+                                                  trace_configs=[_trace_config(self.stats)],
+                                                  skip_auto_headers=("User-Agent",))
+        return self._session
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._session is not None and not self._session.closed:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._loop = None
+        self._session = None
+
+    # -- requests --
+
+    def _backoff(self, attempt: int) -> float:
+        # urllib3 Retry: no sleep before the first retry, then factor * 2^(n-1)
+        return 0.0 if attempt <= 1 else self.backoff_factor * (2 ** (attempt - 1))
+
+    async def request(self, method: str, url: str, *, headers=None, params=None, json=None,
+                      data=None, files=None, timeout: float = DEFAULT_TIMEOUT,
+                      allow_redirects: bool = True, budgeted: bool = False) -> Response:
+        """Send one request through the pool; raises RequestError on failure."""
+        method = method.upper()
+        if budgeted and self.budget is not None:
+            await self.budget.take()
+        sess = await self.session()
+        target = URL(encode_url(url), encoded=True)
+        if isinstance(timeout, (tuple, list)):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        if json is not None:
+            # requests semantics: NaN/Infinity are rejected, not sent as invalid JSON
+            try:
+                data = _json.dumps(json, allow_nan=False).encode()
+            except (TypeError, ValueError) as e:
+                raise RequestError(str(e)) from e
+            headers = CIMultiDict(headers or {})
+            headers.setdefault("Content-Type", "application/json")
+        timing = RequestTiming(method, url, request_label.get()) if _timing_observers else None
+        attempt = 0
+        try:
+            while True:
+                body = _form_data(data, files) if files else data
+                t0 = time.perf_counter()
+                try:
+                    self.stats.incr("requests")
+                    async with sess.request(method, target, headers=headers, params=params,
+                                            data=body, timeout=client_timeout,
+                                            allow_redirects=allow_redirects,
+                                            trace_request_ctx=timing) as resp:
+                        content = await resp.read()
+                        elapsed = time.perf_counter() - t0
+                        if timing is not None:
+                            timing.span("transfer")
+                            timing.status = resp.status
+                            timing.bytes_received += len(content)
+                        if (resp.status in RETRY_STATUSES and method in IDEMPOTENT_METHODS):
+                            if attempt < self.retries:
+                                attempt += 1
+                                await self._retry_wait(timing, self._retry_after(resp, attempt))
+                                continue
+                            raise RequestError(f"Max retries exceeded ({resp.status}) for {url}")
+                        return Response(resp.status, resp.headers, content, str(resp.url),
+                                         elapsed, resp.reason or "")
+                except RequestError as e:
+                    self.stats.incr("errors")
+                    if timing is not None:
+                        timing.error = str(e)
+                    raise
+                except (aiohttp.ClientConnectorError, aiohttp.ServerDisconnectedError) as e:
+                    retryable = isinstance(e, aiohttp.ClientConnectorError) or method in IDEMPOTENT_METHODS
+                    if retryable and attempt < self.retries:
+                        attempt += 1
+                        await self._retry_wait(timing, self._backoff(attempt))
+                        continue
+                    self.stats.incr("errors")
+                    if timing is not None:
+                        timing.error = str(e) or type(e).__name__
+                    raise RequestError(str(e) or type(e).__name__) from e
+                except Exception as e:
+                    self.stats.incr("errors")
+                    if timing is not None:
+                        timing.error = str(e) or type(e).__name__
+                    raise RequestError(str(e) or type(e).__name__) from e
+        finally:
+            if timing is not None:
+                _emit_timing(timing)
+
+    async def _retry_wait(self, timing: Optional[RequestTiming], delay: float):
+        self.stats.incr("retries")
+        if timing is None:
+            await asyncio.sleep(delay)
+            return
+        timing.retries += 1
+        t0 = time.perf_counter()
+        await asyncio.sleep(delay)
+        timing.span("retry_wait", t0)
+
+    def _retry_after(self, resp, attempt: int) -> float:
+        value = resp.headers.get("Retry-After", "")
+        if resp.status == 503 and value.isdigit():
+            return min(float(value), 30.0)
+        return self._backoff(attempt)
+
+    async def pipeline(self, method: str, urls: List[str], headers=None,
+                       timeout: float = DEFAULT_TIMEOUT, depth: int = PIPELINE_DEPTH) -> List[object]:
+        """HTTP/1.1 pipelining for idempotent, body-less requests to one origin.
+
+        Writes up to `depth` requests back-to-back on a single keep-alive
+        connection and reads the responses in order. Whatever is left when
+        the server closes the connection falls back to the pooled client.
+        """
+        method = method.upper()
+        if method not in ("GET", "HEAD") or not urls:
+            raise ValueError("pipelining is only safe for GET/HEAD")
+        scheme, host, port, _ = split_origin(urls[0])
+        results: List[object] = [None] * len(urls)
+        pending = list(range(len(urls)))
+        conn: Optional[RawConnection] = None
+        try:
+            while pending:
+                batch, pending = pending[:depth], pending[depth:]
+                if conn is None or conn.closed:
+                    conn = await RawConnection(scheme, host, port, self.stats).open(timeout)
+                for i in batch:
+                    path = split_origin(urls[i])[3]
+                    conn.write(build_request(method, conn.host_header, path, headers))
+                await conn.drain()
+                done = 0
+                try:
+                    for i in batch:
+                        t0 = time.perf_counter()
+                        status, hdrs, body, reason = await asyncio.wait_for(
+                            conn.read_response(method), timeout)
+                        results[i] = Response(status, hdrs, body, urls[i],
+                                              time.perf_counter() - t0, reason)
+                        if _timing_observers:
+                            timing = RequestTiming(method, urls[i], request_label.get(), True)
+                            timing.start = t0
+                            timing.span("ttfb", t0)
+                            timing.status = status
+                            timing.bytes_received = len(body)
+                            _emit_timing(timing)
+                        done += 1
+                        self.stats.incr("requests")
+                        self.stats.incr("pipelined")
+                        if conn.closed:
+                            break
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    conn.close()
+                # Anything the server dropped goes back to the queue, pooled this time
+                for i in batch[done:]:
+                    try:
+                        results[i] = await self.request(method, urls[i], headers=headers,
+                                                        timeout=timeout)
+                    except RequestError as e:
+                        results[i] = FakeResponse(e)
+        except (OSError, asyncio.TimeoutError):
+            for i in [j for j, r in enumerate(results) if r is None]:
+                try:
+                    results[i] = await self.request(method, urls[i], headers=headers, timeout=timeout)
+                except RequestError as e:
+                    results[i] = FakeResponse(e)
+        finally:
+            if conn is not None:
+                conn.close()
+        return results
+
+
+_DEFAULT_ENGINE: Optional[AsyncEngine] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_engine() -> AsyncEngine:
+    """Process-wide engine shared by every Session (and every scanner)."""
+    global _DEFAULT_ENGINE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_ENGINE is None:
+            _DEFAULT_ENGINE = AsyncEngine(rps_budget=float(os.environ.get(RPS_BUDGET_ENV) or 0))
+            atexit.register(_DEFAULT_ENGINE.close)
+        return _DEFAULT_ENGINE
+
+
+# === Request observers ========================================================
+
+_observers: List[Callable[[str, str], None]] = []
+
+
+def add_observer(fn: Callable[[str, str], None]):
+    """Call `fn(method, url)` for every request sent through a Session (or notify())."""
+    _observers.append(fn)
+
+
+def remove_observer(fn: Callable[[str, str], None]):
+    if fn in _observers:
+        _observers.remove(fn)
+
+
+def notify(method: str, url: str):
+    """Report a request sent outside Session.request (race/rate engines)."""
+    for fn in list(_observers):
+        fn(method, url)
+
+
+_response_observers: List[Callable[[str, str, object], None]] = []
+
+
+def add_response_observer(fn: Callable[[str, str, object], None]):
+    """Call `fn(method, url, response)` after a Session request completes (caller thread)."""
+    _response_observers.append(fn)
+
+
+def remove_response_observer(fn: Callable[[str, str, object], None]):
+    if fn in _response_observers:
+        _response_observers.remove(fn)
+
+
+def _notify_response(method: str, url: str, resp):
+    for fn in list(_response_observers):
+        fn(method, url, resp)
+
+
+_timing_observers: List[Callable[[RequestTiming], None]] = []
+
+
+def add_timing_observer(fn: Callable[[RequestTiming], None]):
+    """Call `fn(timing)` when a pooled or pipelined request completes (engine loop thread).
+
+    Timings are only collected while at least one observer is registered.
+    """
+    _timing_observers.append(fn)
+
+
+def remove_timing_observer(fn: Callable[[RequestTiming], None]):
+    if fn in _timing_observers:
+        _timing_observers.remove(fn)
+
+
+def _emit_timing(timing: RequestTiming):
+    timing.end = time.perf_counter()
+    for fn in list(_timing_observers):
+        fn(timing)
+
+
+# === Sync facade ==============================================================
+
+class Session:
+    """requests.Session-compatible facade over the shared AsyncEngine."""
+
+    def __init__(self, headers: Optional[dict] = None, engine: Optional[AsyncEngine] = None):
+        self.engine = engine or get_engine()
+        self.headers = CIMultiDict(headers or {})
+        self.cookies: Dict[str, str] = {}
+
+    def _merge_headers(self, extra) -> CIMultiDict:
+        merged = CIMultiDict(self.headers)
+        for k, v in (extra or {}).items():
+            if v is None:
+                merged.pop(k, None)
+            else:
+                merged[k] = v
+        if self.cookies and "Cookie" not in merged:
+            merged["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        return merged
+
+    def _store_cookies(self, resp: Response):
+        for raw in resp.headers.getall("Set-Cookie", []):
+            jar = SimpleCookie()
+            try:
+                jar.load(raw)
+            except Exception:
+                continue
+            for name, morsel in jar.items():
+                self.cookies[name] = morsel.value
+
+    def request(self, method: str, url: str, *, headers=None, params=None, json=None,
+                data=None, files=None, timeout=DEFAULT_TIMEOUT, allow_redirects=None) -> Response:
+        method = method.upper()
+        if allow_redirects is None:
+            allow_redirects = method != "HEAD"
+        if isinstance(data, dict) and not files:
+            data = urlencode(data)
+        merged = self._merge_headers(headers)
+        notify(method, url)
+        if json is not None or data is not None or files:
+            # requests recomputes Content-Length from the real body
+            merged.pop("Content-Length", None)
+        resp = self.engine.run(self.engine.request(
+            method, url, headers=merged, params=params, json=json,
+            data=data, files=files, timeout=timeout, allow_redirects=allow_redirects,
+            budgeted=True))
+        self._store_cookies(resp)
+        _notify_response(method, url, resp)
+        return resp
+
+    def get(self, url, **kw):     return self.request("GET", url, **kw)
+    def post(self, url, **kw):    return self.request("POST", url, **kw)
+    def put(self, url, **kw):     return self.request("PUT", url, **kw)
+    def patch(self, url, **kw):   return self.request("PATCH", url, **kw)
+    def delete(self, url, **kw):  return self.request("DELETE", url, **kw)
+    def head(self, url, **kw):    return self.request("HEAD", url, **kw)
+    def options(self, url, **kw): return self.request("OPTIONS", url, **kw)
+
+    def get_many(self, urls: List[str], pipeline: bool = True, timeout=DEFAULT_TIMEOUT,
+                 allow_redirects: bool = True) -> List[object]:
+        """GET a list of URLs; pipelined per origin when safe, errors -> FakeResponse.
+
+        Same semantics as calling get() on each URL: a pipelined 3xx is re-sent
+        through the pool to follow the redirect (unless `allow_redirects` is
+        False) and Set-Cookie headers are stored on the session.
+        """
+        headers = self._merge_headers(None)
+        if pipeline:
+            by_origin: Dict[Tuple, List[int]] = {}
+            for i, u in enumerate(urls):
+                by_origin.setdefault(split_origin(u)[:3], []).append(i)
+
+            async def _all():
+                out: List[object] = [None] * len(urls)
+                groups = list(by_origin.values())
+                batches = await asyncio.gather(*[
+                    self.engine.pipeline("GET", [urls[i] for i in g], headers, timeout)
+                    for g in groups])
+                for g, rs in zip(groups, batches):
+                    for i, r in zip(g, rs):
+                        out[i] = r
+                if allow_redirects:
+                    # Raw pipelining does not follow Location: redo those through the pool
+                    moved = [i for i, r in enumerate(out) if r.status_code in REDIRECT_STATUSES]
+                    follow = await asyncio.gather(*[self._pooled("GET", urls[i], headers, None, timeout, True)
+                                                    for i in moved])
+                    for i, r in zip(moved, follow):
+                        out[i] = r
+                return out
+            out = self.engine.run(_all())
+        else:
+            out = self.fire_concurrent("GET", urls, timeout=timeout,
+                                       allow_redirects=allow_redirects)
+        for u, r in zip(urls, out):
+            if isinstance(r, Response):
+                self._store_cookies(r)
+            if pipeline:
+                _notify_response("GET", u, r)
+        return out
+
+    async def _pooled(self, method, url, headers, body, timeout, allow_redirects):
+        try:
+            return await self.engine.request(method, url, headers=headers, json=body,
+                                             timeout=timeout, allow_redirects=allow_redirects)
+        except RequestError as e:
+            return FakeResponse(e)
+
+    def fire_concurrent(self, method: str, urls, n: int = 1, json=None, json_list=None,
+                        timeout=DEFAULT_TIMEOUT, allow_redirects: bool = True) -> List[object]:
+        """Send requests concurrently over the shared pool (errors -> FakeResponse).
+
+        `urls` is one URL (sent `n` times, or once per `json_list` body) or a list.
+        """
+        if isinstance(urls, str):
+            urls = [urls] * (len(json_list) if json_list is not None else n)
+        bodies = json_list if json_list is not None else [json] * len(urls)
+        headers = self._merge_headers(None)
+        for u in dict.fromkeys(urls):
+            notify(method.upper(), u)
+
+        async def _all():
+            return await asyncio.gather(*[
+                self._pooled(method, u, headers, b, timeout, allow_redirects)
+                for u, b in zip(urls, bodies)])
+        out = self.engine.run(_all())
+        for u, r in zip(urls, out):
+            _notify_response(method.upper(), u, r)
+        return out
+
+    def mount(self, *_args, **_kwargs):
+        """No-op: pooling and retries are handled by the engine."""
+
+    def close(self):
+        """No-op: the shared pool outlives individual Sessions."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_session(user_agent: str, headers: Optional[dict] = None,
+                 engine: Optional[AsyncEngine] = None) -> Session:
+    """Session with the JSON defaults every scanner used (no auth header)."""
+    s = Session(engine=engine)
+    s.headers.update({
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "User-Agent": user_agent,
+    })
+    if headers:
+        s.headers.update(headers)
+    return s
+
+
+# === Pentest-style wrappers (never raise) =====================================
+
+_debug: Callable[[str], None] = lambda m: None
+
+
+def set_debug(fn: Callable[[str], None]):
+    """Install the calling script's verbose logger (vprint) for the wrappers below."""
+    global _debug
+    _debug = fn
+
+
+def _wrap(method: str, session, base, path, json_data=None, **kw):
+    kw.setdefault("timeout", DEFAULT_TIMEOUT)
+    if json_data is not None:
+        kw["json"] = json_data
+    try:
+        r = session.request(method, f"{base}{path}", **kw)
+        _debug(f"{method} {path} -> {r.status_code}")
+        return r
+    except Exception as e:
+        _debug(f"{method} {path} -> ERROR: {e}")
+        return FakeResponse(e)
+
+
+def GET(session, base, path, **kw):                      return _wrap("GET", session, base, path, **kw)
+def POST(session, base, path, json_data=None, **kw):     return _wrap("POST", session, base, path, json_data, **kw)
+def PATCH(session, base, path, json_data=None, **kw):    return _wrap("PATCH", session, base, path, json_data, **kw)
+def PUT(session, base, path, json_data=None, **kw):      return _wrap("PUT", session, base, path, json_data, **kw)
+def DELETE(session, base, path, **kw):                   return _wrap("DELETE", session, base, path, **kw)
+def HEAD(session, base, path, **kw):                     return _wrap("HEAD", session, base, path, **kw)
+def OPTIONS(session, base, path, **kw):                  return _wrap("OPTIONS", session, base, path, **kw)
+
+
+# === Benchmark (in-process stub server) =======================================
+
+def _start_stub_server(delay: float = 0.002):
+    """Keep-alive HTTP/1.1 stub on an ephemeral port; counts accepted TCP connections."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    accepted = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        wbufsize = -1
+
+        def _reply(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            if n:
+                self.rfile.read(n)
+            time.sleep(delay)
+            body = b'{"success":false}'
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_GET = do_POST = do_HEAD = _reply
+
+        def log_message(self, *a):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def get_request(self):
+            accepted[0] += 1
+            return super().get_request()
+
+    srv = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, accepted
+
+
+def _bench(n_requests: int):
+    srv, accepted = _start_stub_server()
+    base = f"http://127.0.0.1:{srv.server_address[1]}/api/v1"
+    paths = [f"/discover/creators?page={i}" for i in range(n_requests)]
+    race_n = 10
+    results = {}
+
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # Legacy: one requests.Session per script + a new aiohttp session per race request
+        accepted[0] = 0
+        t0 = time.perf_counter()
+        for script in range(4):
+            s = requests.Session()
+            retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+            s.mount("http://", HTTPAdapter(max_retries=retries))
+            for path in paths[script::4]:
+                s.get(f"{base}{path}", timeout=10)
+            s.close()
+
+        async def _legacy_race():
+            async def fire():
+                async with aiohttp.ClientSession() as aio:
+                    async with aio.post(f"{base}/fancoins/tip", json={"amount": 1}) as r:
+                        await r.read()
+            await asyncio.gather(*[fire() for _ in range(race_n)])
+        asyncio.run(_legacy_race())
+        results["legacy"] = (time.perf_counter() - t0, accepted[0])
+    except ImportError:
+        print("  [legacy] requests nao instalado -- pulando baseline")
+
+    engine = AsyncEngine()
+    try:
+        accepted[0] = 0
+        t0 = time.perf_counter()
+        s = make_session("bench", engine=engine)
+        for path in paths[:n_requests // 2]:
+            s.get(f"{base}{path}")
+        s.get_many([f"{base}{p}" for p in paths[n_requests // 2:]])
+        s.fire_concurrent("POST", f"{base}/fancoins/tip", n=race_n, json={"amount": 1})
+        results["engine"] = (time.perf_counter() - t0, accepted[0])
+        stats = engine.stats.snapshot()
+    finally:
+        engine.close()
+        srv.shutdown()
+
+    print(f"\n  Benchmark: {n_requests} GETs + {race_n} concurrent POSTs (stub local)")
+    for name, (elapsed, conns) in results.items():
+        print(f"    {name:8s} {elapsed:7.3f}s  TCP handshakes: {conns}")
+    print(f"    engine stats: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FanDreams shared HTTP engine")
+    parser.add_argument("--bench", action="store_true", help="Run the in-process benchmark")
+    parser.add_argument("--requests", type=int, default=300, help="GETs in the benchmark")
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args.requests)
+    else:
+        parser.print_help()
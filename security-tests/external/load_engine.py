@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- LOAD PROFILE (--load, open-loop com histogramas HDR)
+============================================================================
+
+Reproduz um mix ponderado dos endpoints que os scanners ja conhecem a uma
+taxa alvo (RPS) por uma duracao fixa e mede a latencia de cada endpoint.
+
+Gerador open-loop, seguro contra coordinated omission: a request i tem
+horario agendado `inicio + i / rps` e e disparada nesse horario, esteja a
+anterior respondida ou nao. A latencia e medida a partir do horario
+AGENDADO -- se o gerador ou o pool atrasarem, o atraso entra na latencia
+(como veria um usuario real) em vez de sumir da amostra. O tempo de servico
+(envio real -> resposta) e registrado a parte.
+
+Por endpoint:
+  - histograma HDR (log-linear, 3 algarismos significativos, em us) com
+    p50/p90/p99/p99.9 de latencia e de tempo de servico;
+  - timeline de requests/erros por segundo (erro = falha de conexao,
+    timeout ou 5xx) e distribuicao de status.
+
+Uso via pentests:
+    profile = run_load(session, base, rps=50, duration=60,
+                       fmt={"creator_id": cid})
+    rpt.load_profile = profile.to_dict()
+============================================================================
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from http_engine import AsyncEngine, RequestError
+
+DEFAULT_RPS = 20.0
+DEFAULT_DURATION = 30.0      # seconds
+DEFAULT_CONNECTIONS = 100    # dedicated pool: the shared one is capped per host
+DEFAULT_TIMEOUT = 10
+TIMELINE_STEP = 1.0          # seconds per timeline bucket
+ERROR_RATE_WARN = 0.01       # error rate above which an endpoint is flagged
+
+# (label, method, path, weight) -- read-only endpoints, safe to replay under load.
+# Creators are listed by GET /discover (the API has no /discover/creators route).
+DEFAULT_MIX: Tuple[Tuple[str, str, str, int], ...] = (
+    ("/discover/creators", "GET", "/discover?limit=20", 30),
+    ("/discover/search", "GET", "/discover/search?q=an", 20),
+    ("/feed", "GET", "/feed", 25),
+    ("/fancoins/wallet", "GET", "/fancoins/wallet", 15),
+    ("/posts", "GET", "/posts/creator/{creator_id}", 10),
+)
+
+
+# === HDR histogram ============================================================
+
+class HdrHistogram:
+    """Log-linear histogram with the HdrHistogram bucket layout (values in us)."""
+
+    __slots__ = ("_half_bits", "_sub_bits", "counts", "total", "min", "max", "_sum")
+
+    def __init__(self, significant_figures: int = 3):
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._half_bits = self._sub_bits - 1
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._sum = 0
+
+    def _index(self, value: int) -> int:
+        bucket = max(0, value.bit_length() - self._sub_bits)
+        return (bucket << self._half_bits) + (value >> bucket)
+
+    def _highest_equivalent(self, index: int) -> int:
+        bucket = max(0, (index >> self._half_bits) - 1)
+        sub = index - (bucket << self._half_bits)
+        return (sub << bucket) + (1 << bucket) - 1
+
+    def record(self, value_us: int):
+        value_us = max(0, int(value_us))
+        idx = self._index(value_us)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        if not self.total or value_us < self.min:
+            self.min = value_us
+        self.max = max(self.max, value_us)
+        self.total += 1
+        self._sum += value_us
+
+    def percentile(self, p: float) -> int:
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(p / 100.0 * self.total))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(self._highest_equivalent(idx), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        ms = lambda us: round(us / 1000.0, 3)
+        return {
+            "count": self.total,
+            "min_ms": ms(self.min),
+            "mean_ms": ms(self._sum / self.total) if self.total else 0.0,
+            "p50_ms": ms(self.percentile(50)),
+            "p90_ms": ms(self.percentile(90)),
+            "p99_ms": ms(self.percentile(99)),
+            "p99_9_ms": ms(self.percentile(99.9)),
+            "max_ms": ms(self.max),
+            # [highest equivalent value in us, count] per non-empty bucket (mergeable)
+            "buckets_us": [[self._highest_equivalent(i), c] for i, c in sorted(self.counts.items())],
+        }
+
+
+# === Per-endpoint stats =======================================================
+
+class EndpointLoad:
+    """Latency/service histograms, status counts and error timeline of one endpoint."""
+
+    __slots__ = ("label", "method", "path", "latency", "service", "statuses", "errors",
+                 "timeline")
+
+    def __init__(self, label: str, method: str, path: str):
+        self.label = label
+        self.method = method
+        self.path = path
+        self.latency = HdrHistogram()
+        self.service = HdrHistogram()
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+        self.timeline: Dict[int, List[int]] = {}     # second -> [requests, errors]
+
+    def record(self, second: int, status: int, latency_us: int, service_us: int):
+        self.latency.record(latency_us)
+        self.service.record(service_us)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        error = status == 0 or status >= 500
+        self.errors += error
+        slot = self.timeline.setdefault(second, [0, 0])
+        slot[0] += 1
+        slot[1] += error
+
+    @property
+    def count(self) -> int:
+        return self.latency.total
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "requests": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "status_codes": {str(k): v for k, v in sorted(self.statuses.items())},
+            "latency": self.latency.to_dict(),
+            "service_time": self.service.to_dict(),
+            "timeline": [{"t": t * TIMELINE_STEP, "requests": n, "errors": e,
+                          "error_rate": round(e / n, 4) if n else 0.0}
+                         for t, (n, e) in sorted(self.timeline.items())],
+        }
+
+
+class LoadProfile:
+    """Result of one --load run."""
+
+    def __init__(self, target_rps: float, duration: float, endpoints: Dict[str, EndpointLoad]):
+        self.target_rps = target_rps
+        self.duration = duration
+        self.endpoints = endpoints
+        self.elapsed = 0.0
+        self.max_lag_ms = 0.0          # worst generator delay vs. schedule
+
+    @property
+    def sent(self) -> int:
+        return sum(ep.count for ep in self.endpoints.values())
+
+    @property
+    def achieved_rps(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "target_rps": self.target_rps,
+            "duration_seconds": self.duration,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "requests": self.sent,
+            "achieved_rps": round(self.achieved_rps, 2),
+            "max_schedule_lag_ms": round(self.max_lag_ms, 2),
+            "endpoints": {label: ep.to_dict() for label, ep in self.endpoints.items()},
+        }
+
+
+# === Generator ================================================================
+
+def parse_mix(spec: str, mix: Sequence = DEFAULT_MIX) -> Tuple[Tuple[str, str, str, int], ...]:
+    """Override weights: "/feed=3,/fancoins/wallet=1" (labels of DEFAULT_MIX)."""
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        label, _, w = part.partition("=")
+        weights[label.strip()] = int(w or 1)
+    unknown = set(weights) - {m[0] for m in mix}
+    if unknown:
+        raise ValueError(f"Endpoints desconhecidos no mix: {sorted(unknown)}")
+    return tuple((lbl, meth, path, weights[lbl]) for lbl, meth, path, _w in mix
+                 if weights.get(lbl, 0) > 0)
+
+
+async def load_async(engine: AsyncEngine, base: str, headers, mix, rps: float,
+                     duration: float, timeout: float, seed: int) -> LoadProfile:
+    if not rps > 0:
+        raise ValueError(f"rps deve ser > 0 (recebido {rps:g})")
+    endpoints = {label: EndpointLoad(label, method, path) for label, method, path, _w in mix}
+    choose = random.Random(seed).choices
+    labels = [m[0] for m in mix]
+    weights = [m[3] for m in mix]
+    by_label = {m[0]: m for m in mix}
+    profile = LoadProfile(rps, duration, endpoints)
+    total = int(rps * duration)
+    interval = 1.0 / rps
+    tasks = []
+
+    async def _one(label: str, intended: float, start: float):
+        _lbl, method, path, _w = by_label[label]
+        sent = time.perf_counter()
+        try:
+            r = await engine.request(method, base + path, headers=headers, timeout=timeout)
+            status = r.status_code
+        except RequestError:
+            status = 0
+        done = time.perf_counter()
+        endpoints[label].record(int((intended - start) // TIMELINE_STEP), status,
+                                int((done - intended) * 1e6), int((done - sent) * 1e6))
+
+    start = time.perf_counter()
+    for i, label in enumerate(choose(labels, weights, k=total)):
+        intended = start + i * interval
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            profile.max_lag_ms = max(profile.max_lag_ms, -delay * 1000)
+        tasks.append(asyncio.ensure_future(_one(label, intended, start)))
+    await asyncio.gather(*tasks)
+    profile.elapsed = time.perf_counter() - start
+    return profile
+
+
+def run_load(session, base: str, mix: Sequence = DEFAULT_MIX, rps: float = DEFAULT_RPS,
+             duration: float = DEFAULT_DURATION, connections: int = DEFAULT_CONNECTIONS,
+             timeout: float = DEFAULT_TIMEOUT, fmt: Optional[dict] = None,
+             seed: int = 0) -> LoadProfile:
+    """Replay `mix` at `rps` for `duration` seconds with `session`'s headers."""
+    mix = tuple((lbl, meth, path.format(**(fmt or {})), w) for lbl, meth, path, w in mix)
+    headers = session._merge_headers(None) if hasattr(session, "_merge_headers") \
+        else dict(getattr(session, "headers", {}) or {})
+    engine = AsyncEngine(limit=connections, limit_per_host=connections, retries=0)
+    try:
+        return engine.run(load_async(engine, base.rstrip("/"), headers, mix, rps, duration,
+                                     timeout, seed))
+    finally:
+        engine.close()
+
+
+def format_table(profile: LoadProfile) -> List[str]:
+    """Console lines: one row per endpoint, latency in ms."""
+    lines = [f"{'endpoint':<22} {'req':>6} {'err%':>6} {'p50':>8} {'p90':>8} "
+             f"{'p99':>8} {'p99.9':>8} {'max':>8}"]
+    for label, ep in profile.endpoints.items():
+        h = ep.latency
+        lines.append(f"{label:<22} {ep.count:>6} {ep.error_rate * 100:>5.1f}% "
+                     + " ".join(f"{h.percentile(p) / 1000:>8.1f}" for p in (50, 90, 99, 99.9))
+                     + f" {h.max / 1000:>8.1f}")
+    lines.append(f"alvo {profile.target_rps:g} req/s, obtido {profile.achieved_rps:.1f} req/s, "
+                 f"{profile.sent} requests em {profile.elapsed:.1f}s "
+                 f"(atraso max do gerador {profile.max_lag_ms:.1f}ms)")
+    return lines
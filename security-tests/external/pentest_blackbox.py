@@ -13,11 +13,12 @@ Cobertura: 15 categorias, 120+ testes individuais
 Metodologias: OWASP API Security Top 10, OWASP Web Top 10, CWE
 
 Dependencias:
-    pip install requests aiohttp
+    pip install aiohttp
 
 Uso:
     python pentest_blackbox.py --target https://api.fandreams.app \
-        [--output pentest_blackbox] [--verbose] [--skip-rate-limit]
+        [--output pentest_blackbox] [--verbose] [--skip-rate-limit] [--rate-budget N] [--jobs N]
+        [--trace FILE] [--self-profile sample|cprofile] [--top N]
 
 ============================================================================
 AVISO: Uso EXCLUSIVO em testes de seguranca autorizados da FanDreams.
@@ -32,15 +33,16 @@ import time
 import uuid
 from datetime import datetime, timezone
 from dataclasses import dataclass, field, asdict
-from typing import Optional, List, Dict
+from typing import Optional, Dict
 
-try:
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-except ImportError:
-    print("[!] Dependencia ausente: pip install requests")
-    sys.exit(1)
+import http_engine
+from http_engine import GET, POST, PATCH, DELETE, PUT, HEAD, OPTIONS, safe_json as _safe_json
+from fuzz_engine import FILE_LEAK, SERVER_ERROR, Fuzzer, Target, load_corpus, use_corpus
+from rate_probe import RateProber, DEFAULT_BUDGET
+from report_stream import JsonSink, ResultStream, Sink, Tally, render, slotted
+from request_trace import DEFAULT_TOP, PROFILE_MODES, format_slowest, install
+from result_store import ResultStore, checkpoint
+from scan_scheduler import CategoryScheduler, TimingTable, DEFAULT_JOBS, defer
 
 # --- Constants ---
 FAKE_UUID = str(uuid.uuid4())
@@ -48,6 +50,7 @@ FAKE_UUID2 = str(uuid.uuid4())
 FAKE_UUID3 = str(uuid.uuid4())
 VERSION = "3.0"
 TEST_COUNTER = 0
+TRAVERSAL_PREFIX_BUDGET = 40   # CAT 11 requests per extra prefix (/static/, /api/)
 
 
 # === Console Output Helpers (colored) ========================================
@@ -80,10 +83,12 @@ def vprint(m):
     if VERBOSE:
         print(f"  {C.GR}[DBG] {m}{C.RS}")
 
+http_engine.set_debug(vprint)
+
 
 # === Result Tracking ==========================================================
 
-@dataclass
+@slotted
 class TestResult:
     """Single test result entry."""
     category: str
@@ -102,14 +107,22 @@ class PentestReport:
     scanner: str = f"FanDreams Blackbox Pentest v{VERSION}"
     scan_time: str = ""
     scan_duration: float = 0.0
-    results: List[TestResult] = field(default_factory=list)
-    category_timings: Dict[str, float] = field(default_factory=dict)
+    stream: Optional[ResultStream] = None     # <output>.ndjson, one line per result
+    tally: Tally = field(default_factory=Tally)
+    category_timings: Dict[str, float] = field(default_factory=TimingTable)
     summary: dict = field(default_factory=dict)
 
     def add(self, r: TestResult):
+        checkpoint(asdict(r))
+        # Deferred so parallel categories (--jobs N) commit in declaration order
+        defer(self._record, r)
+
+    def _record(self, r: TestResult):
         global TEST_COUNTER
         TEST_COUNTER += 1
-        self.results.append(r)
+        self.tally.add(r.status, r.severity, r.category)
+        if self.stream is not None:
+            self.stream.write(asdict(r))
         st = r.status
         if st == "PASS":
             ok(f"[{r.test_id}] {r.name}")
@@ -124,25 +137,22 @@ class PentestReport:
 
     def compute_score(self):
         """Compute security score (100 baseline, deduct per failure)."""
-        score = 100
-        for r in self.results:
-            if r.status == "FAIL":
-                score -= {"CRITICAL": 12, "HIGH": 6, "MEDIUM": 3, "LOW": 1, "INFO": 0}.get(r.severity, 1)
-            elif r.status == "WARN":
-                score -= {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0, "INFO": 0}.get(r.severity, 0)
+        t = self.tally
+        score = 100 - t.deduct({"CRITICAL": 12, "HIGH": 6, "MEDIUM": 3, "LOW": 1, "INFO": 0},
+                               {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0, "INFO": 0},
+                               fail_default=1)
         score = max(0, score)
         grade = "A" if score >= 90 else "B" if score >= 80 else "C" if score >= 70 else "D" if score >= 60 else "F"
-        total = len(self.results)
         self.summary = {
-            "total_tests": total,
-            "passed": sum(1 for r in self.results if r.status == "PASS"),
-            "failed": sum(1 for r in self.results if r.status == "FAIL"),
-            "warnings": sum(1 for r in self.results if r.status == "WARN"),
-            "skipped": sum(1 for r in self.results if r.status == "SKIP"),
-            "errors": sum(1 for r in self.results if r.status == "ERROR"),
-            "critical_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "CRITICAL"),
-            "high_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "HIGH"),
-            "medium_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "MEDIUM"),
+            "total_tests": t.total,
+            "passed": t.count("PASS"),
+            "failed": t.count("FAIL"),
+            "warnings": t.count("WARN"),
+            "skipped": t.count("SKIP"),
+            "errors": t.count("ERROR"),
+            "critical_failures": t.count("FAIL", "CRITICAL"),
+            "high_failures": t.count("FAIL", "HIGH"),
+            "medium_failures": t.count("FAIL", "MEDIUM"),
             "score": score,
             "grade": grade,
             "scan_duration_seconds": round(self.scan_duration, 2),
@@ -154,101 +164,8 @@ class PentestReport:
 # === HTTP Helpers =============================================================
 
 def make_session():
-    """Create a requests session with retry logic -- NO auth headers."""
-    s = requests.Session()
-    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
-    s.headers.update({
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "User-Agent": f"FanDreams-BlackboxPentest/{VERSION}",
-    })
-    return s
-
-
-def _safe_json(r):
-    """Safely parse JSON response."""
-    try:
-        return r.json()
-    except Exception:
-        return {"_raw": r.text[:500] if hasattr(r, "text") else str(r)}
-
-
-class _FakeResponse:
-    """Fake response for connection errors."""
-    def __init__(self, error):
-        self.status_code = 0
-        self._error = str(error)
-        self.text = str(error)
-        self.headers = {}
-        self.content = b""
-    def json(self):
-        return {"error": self._error}
-
-
-def GET(session, base, path, **kw):
-    try:
-        r = session.get(f"{base}{path}", timeout=10, **kw)
-        vprint(f"GET {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"GET {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def POST(session, base, path, json_data=None, **kw):
-    try:
-        r = session.post(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"POST {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"POST {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def PATCH(session, base, path, json_data=None, **kw):
-    try:
-        r = session.patch(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"PATCH {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"PATCH {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def DELETE(session, base, path, **kw):
-    try:
-        r = session.delete(f"{base}{path}", timeout=10, **kw)
-        vprint(f"DELETE {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"DELETE {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def PUT(session, base, path, json_data=None, **kw):
-    try:
-        r = session.put(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"PUT {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"PUT {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def HEAD(session, base, path, **kw):
-    try:
-        r = session.head(f"{base}{path}", timeout=10, **kw)
-        vprint(f"HEAD {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"HEAD {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def OPTIONS(session, base, path, **kw):
-    try:
-        r = session.options(f"{base}{path}", timeout=10, **kw)
-        vprint(f"OPTIONS {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"OPTIONS {path} -> ERROR: {e}")
-        return _FakeResponse(e)
+    """Create a session on the shared HTTP engine -- NO auth headers."""
+    return http_engine.make_session(f"FanDreams-BlackboxPentest/{VERSION}")
 
 
 def is_blocked(r, allow_404=True):
@@ -631,8 +548,8 @@ def test_cat02_auth_security(s, base, rpt):
 #  CATEGORY 03: RATE LIMITING (8 tests)
 # ##############################################################################
 
-def test_cat03_rate_limiting(s, base, rpt, skip_rate_limit=False):
-    """Test rate limiting on various endpoints."""
+def test_cat03_rate_limiting(s, base, rpt, skip_rate_limit=False, rate_budget=DEFAULT_BUDGET):
+    """Measure rate limits per endpoint with the adaptive prober (rate_probe)."""
     hdr("CAT 03: Rate Limiting")
     t0 = time.time()
     cat = "03-Rate-Limiting"
@@ -647,71 +564,57 @@ def test_cat03_rate_limiting(s, base, rpt, skip_rate_limit=False):
         rpt.category_timings[cat] = round(time.time() - t0, 2)
         return
 
-    # C03-01: 20 rapid POST /auth/login with wrong credentials
-    tid += 1
-    got_429 = False
-    for i in range(20):
-        r = POST(s, base, "/auth/login", {"email": "rate@test.com", "password": "wrong"})
-        if r.status_code == 429:
-            got_429 = True
-            break
-    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on login (20 requests)",
-                       "HIGH", "PASS" if got_429 else "FAIL",
-                       f"Rate limit ativo no login (429 apos {i+1} tentativas)" if got_429 else
-                       "Sem rate limit no login apos 20 tentativas",
-                       f"Tentativas ate 429: {i+1 if got_429 else '>20'}",
+    prober = RateProber(s, budget=rate_budget)
+
+    def _measured(label, res, fail_status):
+        """Status + description for one probed endpoint."""
+        if res.limited:
+            key = f", chave: {res.key}" if res.key else ""
+            return "PASS", f"Rate limit ativo no {label}: {res.threshold()}{key}"
+        return fail_status, (f"Sem rate limit no {label} apos {res.requests_sent} tentativas "
+                             f"(ate {res.max_rate_tried:.0f} req/s)")
+
+    # C03-01: adaptive probe on POST /auth/login with wrong credentials
+    tid += 1
+    login = prober.probe("POST", f"{base}/auth/login",
+                         json={"email": "rate@test.com", "password": "wrong"},
+                         alt_json={"email": "rate_alt@test.com", "password": "wrong"},
+                         name="/auth/login")
+    status, desc = _measured("login", login, "FAIL")
+    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on login (adaptive)",
+                       "HIGH", status, desc, login.describe(),
                        "Implementar rate limiting no endpoint de login"))
-    time.sleep(1)
-
-    # C03-02: 20 rapid POST /auth/register
-    tid += 1
-    got_429 = False
-    for i in range(20):
-        r = POST(s, base, "/auth/register", {
-            "email": f"rate_{i}_{uuid.uuid4().hex[:4]}@test.com",
-            "password": "Test123!",
-            "username": f"ratetest{i}"
-        })
-        if r.status_code == 429:
-            got_429 = True
-            break
-    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on register (20 requests)",
-                       "HIGH", "PASS" if got_429 else "WARN",
-                       f"Rate limit ativo no registro (429 apos {i+1} tentativas)" if got_429 else
-                       "Sem rate limit no registro apos 20 tentativas",
-                       f"Tentativas: {i+1 if got_429 else '>20'}",
+
+    # C03-02: POST /auth/register, a fresh account per request
+    tid += 1
+    register = prober.probe("POST", f"{base}/auth/register",
+                            body_fn=lambda i: {
+                                "email": f"rate_{i}_{uuid.uuid4().hex[:4]}@test.com",
+                                "password": "Test123!",
+                                "username": f"ratetest{i}"
+                            }, name="/auth/register")
+    status, desc = _measured("registro", register, "WARN")
+    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on register (adaptive)",
+                       "HIGH", status, desc, register.describe(),
                        "Implementar rate limiting no endpoint de registro"))
-    time.sleep(1)
-
-    # C03-03: 20 rapid POST /auth/forgot-password
-    tid += 1
-    got_429 = False
-    for i in range(20):
-        r = POST(s, base, "/auth/forgot-password", {"email": "rate@test.com"})
-        if r.status_code == 429:
-            got_429 = True
-            break
-    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on forgot-password (20 reqs)",
-                       "HIGH", "PASS" if got_429 else "WARN",
-                       f"Rate limit ativo no forgot-password (429 apos {i+1})" if got_429 else
-                       "Sem rate limit no forgot-password apos 20 tentativas",
-                       f"Tentativas: {i+1 if got_429 else '>20'}",
+
+    # C03-03: POST /auth/forgot-password
+    tid += 1
+    forgot = prober.probe("POST", f"{base}/auth/forgot-password",
+                          json={"email": "rate@test.com"},
+                          alt_json={"email": "rate_alt@test.com"},
+                          name="/auth/forgot-password")
+    status, desc = _measured("forgot-password", forgot, "WARN")
+    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on forgot-password (adaptive)",
+                       "HIGH", status, desc, forgot.describe(),
                        "Implementar rate limiting no forgot-password"))
-    time.sleep(1)
-
-    # C03-04: 20 rapid GET /
-    tid += 1
-    got_429 = False
-    for i in range(20):
-        r = GET(s, base, "/")
-        if r.status_code == 429:
-            got_429 = True
-            break
-    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on GET / (20 requests)",
-                       "MEDIUM", "PASS" if got_429 else "WARN",
-                       f"Rate limit geral ativo (429 apos {i+1})" if got_429 else
-                       "Sem rate limit geral apos 20 requests rapidas",
-                       f"Tentativas: {i+1 if got_429 else '>20'}"))
+
+    # C03-04: GET / (global limit)
+    tid += 1
+    root = prober.probe("GET", f"{base}/", name="/")
+    status, desc = _measured("GET /", root, "WARN")
+    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit on GET / (adaptive)",
+                       "MEDIUM", status, desc, root.describe()))
 
     # C03-05: Check rate limit headers
     tid += 1
@@ -730,42 +633,41 @@ def test_cat03_rate_limiting(s, base, rpt, skip_rate_limit=False):
                        f"Headers presentes: {list(headers.keys())}",
                        "Adicionar headers X-RateLimit-* para informar clientes"))
 
-    # C03-06: Send 50 rapid requests to check if limit kicks in
-    tid += 1
-    got_429 = False
-    count_until_429 = 0
-    for i in range(50):
-        r = POST(s, base, "/auth/login", {"email": "flood@test.com", "password": "wrong"})
-        if r.status_code == 429:
-            got_429 = True
-            count_until_429 = i + 1
-            break
-    rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit threshold (50 rapid login)",
-                       "HIGH", "PASS" if got_429 else "FAIL",
-                       f"Rate limit em {count_until_429} requests" if got_429 else
-                       "Sem rate limit mesmo apos 50 tentativas rapidas",
-                       f"Requests ate bloqueio: {count_until_429 if got_429 else '>50'}",
-                       "Implementar rate limiting agressivo em endpoints de autenticacao"))
-    time.sleep(2)
-
-    # C03-07: Check Retry-After header presence
-    tid += 1
-    # Use last response if 429, or send more requests
-    retry_after = None
-    if got_429:
-        retry_after = r.headers.get("Retry-After") if hasattr(r, "headers") else None
+    # C03-06: Login limit per key -- IP vs. account
+    tid += 1
+    if login.key == "account":
+        # Per-email counter: measure what a single IP gets rotating emails
+        by_ip = prober.probe("POST", f"{base}/auth/login",
+                             body_fn=lambda i: {"email": f"rate_ip_{i}@test.com", "password": "wrong"},
+                             name="/auth/login (IP)")
+        rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit key on login (IP vs conta)",
+                           "HIGH", "PASS" if by_ip.limited else "FAIL",
+                           f"Por conta: {login.threshold()} | por IP: {by_ip.threshold()}",
+                           by_ip.describe(),
+                           "" if by_ip.limited else
+                           "Limitar tambem por IP: credential stuffing rotacionando emails passa"))
+    elif login.limited:
+        rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit key on login (IP vs conta)",
+                           "HIGH", "PASS",
+                           f"Por IP: {login.threshold()} (vale para qualquer email)",
+                           login.describe()))
     else:
-        for i in range(30):
-            r = POST(s, base, "/auth/login", {"email": "retry@test.com", "password": "wrong"})
-            if r.status_code == 429:
-                retry_after = r.headers.get("Retry-After") if hasattr(r, "headers") else None
-                break
+        rpt.add(TestResult(cat, f"C03-{tid:02d}", "Rate limit key on login (IP vs conta)",
+                           "HIGH", "FAIL",
+                           f"Nenhum limite por IP ou conta apos {login.requests_sent} tentativas",
+                           login.describe(),
+                           "Implementar rate limiting agressivo em endpoints de autenticacao"))
+
+    # C03-07: Retry-After header on the 429s seen above
+    tid += 1
+    blocked = [res for res in (login, register, forgot, root) if res.limited]
+    retry_after = next((res.retry_after_raw for res in blocked if res.retry_after_raw), None)
     rpt.add(TestResult(cat, f"C03-{tid:02d}", "Retry-After header on 429",
                        "LOW", "PASS" if retry_after else "WARN",
                        f"Retry-After: {retry_after}" if retry_after else
-                       "Header Retry-After ausente nas respostas 429",
+                       "Header Retry-After ausente nas respostas 429" if blocked else
+                       "Nenhum 429 observado para verificar Retry-After",
                        recommendation="Incluir header Retry-After em respostas 429"))
-    time.sleep(2)
 
     # C03-08: Check rate limit consistency
     tid += 1
@@ -1595,7 +1497,7 @@ def test_cat10_security_headers(s, base, rpt):
 
 
 # ##############################################################################
-#  CATEGORY 11: PATH TRAVERSAL & DIRECTORY LISTING (8 tests)
+#  CATEGORY 11: PATH TRAVERSAL & DIRECTORY LISTING (6 tests)
 # ##############################################################################
 
 def test_cat11_path_traversal(s, base, rpt):
@@ -1605,40 +1507,40 @@ def test_cat11_path_traversal(s, base, rpt):
     cat = "11-Path-Traversal"
     tid = 0
 
-    passwd_indicators = ("root:", "/bin/bash", "/bin/sh", "daemon:", "nobody:")
-
-    # C11-01: GET /../../etc/passwd
-    tid += 1
-    r = GET(s, base, "/../../etc/passwd")
-    body = r.text if hasattr(r, "text") else ""
-    traversed = any(ind in body for ind in passwd_indicators)
-    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal ../../etc/passwd",
-                       "CRITICAL", "FAIL" if traversed else "PASS",
-                       "Path traversal expoe /etc/passwd!" if traversed else
-                       f"Path traversal bloqueado ({r.status_code})",
-                       f"Body (100c): {body[:100]}",
-                       "Sanitizar paths e bloquear traversal"))
-
-    # C11-02: GET /%2e%2e%2f%2e%2e%2fetc%2fpasswd
-    tid += 1
-    r = GET(s, base, "/%2e%2e%2f%2e%2e%2fetc%2fpasswd")
-    body = r.text if hasattr(r, "text") else ""
-    traversed = any(ind in body for ind in passwd_indicators)
-    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal (URL encoded)",
-                       "CRITICAL", "FAIL" if traversed else "PASS",
-                       "Path traversal (encoded) expoe /etc/passwd!" if traversed else
-                       f"Path traversal encoded bloqueado ({r.status_code})",
-                       f"Body (100c): {body[:100]}"))
-
-    # C11-03: GET /static/../../../etc/passwd
-    tid += 1
-    r = GET(s, base, "/static/../../../etc/passwd")
-    body = r.text if hasattr(r, "text") else ""
-    traversed = any(ind in body for ind in passwd_indicators)
-    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal via /static/",
-                       "CRITICAL", "FAIL" if traversed else "PASS",
-                       "Path traversal via /static/ expoe arquivos!" if traversed else
-                       f"Traversal via /static/ bloqueado ({r.status_code})"))
+    # C11-01..03: full traversal corpus (depth x encoding x file) under /, an evenly
+    # spread sample of it under /static/ and /api/
+    targets = [Target("GET", "/{}", "path", families=("traversal",), name="/")]
+    targets += [Target("GET", prefix + "{}", "path", families=("traversal",), name=prefix,
+                       budget=TRAVERSAL_PREFIX_BUDGET) for prefix in ("/static/", "/api/")]
+    rep = Fuzzer(s, base).run(targets)
+    info(rep.describe())
+    leaks = rep.hits(FILE_LEAK)
+    inc = rep.inconclusive()
+
+    tid += 1
+    passwd = [h for h in leaks if ".env" not in h.payload]
+    rpt.add(TestResult(cat, f"C11-{tid:02d}", f"Path traversal ({rep.sent} variantes)",
+                       "CRITICAL", "FAIL" if passwd else "WARN" if inc else "PASS",
+                       f"Path traversal expoe arquivos em {len(passwd)} variantes!" if passwd else
+                       inc or f"Path traversal bloqueado (status {rep.statuses()})",
+                       "\n".join(h.describe() for h in passwd[:5]),
+                       "Sanitizar paths e bloquear traversal (inclusive encoded/double-encoded)"))
+
+    tid += 1
+    env = [h for h in leaks if ".env" in h.payload]
+    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal para .env",
+                       "CRITICAL", "FAIL" if env else "WARN" if inc else "PASS",
+                       ".env acessivel via path traversal!" if env else
+                       inc or f"Traversal para .env bloqueado ({rep.sent_for('traversal')} variantes)",
+                       "\n".join(h.describe() for h in env[:5])))
+
+    tid += 1
+    errors = rep.hits(SERVER_ERROR)
+    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal: erros 5xx",
+                       "MEDIUM", "WARN" if errors else "PASS",
+                       f"{len(errors)} variantes causaram 5xx" if errors else "Nenhum 5xx",
+                       "\n".join(h.describe() for h in errors[:5]),
+                       "Tratar paths malformados sem erro interno"))
 
     # C11-04: GET /uploads/ — directory listing
     tid += 1
@@ -1664,27 +1566,7 @@ def test_cat11_path_traversal(s, base, rpt):
                        "Directory listing ativo em /public/!" if has_listing else
                        f"/public/ sem directory listing ({r.status_code})"))
 
-    # C11-06: GET /api/../.env
-    tid += 1
-    r = GET(s, base, "/api/../.env")
-    body = r.text if hasattr(r, "text") else ""
-    has_secrets = r.status_code == 200 and any(kw in body for kw in ("DB_", "SECRET", "KEY=", "PASSWORD"))
-    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal /api/../.env",
-                       "CRITICAL", "FAIL" if has_secrets else "PASS",
-                       ".env acessivel via path traversal!" if has_secrets else
-                       f"Traversal para .env bloqueado ({r.status_code})"))
-
-    # C11-07: GET /..%252f..%252fetc%252fpasswd (double encoding)
-    tid += 1
-    r = GET(s, base, "/..%252f..%252fetc%252fpasswd")
-    body = r.text if hasattr(r, "text") else ""
-    traversed = any(ind in body for ind in passwd_indicators)
-    rpt.add(TestResult(cat, f"C11-{tid:02d}", "Path traversal (double encoding)",
-                       "CRITICAL", "FAIL" if traversed else "PASS",
-                       "Double-encoded traversal expoe arquivos!" if traversed else
-                       f"Double-encoded traversal bloqueado ({r.status_code})"))
-
-    # C11-08: GET /.well-known/security.txt
+    # C11-06: GET /.well-known/security.txt
     tid += 1
     r = GET(s, base, "/.well-known/security.txt")
     has_security_txt = r.status_code == 200 and len(r.text if hasattr(r, "text") else "") > 10
@@ -1972,7 +1854,7 @@ def test_cat14_transport(s, base, rpt):
     tid += 1
     http_base = base.replace("https://", "http://")
     try:
-        r = requests.get(http_base + "/", timeout=10, allow_redirects=False)
+        r = make_session().get(http_base + "/", timeout=10, allow_redirects=False)
         redirects_https = r.status_code in (301, 302, 307, 308) and \
                           "https" in r.headers.get("Location", "").lower()
         if base.startswith("http://"):
@@ -2163,69 +2045,74 @@ def test_cat15_dos_vectors(s, base, rpt):
 #  REPORT GENERATION
 # ##############################################################################
 
-def generate_txt_report(rpt):
-    """Generate a text report."""
-    lines = []
-    lines.append("=" * 72)
-    lines.append("  FANDREAMS BLACKBOX PENETRATION TEST REPORT v3.0")
-    lines.append("=" * 72)
-    lines.append(f"  Target:    {rpt.target}")
-    lines.append(f"  Scanner:   {rpt.scanner}")
-    lines.append(f"  Date:      {rpt.scan_time}")
-    lines.append(f"  Duration:  {rpt.scan_duration:.2f}s")
-    lines.append(f"  Type:      Unauthenticated / Blackbox")
-    lines.append("")
-
-    sm = rpt.summary
-    lines.append("  SUMMARY")
-    lines.append(f"  Score:     {sm.get('score', '?')}/100 (Grade {sm.get('grade', '?')})")
-    lines.append(f"  Total:     {sm.get('total_tests', 0)}")
-    lines.append(f"  Passed:    {sm.get('passed', 0)}")
-    lines.append(f"  Failed:    {sm.get('failed', 0)}")
-    lines.append(f"  Warnings:  {sm.get('warnings', 0)}")
-    lines.append(f"  Skipped:   {sm.get('skipped', 0)}")
-    lines.append(f"  Errors:    {sm.get('errors', 0)}")
-    if sm.get("critical_failures"):
-        lines.append(f"  CRITICAL:  {sm['critical_failures']}")
-    if sm.get("high_failures"):
-        lines.append(f"  HIGH:      {sm['high_failures']}")
-    lines.append("")
-    lines.append("=" * 72)
-    lines.append("  DETAILED RESULTS")
-    lines.append("=" * 72)
-
-    current_cat = ""
-    for r in rpt.results:
-        if r.category != current_cat:
-            current_cat = r.category
-            lines.append(f"\n  --- {current_cat} ---")
+class TxtReport(Sink):
+    """Text report, rendered from the result stream."""
+
+    def __init__(self, path, rpt):
+        super().__init__(path)
+        self.rpt = rpt
+        self.current_cat = ""
+
+    def head(self):
+        rpt = self.rpt
+        self.line("=" * 72)
+        self.line("  FANDREAMS BLACKBOX PENETRATION TEST REPORT v3.0")
+        self.line("=" * 72)
+        self.line(f"  Target:    {rpt.target}")
+        self.line(f"  Scanner:   {rpt.scanner}")
+        self.line(f"  Date:      {rpt.scan_time}")
+        self.line(f"  Duration:  {rpt.scan_duration:.2f}s")
+        self.line(f"  Type:      Unauthenticated / Blackbox")
+        self.line()
+
+        sm = rpt.summary
+        self.line("  SUMMARY")
+        self.line(f"  Score:     {sm.get('score', '?')}/100 (Grade {sm.get('grade', '?')})")
+        self.line(f"  Total:     {sm.get('total_tests', 0)}")
+        self.line(f"  Passed:    {sm.get('passed', 0)}")
+        self.line(f"  Failed:    {sm.get('failed', 0)}")
+        self.line(f"  Warnings:  {sm.get('warnings', 0)}")
+        self.line(f"  Skipped:   {sm.get('skipped', 0)}")
+        self.line(f"  Errors:    {sm.get('errors', 0)}")
+        if sm.get("critical_failures"):
+            self.line(f"  CRITICAL:  {sm['critical_failures']}")
+        if sm.get("high_failures"):
+            self.line(f"  HIGH:      {sm['high_failures']}")
+        self.line()
+        self.line("=" * 72)
+        self.line("  DETAILED RESULTS")
+        self.line("=" * 72)
+
+    def row(self, kind, r):
+        if r["category"] != self.current_cat:
+            self.current_cat = r["category"]
+            self.line(f"\n  --- {self.current_cat} ---")
         status_marker = {"PASS": "[OK]", "FAIL": "[!!]", "WARN": "[??]",
-                         "SKIP": "[--]", "ERROR": "[EE]"}.get(r.status, "[??]")
-        lines.append(f"  {status_marker} [{r.test_id}] {r.name}")
-        lines.append(f"       Severity: {r.severity} | Status: {r.status}")
-        lines.append(f"       {r.description}")
-        if r.details:
-            lines.append(f"       Details: {r.details[:200]}")
-        if r.recommendation:
-            lines.append(f"       Fix: {r.recommendation}")
-
-    lines.append("")
-    lines.append("=" * 72)
-    lines.append("  CATEGORY TIMINGS")
-    lines.append("=" * 72)
-    for cat_name, timing in rpt.category_timings.items():
-        lines.append(f"  {cat_name}: {timing}s")
-
-    lines.append("")
-    lines.append("=" * 72)
-    lines.append("  END OF REPORT")
-    lines.append("=" * 72)
-
-    return "\n".join(lines)
+                         "SKIP": "[--]", "ERROR": "[EE]"}.get(r["status"], "[??]")
+        self.line(f"  {status_marker} [{r['test_id']}] {r['name']}")
+        self.line(f"       Severity: {r['severity']} | Status: {r['status']}")
+        self.line(f"       {r['description']}")
+        if r["details"]:
+            self.line(f"       Details: {r['details'][:200]}")
+        if r["recommendation"]:
+            self.line(f"       Fix: {r['recommendation']}")
+
+    def tail(self):
+        self.line()
+        self.line("=" * 72)
+        self.line("  CATEGORY TIMINGS")
+        self.line("=" * 72)
+        for cat_name, timing in self.rpt.category_timings.items():
+            self.line(f"  {cat_name}: {timing}s")
+
+        self.line()
+        self.line("=" * 72)
+        self.line("  END OF REPORT")
+        self.line("=" * 72)
 
 
 def generate_json_report(rpt):
-    """Generate a JSON report."""
+    """JSON report skeleton; `results` is filled from the stream by JsonSink."""
     return {
         "meta": {
             "target": rpt.target,
@@ -2237,7 +2124,7 @@ def generate_json_report(rpt):
         },
         "summary": rpt.summary,
         "category_timings": rpt.category_timings,
-        "results": [asdict(r) for r in rpt.results],
+        "results": [],
     }
 
 
@@ -2256,6 +2143,7 @@ Examples:
     python pentest_blackbox.py --target https://api.fandreams.app
     python pentest_blackbox.py --target https://api.fandreams.app --output report_bb --verbose
     python pentest_blackbox.py --target https://api.fandreams.app --skip-rate-limit
+    python pentest_blackbox.py --target https://api.fandreams.app --jobs 8
         """
     )
     parser.add_argument("--target", required=True,
@@ -2266,12 +2154,37 @@ Examples:
                         help="Enable verbose/debug output")
     parser.add_argument("--skip-rate-limit", action="store_true",
                         help="Skip rate limiting tests (CAT 03)")
+    parser.add_argument("--rate-budget", type=int, default=DEFAULT_BUDGET,
+                        help=f"Max requests per endpoint in CAT 03 probes (default: {DEFAULT_BUDGET})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted scan of this target/account")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Reuse results of categories whose endpoints did not change")
+    parser.add_argument("--store", default=None,
+                        help="Result store (SQLite, default: <output>.db)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"Categories run in parallel (default: {DEFAULT_JOBS}, 1 = sequential)")
+    parser.add_argument("--payloads", default="",
+                        help="Extra fuzz payload files (.txt/.json, comma-separated)")
+    parser.add_argument("--trace", default=None,
+                        help="Write every request as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)")
+    parser.add_argument("--self-profile", choices=PROFILE_MODES, default=None,
+                        help="Profile each category on the scanner side (<output>.profile/)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Rows of the slowest-endpoints table (default: {DEFAULT_TOP}, 0 = off)")
     args = parser.parse_args()
+    if args.payloads:
+        try:
+            use_corpus(load_corpus(args.payloads.split(",")))
+        except (OSError, ValueError) as e:
+            parser.error(f"--payloads: {e}")
 
     VERBOSE = args.verbose
     target = args.target.rstrip("/")
     if not target.endswith("/api/v1"):
         target += "/api/v1"
+    tracer = install(trace=args.trace, profile=args.self_profile,
+                     profile_dir=f"{args.output}.profile")
 
     print(f"\n{C.BD}{C.M}")
     print("  +======================================================================+")
@@ -2282,13 +2195,14 @@ Examples:
     print(f"{C.RS}")
 
     info(f"Target: {target}")
-    info(f"Output: {args.output}.json / {args.output}.txt")
+    info(f"Output: {args.output}.json / {args.output}.txt (stream: {args.output}.ndjson)")
     info(f"Verbose: {args.verbose}")
     info(f"Skip rate limit: {args.skip_rate_limit}")
+    info(f"Jobs: {args.jobs}")
     print()
 
     # Initialize report
-    rpt = PentestReport(target=target)
+    rpt = PentestReport(target=target, stream=ResultStream(f"{args.output}.ndjson"))
     rpt.scan_time = datetime.now(timezone.utc).isoformat()
 
     # Create session (NO auth)
@@ -2307,21 +2221,33 @@ Examples:
     t_global = time.time()
 
     # ── Run all categories ──
-    test_cat01_info_disclosure(s, target, rpt)
-    test_cat02_auth_security(s, target, rpt)
-    test_cat03_rate_limiting(s, target, rpt, skip_rate_limit=args.skip_rate_limit)
-    test_cat04_cors(s, target, rpt)
-    test_cat05_unauth_access(s, target, rpt)
-    test_cat06_public_endpoints(s, target, rpt)
-    test_cat07_registration_abuse(s, target, rpt)
-    test_cat08_password_reset(s, target, rpt)
-    test_cat09_method_confusion(s, target, rpt)
-    test_cat10_security_headers(s, target, rpt)
-    test_cat11_path_traversal(s, target, rpt)
-    test_cat12_api_abuse(s, target, rpt)
-    test_cat13_webhook_security(s, target, rpt)
-    test_cat14_transport(s, target, rpt)
-    test_cat15_dos_vectors(s, target, rpt)
+    # Exclusive categories run alone (rate-limit / DoS sensitive)
+    store = ResultStore(args.store or f"{args.output}.db", "pentest_blackbox", VERSION, __file__,
+                        target, "", replay=lambda d: rpt.add(TestResult(**d)), log=info,
+                        timings=rpt.category_timings)
+    store.start(s, resume=args.resume, changed_only=args.changed_only)
+
+    sched = CategoryScheduler(jobs=args.jobs)
+    sched.add(store.wrap(test_cat01_info_disclosure), s, target, rpt)
+    sched.add(store.wrap(test_cat02_auth_security), s, target, rpt)
+    sched.add(store.wrap(test_cat03_rate_limiting), s, target, rpt, skip_rate_limit=args.skip_rate_limit,
+              rate_budget=args.rate_budget, exclusive=True)
+    sched.add(store.wrap(test_cat04_cors), s, target, rpt)
+    sched.add(store.wrap(test_cat05_unauth_access), s, target, rpt)
+    sched.add(store.wrap(test_cat06_public_endpoints), s, target, rpt)
+    sched.add(store.wrap(test_cat07_registration_abuse), s, target, rpt)
+    sched.add(store.wrap(test_cat08_password_reset), s, target, rpt)
+    sched.add(store.wrap(test_cat09_method_confusion), s, target, rpt)
+    sched.add(store.wrap(test_cat10_security_headers), s, target, rpt)
+    sched.add(store.wrap(test_cat11_path_traversal), s, target, rpt, exclusive=True)
+    sched.add(store.wrap(test_cat12_api_abuse), s, target, rpt)
+    sched.add(store.wrap(test_cat13_webhook_security), s, target, rpt)
+    sched.add(store.wrap(test_cat14_transport), s, target, rpt)
+    sched.add(store.wrap(test_cat15_dos_vectors), s, target, rpt, exclusive=True)
+    sched.run()
+    store.finish()
+    if store.reused:
+        info(f"{store.reused} categorias reutilizadas do scan #{store.baseline} (--changed-only)")
 
     rpt.scan_duration = time.time() - t_global
 
@@ -2353,22 +2279,23 @@ Examples:
     for cat_name, timing in rpt.category_timings.items():
         print(f"    {cat_name}: {timing}s")
 
-    # ── Export reports ──
-    json_report = generate_json_report(rpt)
-    txt_report = generate_txt_report(rpt)
+    slowest = format_slowest(tracer, args.top)
+    if slowest:
+        print(f"\n  {C.BD}Endpoints mais lentos (ms, por p95):{C.RS}")
+        for line in slowest:
+            print(f"    {line}")
 
+    # ── Export reports (one pass over the result stream) ──
     json_file = f"{args.output}.json"
     txt_file = f"{args.output}.txt"
-
-    with open(json_file, "w", encoding="utf-8") as f:
-        json.dump(json_report, f, indent=2, ensure_ascii=False)
-
-    with open(txt_file, "w", encoding="utf-8") as f:
-        f.write(txt_report)
+    render(rpt.stream.close(), JsonSink(json_file, generate_json_report(rpt)),
+           TxtReport(txt_file, rpt))
 
     print(f"\n  Relatorios exportados:")
     print(f"    {C.CY}{json_file}{C.RS} (JSON)")
     print(f"    {C.CY}{txt_file}{C.RS} (TXT)")
+    for path in tracer.close():
+        print(f"    Trace/perfil: {C.CY}{path}{C.RS}")
     print(f"  {C.BD}Copie o .json e traga de volta ao Claude para consolidacao.{C.RS}\n")
 
     # Return exit code based on critical failures
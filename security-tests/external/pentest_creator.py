@@ -9,7 +9,7 @@ Metodologias: OWASP API Top 10, BOLA, BFLA, Mass Assignment, Race Conditions,
               Business Logic, Injection, Financial Manipulation
 
 Dependencias:
-    pip install requests aiohttp
+    pip install aiohttp
 
 Uso:
     python pentest_creator.py --target https://api.fandreams.app \
@@ -21,7 +21,6 @@ AVISO: Uso EXCLUSIVO em testes de seguranca autorizados da FanDreams.
 """
 
 import argparse
-import asyncio
 import json
 import sys
 import time
@@ -31,21 +30,20 @@ import base64
 import hmac
 from datetime import datetime, timezone
 from dataclasses import dataclass, field, asdict
-from typing import Optional, List, Dict
-
-try:
-    import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-except ImportError:
-    print("[!] Dependencia ausente: pip install requests")
-    sys.exit(1)
-
-try:
-    import aiohttp
-except ImportError:
-    print("[!] Dependencia ausente: pip install aiohttp")
-    sys.exit(1)
+from typing import Optional, Dict
+
+import http_engine
+from http_engine import GET, POST, PATCH, DELETE, safe_json as _safe_json
+from fuzz_engine import ACCEPTED, FILE_LEAK, HEADER_INJECTION, REFLECTION, SERVER_ERROR, \
+    SQL_ERROR, TIMING, Fuzzer, Target, load_corpus, use_corpus
+from load_engine import DEFAULT_MIX, DEFAULT_RPS, DEFAULT_DURATION, ERROR_RATE_WARN, \
+    format_table, parse_mix, run_load
+from race_engine import run_race
+from report_stream import JsonSink, ResultStream, Sink, Tally, render, slotted
+from request_trace import DEFAULT_TOP, PROFILE_MODES, format_slowest, install
+from result_store import ResultStore, checkpoint
+from scan_scheduler import CategoryScheduler, TimingTable, DEFAULT_JOBS, defer
+import token_cache
 
 # --- Constants ---
 FAKE_UUID = str(uuid.uuid4())
@@ -53,6 +51,9 @@ FAKE_UUID2 = str(uuid.uuid4())
 FAKE_UUID3 = str(uuid.uuid4())
 VERSION = "3.0"
 TEST_COUNTER = 0
+RACE_N = 10          # --race-n: concurrent requests per race
+RACE_PAD = 0         # --race-pad: extra body bytes (JSON whitespace)
+LOGIN_FUZZ_BUDGET = 6  # requests to /auth/login in the fuzz (authRateLimit: 10/15min)
 
 
 # === Console Output Helpers ===================================================
@@ -81,10 +82,12 @@ def vprint(m):
     if VERBOSE:
         print(f"  {C.GR}[DBG] {m}{C.RS}")
 
+http_engine.set_debug(vprint)
+
 
 # === Result Tracking ==========================================================
 
-@dataclass
+@slotted
 class TestResult:
     category: str
     test_id: str
@@ -107,14 +110,23 @@ class PentestReport:
     username: str = ""
     access_token: str = ""
     refresh_token: str = ""
-    results: List[TestResult] = field(default_factory=list)
-    category_timings: Dict[str, float] = field(default_factory=dict)
+    stream: Optional[ResultStream] = None     # <output>.ndjson, one line per result
+    tally: Tally = field(default_factory=Tally)
+    category_timings: Dict[str, float] = field(default_factory=TimingTable)
+    load_profile: dict = field(default_factory=dict)
     summary: dict = field(default_factory=dict)
 
     def add(self, r: TestResult):
+        checkpoint(asdict(r))
+        # Deferred so parallel categories (--jobs N) commit in declaration order
+        defer(self._record, r)
+
+    def _record(self, r: TestResult):
         global TEST_COUNTER
         TEST_COUNTER += 1
-        self.results.append(r)
+        self.tally.add(r.status, r.severity, r.category)
+        if self.stream is not None:
+            self.stream.write(asdict(r))
         st = r.status
         if st == "PASS": ok(f"[{r.test_id}] {r.name}")
         elif st == "FAIL": fail(f"[{r.test_id}] {r.name} — {r.description}")
@@ -123,52 +135,71 @@ class PentestReport:
         else: info(f"[{r.test_id}] {r.name}")
 
     def compute_score(self):
-        score = 100
-        for r in self.results:
-            if r.status == "FAIL":
-                score -= {"CRITICAL": 12, "HIGH": 6, "MEDIUM": 3, "LOW": 1, "INFO": 0}.get(r.severity, 1)
-            elif r.status == "WARN":
-                score -= {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0, "INFO": 0}.get(r.severity, 0)
+        t = self.tally
+        score = 100 - t.deduct({"CRITICAL": 12, "HIGH": 6, "MEDIUM": 3, "LOW": 1, "INFO": 0},
+                               {"CRITICAL": 4, "HIGH": 2, "MEDIUM": 1, "LOW": 0, "INFO": 0},
+                               fail_default=1)
         score = max(0, score)
         grade = "A" if score >= 90 else "B" if score >= 80 else "C" if score >= 70 else "D" if score >= 60 else "F"
-        total = len(self.results)
         self.summary = {
-            "total_tests": total,
-            "passed": sum(1 for r in self.results if r.status == "PASS"),
-            "failed": sum(1 for r in self.results if r.status == "FAIL"),
-            "warnings": sum(1 for r in self.results if r.status == "WARN"),
-            "skipped": sum(1 for r in self.results if r.status == "SKIP"),
-            "errors": sum(1 for r in self.results if r.status == "ERROR"),
-            "critical_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "CRITICAL"),
-            "high_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "HIGH"),
-            "medium_failures": sum(1 for r in self.results if r.status == "FAIL" and r.severity == "MEDIUM"),
+            "total_tests": t.total,
+            "passed": t.count("PASS"),
+            "failed": t.count("FAIL"),
+            "warnings": t.count("WARN"),
+            "skipped": t.count("SKIP"),
+            "errors": t.count("ERROR"),
+            "critical_failures": t.count("FAIL", "CRITICAL"),
+            "high_failures": t.count("FAIL", "HIGH"),
+            "medium_failures": t.count("FAIL", "MEDIUM"),
             "score": score,
             "grade": grade,
             "scan_duration_seconds": round(self.scan_duration, 2),
             "category_timings": self.category_timings,
+            "load_profile": self.load_profile,
         }
         return score, grade
 
 
+class TxtReport(Sink):
+    """Plain-text report, rendered from the result stream."""
+
+    def __init__(self, path: str, rpt: PentestReport):
+        super().__init__(path)
+        self.rpt = rpt
+
+    def head(self):
+        rpt, sm = self.rpt, self.rpt.summary
+        self.line(f"FanDreams Creator Pentest v{VERSION}")
+        self.line(f"{'='*60}")
+        self.line(f"Target: {rpt.target}")
+        self.line(f"Scan Time: {rpt.scan_time}")
+        self.line(f"User: {rpt.user_email} (role={rpt.user_role}, id={rpt.user_id})")
+        self.line(f"Score: {sm['score']}/100 (Grade {sm['grade']})\n")
+        self.line(f"Total: {sm['total_tests']} | Pass: {sm['passed']} | Fail: {sm['failed']} | "
+                  f"Warn: {sm['warnings']} | Skip: {sm['skipped']}")
+        self.line(f"Critical: {sm['critical_failures']} | High: {sm['high_failures']} | "
+                  f"Medium: {sm['medium_failures']}\n")
+
+    def row(self, kind, r):
+        self.line(f"[{r['status']:4s}] [{r['severity']:8s}] {r['test_id']} — {r['name']}")
+        self.line(f"       {r['description']}")
+        if r["details"]:
+            self.line(f"       Details: {r['details']}")
+        if r["recommendation"]:
+            self.line(f"       Rec: {r['recommendation']}")
+        self.line()
+
+
 # === HTTP Helpers =============================================================
 
 def make_session():
-    s = requests.Session()
-    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
-    s.headers.update({
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "User-Agent": f"FanDreams-CreatorPentest/{VERSION}",
-    })
-    return s
+    return http_engine.make_session(f"FanDreams-CreatorPentest/{VERSION}")
 
 
 def do_login(session, base, email, password):
     info(f"Autenticando como {email}...")
     try:
-        r = session.post(f"{base}/auth/login", json={"email": email, "password": password}, timeout=15)
+        r = token_cache.login(session, base, email, password)
         d = r.json()
         if r.status_code == 200 and d.get("success"):
             data = d["data"]
@@ -185,68 +216,6 @@ def do_login(session, base, email, password):
         sys.exit(1)
 
 
-def _safe_json(r):
-    try:
-        return r.json()
-    except Exception:
-        return {"_raw": r.text[:500] if hasattr(r, "text") else str(r)}
-
-
-class _FakeResponse:
-    def __init__(self, error):
-        self.status_code = 0
-        self._error = str(error)
-        self.headers = {}
-    def json(self):
-        return {"error": self._error}
-
-
-def GET(session, base, path, **kw):
-    try:
-        r = session.get(f"{base}{path}", timeout=10, **kw)
-        vprint(f"GET {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"GET {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def POST(session, base, path, json_data=None, **kw):
-    try:
-        r = session.post(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"POST {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"POST {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def PATCH(session, base, path, json_data=None, **kw):
-    try:
-        r = session.patch(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"PATCH {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"PATCH {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def DELETE(session, base, path, **kw):
-    try:
-        r = session.delete(f"{base}{path}", timeout=10, **kw)
-        vprint(f"DELETE {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"DELETE {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-def PUT(session, base, path, json_data=None, **kw):
-    try:
-        r = session.put(f"{base}{path}", json=json_data, timeout=10, **kw)
-        vprint(f"PUT {path} -> {r.status_code}")
-        return r
-    except Exception as e:
-        vprint(f"PUT {path} -> ERROR: {e}")
-        return _FakeResponse(e)
-
-
 def is_blocked(r, allow_404=True):
     if r.status_code == 0: return True
     if r.status_code in (401, 403): return True
@@ -1889,26 +1858,14 @@ def test_cat23_token_security(s, base, rpt, access_token, refresh_token):
 
 
 # ##############################################################################
-#  CAT 24: RACE CONDITIONS (4 tests, async)
+#  CAT 24: RACE CONDITIONS (4 tests, last-byte sync)
 # ##############################################################################
 
-async def _race_test(base, token, path, body, n=10):
-    """Fire n concurrent requests and return list of (status, body)."""
-    results = []
-    async with aiohttp.ClientSession(headers={
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }) as session:
-        async def fire():
-            try:
-                async with session.post(f"{base}{path}", json=body, timeout=aiohttp.ClientTimeout(total=10)) as r:
-                    text = await r.text()
-                    return r.status, text[:200]
-            except Exception as e:
-                return 0, str(e)[:100]
-        tasks = [fire() for _ in range(n)]
-        results = await asyncio.gather(*tasks)
-    return results
+def _race_test(base, token, path, body, n=None):
+    """Last-byte synchronized race over n pre-warmed connections (race_engine)."""
+    tmp = make_session()
+    tmp.headers["Authorization"] = f"Bearer {token}"
+    return run_race(tmp, "POST", f"{base}{path}", json=body, n=n or RACE_N, pad=RACE_PAD)
 
 
 def test_cat24_race_conditions(s, base, rpt, uid, access_token):
@@ -1917,123 +1874,206 @@ def test_cat24_race_conditions(s, base, rpt, uid, access_token):
     cat = "24-Race-Conditions"
     tid = 0
 
-    loop = asyncio.new_event_loop()
-
     # Rapid tip race
     tid += 1
     try:
-        results = loop.run_until_complete(_race_test(base, access_token, "/fancoins/tip",
-                                                     {"creatorId": FAKE_UUID, "amount": 1}, 10))
-        successes = sum(1 for st, _ in results if st in (200, 201))
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x tip simultaneo",
+        race = _race_test(base, access_token, "/fancoins/tip",
+                          {"creatorId": FAKE_UUID, "amount": 1})
+        successes = race.count_success()
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x tip simultaneo",
                            "HIGH", "WARN" if successes > 3 else "PASS",
-                           f"{successes}/10 aceitos" + (" (possivel race)" if successes > 3 else ""),
+                           f"{successes}/{race.n} aceitos (write skew {race.send_skew_ms:.2f}ms)" + (" (possivel race)" if successes > 3 else ""),
+                           race.describe(),
                            recommendation="Implementar lock/debounce em tips"))
     except Exception as e:
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x tip simultaneo",
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x tip simultaneo",
                            "HIGH", "SKIP", f"Erro: {str(e)[:100]}"))
 
     # Rapid subscription race
     tid += 1
     try:
-        results = loop.run_until_complete(_race_test(base, access_token, "/subscriptions",
-                                                     {"creatorId": FAKE_UUID}, 10))
-        successes = sum(1 for st, _ in results if st in (200, 201))
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x subscribe simultaneo",
+        race = _race_test(base, access_token, "/subscriptions",
+                          {"creatorId": FAKE_UUID})
+        successes = race.count_success()
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x subscribe simultaneo",
                            "HIGH", "WARN" if successes > 3 else "PASS",
-                           f"{successes}/10 aceitos"))
+                           f"{successes}/{race.n} aceitos (write skew {race.send_skew_ms:.2f}ms)",
+                           race.describe()))
     except Exception as e:
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x subscribe simultaneo",
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x subscribe simultaneo",
                            "HIGH", "SKIP", f"Erro: {str(e)[:100]}"))
 
     # Rapid withdrawal race
     tid += 1
     try:
-        results = loop.run_until_complete(_race_test(base, access_token, "/withdrawals",
-                                                     {"amount": 1, "pixKey": "race@test.com", "pixKeyType": "email"}, 10))
-        successes = sum(1 for st, _ in results if st in (200, 201))
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x withdrawal simultaneo",
+        race = _race_test(base, access_token, "/withdrawals",
+                          {"amount": 1, "pixKey": "race@test.com", "pixKeyType": "email"})
+        successes = race.count_success()
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x withdrawal simultaneo",
                            "CRITICAL", "WARN" if successes > 3 else "PASS",
-                           f"{successes}/10 aceitos" + (" (CRITICO se saldo limitado)" if successes > 3 else ""),
+                           f"{successes}/{race.n} aceitos (write skew {race.send_skew_ms:.2f}ms)" + (" (CRITICO se saldo limitado)" if successes > 3 else ""),
+                           race.describe(),
                            recommendation="Implementar lock pessimista em withdrawals"))
     except Exception as e:
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x withdrawal simultaneo",
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x withdrawal simultaneo",
                            "CRITICAL", "SKIP", f"Erro: {str(e)[:100]}"))
 
     # Rapid promo creation race
     tid += 1
     try:
-        results = loop.run_until_complete(_race_test(base, access_token, "/creators/me/promos",
-                                                     {"code": "RACE99", "discount": 50, "maxUses": 10}, 10))
-        successes = sum(1 for st, _ in results if st in (200, 201))
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x promo creation",
+        race = _race_test(base, access_token, "/creators/me/promos",
+                          {"code": "RACE99", "discount": 50, "maxUses": 10})
+        successes = race.count_success()
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x promo creation",
                            "MEDIUM", "WARN" if successes > 3 else "PASS",
-                           f"{successes}/10 aceitos"))
+                           f"{successes}/{race.n} aceitos (write skew {race.send_skew_ms:.2f}ms)",
+                           race.describe()))
     except Exception as e:
-        rpt.add(TestResult(cat, f"C24-{tid:02d}", "Race: 10x promo creation",
+        rpt.add(TestResult(cat, f"C24-{tid:02d}", f"Race: {RACE_N}x promo creation",
                            "MEDIUM", "SKIP", f"Erro: {str(e)[:100]}"))
 
-    loop.close()
     rpt.category_timings[cat] = round(time.time() - t0, 2)
 
 
 # ##############################################################################
-#  CAT 25: INJECTION & HEADER ATTACKS (6 tests)
+#  CAT 25: INJECTION & HEADER ATTACKS (8 tests, fuzz_engine corpus)
 # ##############################################################################
 
 def test_cat25_injection_headers(s, base, rpt):
+    """Fuzz search/login/header/path injection points with the shared payload corpus."""
     hdr("CAT 25: Injection & Header Attacks")
     t0 = time.time()
     cat = "25-Injection"
     tid = 0
 
-    # SQL injection in search
-    tid += 1; r = GET(s, base, "/fancoins/search-user?q=' OR 1=1--")
-    rpt.add(TestResult(cat, f"C25-{tid:02d}", "SQLi em search (' OR 1=1--)",
-                       "HIGH", "PASS" if r.status_code != 500 else "FAIL", f"{r.status_code}"))
-
-    # NoSQL injection
-    tid += 1; r = POST(s, base, "/auth/login", {"email": {"$gt": ""}, "password": {"$gt": ""}})
-    accepted = is_success(r)
+    search = ("sqli", "sqli_time", "nosql", "xss", "crlf")
+    rep = Fuzzer(s, base).run([
+        Target("GET", "/fancoins/search-user", "query", "q", families=search, name="search-user"),
+        Target("GET", "/discover/search", "query", "q", families=search, name="discover-search"),
+        Target("POST", "/auth/login", "json", ("email", "password"),
+               body={"email": "fuzz@test.com", "password": "fuzz"}, families=("nosql",),
+               name="login", benign="fuzz@test.com", accepted_is_vuln=True,
+               budget=LOGIN_FUZZ_BUDGET),
+        Target("GET", "/users/me", "header", "X-Custom", families=("crlf",), name="header"),
+        Target("GET", "/{}", "path", families=("traversal",), name="path"),
+    ])
+    info(rep.describe())
+    detail = lambda hits: "\n".join(h.describe() for h in hits[:5])
+    searches = ("search-user", "discover-search")
+
+    tid += 1
+    hits = rep.hits(SERVER_ERROR, family="sqli") + rep.hits(SQL_ERROR, family="sqli")
+    inc = rep.inconclusive(*searches)
+    rpt.add(TestResult(cat, f"C25-{tid:02d}", f"SQLi em search ({rep.sent_for('sqli')} payloads)",
+                       "HIGH", "FAIL" if hits else "WARN" if inc else "PASS",
+                       f"{len(hits)} payloads com 500/erro SQL!" if hits else
+                       inc or f"Sem 500/erro SQL (status {rep.statuses('search-user')})",
+                       detail(hits), "Usar queries parametrizadas e validar entrada"))
+
+    tid += 1
+    hits = rep.hits(ACCEPTED, target="login")
+    inc = rep.inconclusive("login")
     rpt.add(TestResult(cat, f"C25-{tid:02d}", "NoSQL injection em login",
-                       "CRITICAL", "FAIL" if accepted else "PASS",
-                       "NoSQL injection aceito!" if accepted else f"Rejeitado ({r.status_code})"))
+                       "CRITICAL", "FAIL" if hits else "WARN" if inc else "PASS",
+                       "NoSQL injection aceito!" if hits else
+                       inc or f"Rejeitado (status {rep.statuses('login')})",
+                       detail(hits)))
 
-    # CRLF injection
     tid += 1
-    try:
-        r = s.get(f"{base}/users/me", headers={"X-Custom": "value\r\nInjected: header"}, timeout=10)
-        injected = "Injected" in str(r.headers)
-        rpt.add(TestResult(cat, f"C25-{tid:02d}", "CRLF injection em header",
-                           "MEDIUM", "FAIL" if injected else "PASS",
-                           "CRLF injetado!" if injected else f"Bloqueado ({r.status_code})"))
-    except Exception:
-        rpt.add(TestResult(cat, f"C25-{tid:02d}", "CRLF injection em header", "MEDIUM", "PASS", "Rejeitado"))
+    hits = rep.hits(HEADER_INJECTION)
+    rejected = rep.targets["header"].rejected
+    inc = rep.inconclusive("header", *searches)
+    rpt.add(TestResult(cat, f"C25-{tid:02d}", "CRLF injection (header + query)",
+                       "MEDIUM", "FAIL" if hits else "WARN" if inc else "PASS",
+                       "CRLF injetado!" if hits else
+                       inc or f"Bloqueado ({rep.sent_for('crlf')} payloads, {rejected} recusados pelo cliente)",
+                       detail(hits)))
 
-    # Host header injection
     tid += 1
     try:
         r = s.get(f"{base}/users/me", headers={"Host": "evil.com"}, timeout=10)
         rpt.add(TestResult(cat, f"C25-{tid:02d}", "Host header injection",
-                           "MEDIUM", "PASS" if r.status_code != 200 else "WARN", f"{r.status_code}"))
+                           "MEDIUM", "PASS" if r.status_code != 200 else "WARN",
+                           f"Host evil: {r.status_code}"))
     except Exception:
-        rpt.add(TestResult(cat, f"C25-{tid:02d}", "Host header injection", "MEDIUM", "PASS", "Rejeitado"))
+        rpt.add(TestResult(cat, f"C25-{tid:02d}", "Host header injection",
+                           "MEDIUM", "PASS", "Rejeitado"))
 
-    # X-Forwarded-For spoofing
     tid += 1
     try:
         r = s.get(f"{base}/users/me", headers={"X-Forwarded-For": "127.0.0.1"}, timeout=10)
         rpt.add(TestResult(cat, f"C25-{tid:02d}", "X-Forwarded-For spoofing",
                            "MEDIUM", "PASS", f"XFF: {r.status_code}"))
     except Exception:
-        rpt.add(TestResult(cat, f"C25-{tid:02d}", "X-Forwarded-For spoofing", "MEDIUM", "PASS", "Rejeitado"))
+        rpt.add(TestResult(cat, f"C25-{tid:02d}", "X-Forwarded-For spoofing",
+                           "MEDIUM", "PASS", "Rejeitado"))
 
-    # Path traversal
-    tid += 1; r = GET(s, base, "/../../etc/passwd")
-    blocked = is_blocked(r)
-    rpt.add(TestResult(cat, f"C25-{tid:02d}", "Path traversal (../../etc/passwd)",
-                       "HIGH", "PASS" if blocked else "FAIL",
-                       "Bloqueado" if blocked else "Path traversal aceito!"))
+    tid += 1
+    hits = rep.hits(FILE_LEAK)
+    inc = rep.inconclusive("path")
+    rpt.add(TestResult(cat, f"C25-{tid:02d}", f"Path traversal ({rep.sent_for('traversal')} variantes)",
+                       "HIGH", "FAIL" if hits else "WARN" if inc else "PASS",
+                       "Path traversal aceito!" if hits else
+                       inc or f"Bloqueado (status {rep.statuses('path')})",
+                       detail(hits)))
+
+    tid += 1
+    hits = rep.hits(TIMING)
+    inc = rep.inconclusive(*searches)
+    rpt.add(TestResult(cat, f"C25-{tid:02d}", "SQLi time-based (SLEEP/pg_sleep vs baseline)",
+                       "CRITICAL", "FAIL" if hits else "WARN" if inc else "PASS",
+                       f"{len(hits)} payloads atrasaram a resposta!" if hits else
+                       inc or f"Sem atraso ({rep.sent_for('sqli_time')} payloads)",
+                       detail(hits), "Usar queries parametrizadas"))
+
+    tid += 1
+    hits = rep.hits(REFLECTION, family="xss")
+    html = [h for h in hits if "html" in h.evidence.lower()]
+    inc = rep.inconclusive(*searches)
+    rpt.add(TestResult(cat, f"C25-{tid:02d}", "XSS refletido em search",
+                       "MEDIUM", "FAIL" if html else "WARN" if hits or inc else "PASS",
+                       f"{len(hits)} payloads refletidos ({len(html)} em HTML)" if hits else
+                       inc or f"Sem reflexao ({rep.sent_for('xss')} payloads)",
+                       detail(html or hits), "Codificar saida e servir JSON com Content-Type correto"))
+
+    rpt.category_timings[cat] = round(time.time() - t0, 2)
+
+
+# ##############################################################################
+#  CAT 26: LOAD PROFILE (--load, open-loop, HDR histograms)
+# ##############################################################################
+
+def test_cat26_load_profile(s, base, rpt, rps, duration, mix):
+    """Replay the read-only endpoint mix at a target RPS and record latency (load_engine)."""
+    hdr(f"CAT 26: Load Profile ({rps:g} req/s x {duration:g}s)")
+    t0 = time.time()
+    cat = "26-Load-Profile"
+    tid = 0
+
+    # /posts/creator/:id needs a real creator to exercise the query path
+    creator_id = FAKE_UUID
+    body = _safe_json(GET(s, base, "/discover?limit=1"))
+    data = body.get("data") if isinstance(body, dict) else body
+    creators = data.get("creators", data) if isinstance(data, dict) else data
+    if isinstance(creators, list) and creators and isinstance(creators[0], dict):
+        creator_id = creators[0].get("id") or creators[0].get("userId") or FAKE_UUID
+
+    profile = run_load(s, base, mix=mix, rps=rps, duration=duration,
+                       fmt={"creator_id": creator_id})
+    rpt.load_profile = profile.to_dict()
+    for line in format_table(profile):
+        info(line)
+
+    for label, ep in profile.endpoints.items():
+        tid += 1
+        lat = ep.latency
+        rpt.add(TestResult(cat, f"C26-{tid:02d}", f"Load: {ep.method} {label}",
+                           "LOW", "WARN" if ep.error_rate > ERROR_RATE_WARN else "INFO",
+                           f"p50 {lat.percentile(50) / 1000:.1f}ms | p99 {lat.percentile(99) / 1000:.1f}ms"
+                           f" | p99.9 {lat.percentile(99.9) / 1000:.1f}ms | erros {ep.error_rate:.1%}",
+                           f"{ep.count} requests, status {ep.statuses}",
+                           "" if ep.error_rate <= ERROR_RATE_WARN else
+                           "Investigar erros/timeouts sob carga (pool de DB, limites do servidor)"))
 
     rpt.category_timings[cat] = round(time.time() - t0, 2)
 
@@ -2043,6 +2083,7 @@ def test_cat25_injection_headers(s, base, rpt):
 # ##############################################################################
 
 def main():
+    global VERBOSE, RACE_N, RACE_PAD
     parser = argparse.ArgumentParser(description=f"FanDreams Creator Pentest v{VERSION}")
     parser.add_argument("--target", required=True, help="API base URL (ex: https://api.fandreams.app/api/v1)")
     parser.add_argument("--email", required=True, help="Creator account email")
@@ -2050,12 +2091,53 @@ def main():
     parser.add_argument("--output", default="pentest_creator", help="Output file prefix")
     parser.add_argument("--verbose", action="store_true", help="Verbose output")
     parser.add_argument("--skip-race", action="store_true", help="Skip race condition tests")
+    parser.add_argument("--race-n", type=int, default=RACE_N,
+                        help=f"Concurrent requests per race test (default: {RACE_N})")
+    parser.add_argument("--race-pad", type=int, default=RACE_PAD,
+                        help="Extra body bytes per race request, to sweep payload size")
+    parser.add_argument("--load", action="store_true",
+                        help="Run the load profile (CAT 26) after the security categories")
+    parser.add_argument("--load-rps", type=float, default=DEFAULT_RPS,
+                        help=f"Target requests/s of --load (default: {DEFAULT_RPS:g})")
+    parser.add_argument("--load-duration", type=float, default=DEFAULT_DURATION,
+                        help=f"Seconds of --load (default: {DEFAULT_DURATION:g})")
+    parser.add_argument("--load-mix", default="",
+                        help="Endpoint weights of --load, ex: /feed=3,/fancoins/wallet=1")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last interrupted scan of this target/account")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Reuse results of categories whose endpoints did not change")
+    parser.add_argument("--store", default=None,
+                        help="Result store (SQLite, default: <output>.db)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"Categories run in parallel (default: {DEFAULT_JOBS}, 1 = sequential)")
+    parser.add_argument("--payloads", default="",
+                        help="Extra fuzz payload files (.txt/.json, comma-separated)")
+    parser.add_argument("--trace", default=None,
+                        help="Write every request as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)")
+    parser.add_argument("--self-profile", choices=PROFILE_MODES, default=None,
+                        help="Profile each category on the scanner side (<output>.profile/)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"Rows of the slowest-endpoints table (default: {DEFAULT_TOP}, 0 = off)")
     args = parser.parse_args()
+    if args.payloads:
+        try:
+            use_corpus(load_corpus(args.payloads.split(",")))
+        except (OSError, ValueError) as e:
+            parser.error(f"--payloads: {e}")
+    try:
+        load_mix = parse_mix(args.load_mix) if args.load_mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.load_rps > 0:
+        parser.error("--load-rps must be > 0")
 
-    global VERBOSE
     VERBOSE = args.verbose
+    RACE_N, RACE_PAD = args.race_n, args.race_pad
 
     target = args.target.rstrip("/")
+    tracer = install(trace=args.trace, profile=args.self_profile,
+                     profile_dir=f"{args.output}.profile")
 
     print(f"\n{C.BD}{C.M}")
     print("  +======================================================+")
@@ -2064,7 +2146,7 @@ def main():
     print("  +======================================================+")
     print(f"{C.RS}")
 
-    rpt = PentestReport(target=target)
+    rpt = PentestReport(target=target, stream=ResultStream(f"{args.output}.ndjson"))
     rpt.scan_time = datetime.now(timezone.utc).isoformat()
     start_time = time.time()
 
@@ -2081,37 +2163,50 @@ def main():
     uid = rpt.user_id
     username = rpt.username
 
-    # Run all test categories
-    test_cat01_creator_to_admin(s, target, rpt)
-    test_cat02_creator_profile_idor(s, target, rpt, uid)
-    test_cat03_tier_abuse(s, target, rpt)
-    test_cat04_promo_abuse(s, target, rpt)
-    test_cat05_posts_content(s, target, rpt)
-    test_cat06_video_media(s, target, rpt)
-    test_cat07_withdrawals(s, target, rpt, uid)
-    test_cat08_fancoin(s, target, rpt, uid)
-    test_cat09_subscriptions(s, target, rpt, uid)
-    test_cat10_user_profile(s, target, rpt, uid, username)
-    test_cat11_messages(s, target, rpt, uid)
-    test_cat12_notifications(s, target, rpt)
-    test_cat13_uploads(s, target, rpt)
-    test_cat14_kyc(s, target, rpt)
-    test_cat15_gamification(s, target, rpt)
-    test_cat16_payments(s, target, rpt)
-    test_cat17_guilds(s, target, rpt)
-    test_cat18_pitch(s, target, rpt)
-    test_cat19_commitments(s, target, rpt, uid)
-    test_cat20_affiliates(s, target, rpt)
-    test_cat21_creator_score(s, target, rpt)
-    test_cat22_otp_platform(s, target, rpt)
-    test_cat23_token_security(s, target, rpt, access_token, refresh_token)
+    # Run all test categories (exclusive = session headers / token / race sensitive)
+    store = ResultStore(args.store or f"{args.output}.db", "pentest_creator", VERSION, __file__,
+                        target, args.email, replay=lambda d: rpt.add(TestResult(**d)), log=info,
+                        timings=rpt.category_timings)
+    store.start(s, resume=args.resume, changed_only=args.changed_only)
+
+    sched = CategoryScheduler(jobs=args.jobs)
+    sched.add(store.wrap(test_cat01_creator_to_admin), s, target, rpt)
+    sched.add(store.wrap(test_cat02_creator_profile_idor), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat03_tier_abuse), s, target, rpt)
+    sched.add(store.wrap(test_cat04_promo_abuse), s, target, rpt)
+    sched.add(store.wrap(test_cat05_posts_content), s, target, rpt)
+    sched.add(store.wrap(test_cat06_video_media), s, target, rpt, exclusive=True)
+    sched.add(store.wrap(test_cat07_withdrawals), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat08_fancoin), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat09_subscriptions), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat10_user_profile), s, target, rpt, uid, username)
+    sched.add(store.wrap(test_cat11_messages), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat12_notifications), s, target, rpt)
+    sched.add(store.wrap(test_cat13_uploads), s, target, rpt, exclusive=True)
+    sched.add(store.wrap(test_cat14_kyc), s, target, rpt)
+    sched.add(store.wrap(test_cat15_gamification), s, target, rpt)
+    sched.add(store.wrap(test_cat16_payments), s, target, rpt)
+    sched.add(store.wrap(test_cat17_guilds), s, target, rpt)
+    sched.add(store.wrap(test_cat18_pitch), s, target, rpt)
+    sched.add(store.wrap(test_cat19_commitments), s, target, rpt, uid)
+    sched.add(store.wrap(test_cat20_affiliates), s, target, rpt)
+    sched.add(store.wrap(test_cat21_creator_score), s, target, rpt)
+    sched.add(store.wrap(test_cat22_otp_platform), s, target, rpt)
+    sched.add(store.wrap(test_cat23_token_security), s, target, rpt, access_token, refresh_token, exclusive=True)
 
     if not args.skip_race:
-        test_cat24_race_conditions(s, target, rpt, uid, access_token)
+        sched.add(store.wrap(test_cat24_race_conditions), s, target, rpt, uid, access_token, exclusive=True)
     else:
-        skip("CAT 24: Race Conditions (--skip-race)")
+        sched.add(skip, "CAT 24: Race Conditions (--skip-race)")
 
-    test_cat25_injection_headers(s, target, rpt)
+    sched.add(store.wrap(test_cat25_injection_headers), s, target, rpt)
+    if args.load:
+        sched.add(test_cat26_load_profile, s, target, rpt, args.load_rps, args.load_duration,
+                  load_mix, exclusive=True)
+    sched.run()
+    store.finish()
+    if store.reused:
+        info(f"{store.reused} categorias reutilizadas do scan #{store.baseline} (--changed-only)")
 
     # Finalize
     rpt.scan_duration = time.time() - start_time
@@ -2129,8 +2224,16 @@ def main():
         print(f"  {C.R}HIGH FAILURES: {sm['high_failures']}{C.RS}")
     print(f"  Duration: {sm['scan_duration_seconds']}s")
 
-    # Export JSON
-    json_data = {
+    slowest = format_slowest(tracer, args.top)
+    if slowest:
+        print(f"\n  {C.BD}Endpoints mais lentos (ms, por p95):{C.RS}")
+        for line in slowest:
+            print(f"    {line}")
+
+    # Export JSON / TXT in one pass over the result stream
+    json_path = f"{args.output}.json"
+    txt_path = f"{args.output}.txt"
+    json_doc = {
         "report": {
             "scanner": rpt.scanner,
             "target": rpt.target,
@@ -2141,35 +2244,13 @@ def main():
             "username": rpt.username,
         },
         "summary": sm,
-        "results": [asdict(r) for r in rpt.results],
+        "results": [],
     }
-    json_path = f"{args.output}.json"
-    with open(json_path, "w") as f:
-        json.dump(json_data, f, indent=2, ensure_ascii=False)
-
-    # Export TXT
-    txt_path = f"{args.output}.txt"
-    with open(txt_path, "w") as f:
-        f.write(f"FanDreams Creator Pentest v{VERSION}\n")
-        f.write(f"{'='*60}\n")
-        f.write(f"Target: {rpt.target}\n")
-        f.write(f"Scan Time: {rpt.scan_time}\n")
-        f.write(f"User: {rpt.user_email} (role={rpt.user_role}, id={rpt.user_id})\n")
-        f.write(f"Score: {score}/100 (Grade {grade})\n\n")
-        f.write(f"Total: {sm['total_tests']} | Pass: {sm['passed']} | Fail: {sm['failed']} | "
-                f"Warn: {sm['warnings']} | Skip: {sm['skipped']}\n")
-        f.write(f"Critical: {sm['critical_failures']} | High: {sm['high_failures']} | "
-                f"Medium: {sm['medium_failures']}\n\n")
-        for r in rpt.results:
-            f.write(f"[{r.status:4s}] [{r.severity:8s}] {r.test_id} — {r.name}\n")
-            f.write(f"       {r.description}\n")
-            if r.details:
-                f.write(f"       Details: {r.details}\n")
-            if r.recommendation:
-                f.write(f"       Rec: {r.recommendation}\n")
-            f.write("\n")
+    render(rpt.stream.close(), JsonSink(json_path, json_doc), TxtReport(txt_path, rpt))
 
     print(f"\n  Relatorios: {C.CY}{json_path}{C.RS} / {C.CY}{txt_path}{C.RS}")
+    for path in tracer.close():
+        print(f"  Trace/perfil: {C.CY}{path}{C.RS}")
     print(f"  {C.BD}Copie o .json para analise consolidada.{C.RS}\n")
 
 
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- RACE ENGINE (last-byte synchronization)
+============================================================================
+
+Substitui o `asyncio.gather` dos testes de double-spend. Com gather, cada
+request abre a propria conexao e a partida fica espalhada por dezenas de
+ms -- janelas reais de race em /fancoins/tip e /withdrawals passam batido.
+
+Tecnica (last-byte sync, equivalente HTTP/1.1 do "single-packet attack"):
+  1. abre e aquece N conexoes keep-alive (TCP + TLS prontos, OPTIONS no path);
+  2. envia cada request inteira MENOS o ultimo byte;
+  3. espera o servidor bufferizar headers/corpo (--settle);
+  4. libera o ultimo byte de todas as conexoes em um loop apertado;
+  5. registra o timestamp de envio e de recebimento de cada request.
+
+O resultado traz o numero de sucessos E o quao apertada foi a corrida:
+`send_skew_ms` (max-min dos write() do ultimo byte, medido no scanner: e a
+dispersao do loop de escrita em Python, nao o tempo no fio -- o kernel e a
+rede ainda podem espalhar os pacotes) e `recv_spread_ms`.
+
+Uso via scanners:
+    res = run_race(session, "POST", f"{base}/fancoins/tip", json=body, n=10)
+    res.count_success(), res.send_skew_ms, res.describe()
+
+Sweep de N e tamanho de payload (CLI):
+    python race_engine.py --target https://api.fandreams.app/api/v1 \\
+        --token <jwt> --path /fancoins/tip --body '{"creatorId":"...","amount":1}' \\
+        --sweep-n 2,5,10,20 --sweep-pad 0,1024,16384
+============================================================================
+"""
+
+import argparse
+import asyncio
+import json as _json
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import http_engine
+from http_engine import RawConnection, build_request, split_origin
+
+DEFAULT_SETTLE = 0.05       # seconds between "all but last byte" and release
+DEFAULT_TIMEOUT = 15
+
+
+# === Result types =============================================================
+
+class RaceHit:
+    """One request of a race: status, body and nanosecond timestamps."""
+
+    __slots__ = ("idx", "status", "body", "send_ns", "recv_ns", "error")
+
+    def __init__(self, idx: int):
+        self.idx = idx
+        self.status = 0
+        self.body = b""
+        self.send_ns = 0
+        self.recv_ns = 0
+        self.error = ""
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        try:
+            return _json.loads(self.body)
+        except Exception:
+            return {"error": self.error} if self.error else {"_raw": self.text[:500]}
+
+
+class RaceResult:
+    """All hits of one race plus the scanner-side release (write) skew."""
+
+    def __init__(self, hits: List[RaceHit], payload_bytes: int = 0):
+        self.hits = hits
+        self.payload_bytes = payload_bytes
+
+    @property
+    def n(self) -> int:
+        return len(self.hits)
+
+    def _spread_ms(self, attr: str) -> float:
+        values = [getattr(h, attr) for h in self.hits if getattr(h, attr)]
+        return (max(values) - min(values)) / 1e6 if len(values) > 1 else 0.0
+
+    @property
+    def send_skew_ms(self) -> float:
+        """Spread of the last-byte write() calls, taken scanner-side.
+
+        Bounds how tight the release loop was in Python; it is not wire time
+        (socket buffers, the kernel and the network can still spread it).
+        """
+        return self._spread_ms("send_ns")
+
+    @property
+    def recv_spread_ms(self) -> float:
+        return self._spread_ms("recv_ns")
+
+    def count_success(self, pred: Optional[Callable[[RaceHit], bool]] = None) -> int:
+        pred = pred or (lambda h: h.status in (200, 201))
+        return sum(1 for h in self.hits if pred(h))
+
+    def statuses(self) -> Dict[int, int]:
+        out: Dict[int, int] = {}
+        for h in self.hits:
+            out[h.status] = out.get(h.status, 0) + 1
+        return out
+
+    def describe(self) -> str:
+        return (f"write_skew={self.send_skew_ms:.3f}ms recv_spread={self.recv_spread_ms:.1f}ms "
+                f"n={self.n} payload={self.payload_bytes}B status={self.statuses()}")
+
+
+# === Core =====================================================================
+
+def _nodelay(conn: RawConnection):
+    sock = conn.writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+
+async def _open_warm(scheme, host, port, path, headers, warm: bool, timeout: float,
+                     stats) -> RawConnection:
+    conn = await RawConnection(scheme, host, port, stats).open(timeout)
+    _nodelay(conn)
+    if warm:
+        try:
+            conn.write(build_request("OPTIONS", conn.host_header, path, headers))
+            await conn.drain()
+            await asyncio.wait_for(conn.read_response("OPTIONS"), timeout)
+        except BaseException:
+            conn.close()
+            raise
+        if conn.closed:
+            conn.close()
+            conn = await RawConnection(scheme, host, port, stats).open(timeout)
+            _nodelay(conn)
+    return conn
+
+
+async def race_async(method: str, url: str, bodies: Sequence[bytes], headers=None,
+                     warm: bool = True, settle: float = DEFAULT_SETTLE,
+                     timeout: float = DEFAULT_TIMEOUT, stats=None) -> RaceResult:
+    """Last-byte synchronized race: one pre-opened connection per body."""
+    scheme, host, port, path = split_origin(url)
+    hits = [RaceHit(i) for i in range(len(bodies))]
+    base_headers = {k: v for k, v in (headers or {}).items()
+                    if k.lower() not in ("content-length", "connection")}
+
+    opened = await asyncio.gather(*[
+        _open_warm(scheme, host, port, path, base_headers, warm, timeout, stats)
+        for _ in bodies], return_exceptions=True)
+
+    conns: List[Optional[RawConnection]] = []
+    for hit, c in zip(hits, opened):
+        if isinstance(c, BaseException):
+            hit.error = f"connect: {c}"
+            conns.append(None)
+        else:
+            conns.append(c)
+
+    try:
+        # Everything but the final byte
+        tails: List[bytes] = []
+        for conn, body in zip(conns, bodies):
+            if conn is None:
+                tails.append(b"")
+                continue
+            raw = build_request(method, conn.host_header, path, base_headers, body)
+            tails.append(raw[-1:])
+            conn.write(raw[:-1])
+        await asyncio.gather(*[c.drain() for c in conns if c is not None])
+        await asyncio.sleep(settle)
+
+        # Release: tight loop, no awaits between writes
+        for hit, conn, tail in zip(hits, conns, tails):
+            if conn is not None:
+                conn.write(tail)
+                hit.send_ns = time.perf_counter_ns()
+
+        async def _read(hit: RaceHit, conn: RawConnection):
+            try:
+                status, _hdrs, body, _reason = await asyncio.wait_for(
+                    conn.read_response(method), timeout)
+                hit.recv_ns = time.perf_counter_ns()
+                hit.status, hit.body = status, body
+                if stats:
+                    stats.incr("requests")
+            except Exception as e:
+                hit.error = str(e) or type(e).__name__
+
+        await asyncio.gather(*[_read(h, c) for h, c in zip(hits, conns) if c is not None])
+    finally:
+        for c in conns:
+            if c is not None:
+                c.close()
+    return RaceResult(hits, max((len(b) for b in bodies), default=0))
+
+
+def _encode_bodies(json=None, json_list=None, n: int = 1, pad: int = 0) -> List[bytes]:
+    payloads = json_list if json_list is not None else [json] * n
+    out = []
+    for p in payloads:
+        raw = b"" if p is None else _json.dumps(p).encode()
+        # Trailing whitespace is valid JSON: grows the body without changing its meaning
+        out.append(raw + b" " * pad if raw else raw)
+    return out
+
+
+def run_race(session, method: str, url: str, json=None, json_list=None, n: int = 10,
+             pad: int = 0, warm: bool = True, settle: float = DEFAULT_SETTLE,
+             timeout: float = DEFAULT_TIMEOUT) -> RaceResult:
+    """Sync entry point: race with `session`'s headers on its engine loop."""
+    headers = session._merge_headers(None) if hasattr(session, "_merge_headers") \
+        else dict(getattr(session, "headers", {}) or {})
+    bodies = _encode_bodies(json, json_list, n, pad)
+    engine = getattr(session, "engine", None) or http_engine.get_engine()
+    http_engine.notify(method.upper(), url)
+    return engine.run(race_async(method.upper(), url, bodies, headers, warm, settle,
+                                 timeout, engine.stats))
+
+
+def sweep(session, method: str, url: str, json=None, ns: Sequence[int] = (2, 5, 10),
+          pads: Sequence[int] = (0,), **kw) -> List[RaceResult]:
+    """Run the race for every (N, payload padding) combination."""
+    return [run_race(session, method, url, json=json, n=n, pad=pad, **kw)
+            for n in ns for pad in pads]
+
+
+# === CLI ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="FanDreams last-byte sync race engine")
+    parser.add_argument("--target", required=True, help="API base URL (ex: https://api.fandreams.app/api/v1)")
+    parser.add_argument("--path", required=True, help="Endpoint path (ex: /fancoins/tip)")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--token", default="", help="Bearer token")
+    parser.add_argument("--body", default=None, help="JSON body")
+    parser.add_argument("--sweep-n", default="10", help="Comma-separated N values (default: 10)")
+    parser.add_argument("--sweep-pad", default="0", help="Comma-separated padding bytes (default: 0)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help=f"Seconds between pre-send and release (default: {DEFAULT_SETTLE})")
+    parser.add_argument("--no-warm", action="store_true", help="Skip connection warm-up")
+    args = parser.parse_args()
+
+    s = http_engine.make_session("FanDreams-RaceEngine/1.0")
+    if args.token:
+        s.headers["Authorization"] = f"Bearer {args.token}"
+    body = _json.loads(args.body) if args.body else None
+    url = args.target.rstrip("/") + args.path
+
+    print(f"  {'N':>4} {'payload':>8} {'ok':>4} {'wskew_ms':>9} {'recv_ms':>9}  status")
+    for res in sweep(s, args.method, url, json=body,
+                     ns=[int(x) for x in args.sweep_n.split(",")],
+                     pads=[int(x) for x in args.sweep_pad.split(",")],
+                     warm=not args.no_warm, settle=args.settle):
+        print(f"  {res.n:>4} {res.payload_bytes:>8} {res.count_success():>4} "
+              f"{res.send_skew_ms:>9.3f} {res.recv_spread_ms:>9.1f}  {res.statuses()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- RATE LIMIT PROBER (descoberta adaptativa de limites)
+============================================================================
+
+Substitui os loops fixos de "20 requests + time.sleep" por uma busca:
+
+  1. uma request inicial le os headers RateLimit-* / X-RateLimit-* /
+     RateLimit-Policy. Se o servidor anuncia limite e restante, basta
+     enviar `remaining + 1` para confirmar -- sem busca;
+  2. senao, busca exponencial na taxa (5, 10, 20, 40... req/s) com um
+     token bucket open-loop, ate o primeiro 429 ou o fim do orcamento;
+  3. apos o 429 a janela e medida: espera exatamente Retry-After /
+     RateLimit-Reset quando presentes, senao sonda com backoff exponencial
+     ate a primeira resposta != 429 (nunca um sleep cego);
+  4. busca binaria entre a ultima taxa aceita e a primeira bloqueada
+     para estimar a taxa sustentavel;
+  5. uma request com identidade alternativa (outro email / token) mostra
+     se o limite e por IP ou por conta (sem ela a chave fica desconhecida).
+
+Uso via scanners:
+    prober = RateProber(session, budget=40)
+    res = prober.probe("POST", f"{base}/auth/login", json=body, alt_json=other)
+    res.limited, res.threshold(), res.key, res.describe()
+
+CLI:
+    python rate_probe.py --target https://api.fandreams.app/api/v1 \\
+        --path /auth/login --body '{"email":"x@test.com","password":"x"}' --budget 60
+============================================================================
+"""
+
+import argparse
+import asyncio
+import json as _json
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+import http_engine
+from http_engine import RequestError, TokenBucket
+from report_stream import StatusHistogram
+
+DEFAULT_BUDGET = 40         # max requests per endpoint probe (recovery polls included)
+DEFAULT_START_RATE = 5.0    # req/s of the first exponential step
+DEFAULT_MAX_RATE = 80.0
+DEFAULT_STEP = 1.0          # seconds of traffic per rate step
+DEFAULT_MAX_WAIT = 30.0     # longest we wait for a window to reset
+BINARY_STEPS = 3
+
+_HEADER_PREFIXES = ("RateLimit-", "X-RateLimit-", "X-Rate-Limit-")
+
+
+# === Header parsing ===========================================================
+
+def _first_number(value: str) -> Optional[float]:
+    m = re.search(r"-?\d+(?:\.\d+)?", value or "")
+    return float(m.group(0)) if m else None
+
+
+def _retry_after_seconds(value: str) -> Optional[float]:
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value.strip())
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_headers(headers) -> Dict[str, float]:
+    """limit/remaining/reset/window/retry_after from any rate-limit header dialect."""
+    out: Dict[str, float] = {}
+    if not headers:
+        return out
+    for prefix in _HEADER_PREFIXES:
+        for name in ("Limit", "Remaining", "Reset"):
+            key = name.lower()
+            value = _first_number(headers.get(prefix + name, ""))
+            if value is not None and key not in out:
+                out[key] = value
+    # IETF draft combined form: `RateLimit: limit=100, remaining=50, reset=30`
+    for key, value in re.findall(r"\b(limit|remaining|reset)=(\d+)", headers.get("RateLimit", "")):
+        out.setdefault(key, float(value))
+    # `RateLimit-Policy: 100;w=60`
+    policy = headers.get("RateLimit-Policy", "") or headers.get("X-RateLimit-Policy", "")
+    m = re.search(r"(\d+)\s*;\s*w=(\d+)", policy)
+    if m:
+        out.setdefault("limit", float(m.group(1)))
+        out["window"] = float(m.group(2))
+    # Some servers send an epoch timestamp as reset, in seconds or milliseconds
+    if out.get("reset", 0) > 1e12:
+        out["reset"] /= 1000.0
+    if out.get("reset", 0) > 1e9:
+        out["reset"] = max(0.0, out["reset"] - time.time())
+    retry = _retry_after_seconds(headers.get("Retry-After", ""))
+    if retry is not None:
+        out["retry_after"] = retry
+    return out
+
+
+# === Result ===================================================================
+
+class RateLimitResult:
+    """Measured rate limit of one endpoint."""
+
+    def __init__(self, name: str, method: str):
+        self.name = name
+        self.method = method
+        self.limited = False
+        self.limit: Optional[int] = None          # requests accepted before the first 429
+        self.window_s: Optional[float] = None
+        self.sustained_rps: Optional[float] = None
+        self.max_rate_tried = 0.0
+        self.key = ""                              # "ip", "account" or "" (unknown)
+        self.source = "measured"                   # or "headers"
+        self.headers: Dict[str, float] = {}        # first advertised limit headers
+        self.header_names: List[str] = []
+        self.retry_after_raw = ""                  # Retry-After of the first 429
+        self.status_codes = StatusHistogram()
+        self.elapsed_s = 0.0
+
+    @property
+    def requests_sent(self) -> int:
+        return self.status_codes.total()
+
+    def statuses(self) -> Dict[int, int]:
+        return dict(sorted(self.status_codes.items()))
+
+    def threshold(self) -> str:
+        if not self.limited:
+            return f">{self.requests_sent} req"
+        window = f"{self.window_s:.0f}s" if self.window_s is not None else "janela ?"
+        return f"{self.limit} req / {window}"
+
+    def describe(self) -> str:
+        rps = f"{self.sustained_rps:.1f}" if self.sustained_rps is not None else "?"
+        return (f"limit={self.threshold()} sustained={rps}req/s key={self.key or '?'} "
+                f"source={self.source} max_rate={self.max_rate_tried:.0f}req/s "
+                f"sent={self.requests_sent} elapsed={self.elapsed_s:.1f}s status={self.statuses()}")
+
+
+# === Sender ===================================================================
+
+class RateProber:
+    """Adaptive rate-limit discovery over a Session's engine (see module docstring)."""
+
+    def __init__(self, session, budget: int = DEFAULT_BUDGET,
+                 start_rate: float = DEFAULT_START_RATE, max_rate: float = DEFAULT_MAX_RATE,
+                 step: float = DEFAULT_STEP, max_wait: float = DEFAULT_MAX_WAIT,
+                 timeout: float = http_engine.DEFAULT_TIMEOUT):
+        self.session = session
+        self.engine = getattr(session, "engine", None) or http_engine.get_engine()
+        self.budget = budget
+        self.start_rate = start_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+    def probe(self, method: str, url: str, json=None, body_fn: Optional[Callable[[int], dict]] = None,
+              alt_json=None, alt_headers: Optional[dict] = None,
+              name: Optional[str] = None) -> RateLimitResult:
+        """Measure the limit of one endpoint.
+
+        `body_fn(i)` builds a distinct body per request (e.g. unique emails);
+        `alt_json` / `alt_headers` describe another identity used to tell an
+        IP-keyed limit from an account-keyed one.
+        """
+        http_engine.notify(method.upper(), url)
+        return self.engine.run(self._probe(method.upper(), url, json, body_fn, alt_json,
+                                           alt_headers, name or url))
+
+    # -- internals --
+
+    async def _send(self, res: RateLimitResult, method: str, url: str, body, headers):
+        try:
+            r = await self.engine.request(method, url, headers=headers, json=body,
+                                          timeout=self.timeout)
+        except RequestError:
+            res.status_codes.add(0)
+            return None
+        res.status_codes.add(r.status_code)
+        for h in r.headers:
+            if h.lower().startswith(("ratelimit", "x-ratelimit", "x-rate-limit", "retry-after")) \
+                    and h not in res.header_names:
+                res.header_names.append(h)
+        return r
+
+    def _left(self, res: RateLimitResult) -> int:
+        return self.budget - res.requests_sent
+
+    async def _burst(self, res, method, url, body_at, headers, rate: float, n: int):
+        """Open-loop send of n requests at `rate`.
+
+        Returns (accepted, first 429 or None, monotonic time that 429 arrived).
+        """
+        bucket = TokenBucket(rate)
+        blocked: List = []
+        tasks = []
+
+        async def _one(i):
+            r = await self._send(res, method, url, body_at(i), headers)
+            if r is not None and r.status_code == 429:
+                blocked.append((i, r, time.monotonic()))
+
+        for i in range(n):
+            if blocked:
+                break
+            await bucket.take()
+            tasks.append(asyncio.ensure_future(_one(i)))
+        await asyncio.gather(*tasks)
+        if not blocked:
+            return n, None, None
+        return min(blocked, key=lambda b: b[0])
+
+    def _advertised(self, hint: Dict[str, float]) -> Optional[float]:
+        value = hint.get("retry_after", hint.get("reset"))
+        return value if value is not None and value <= self.max_wait else None
+
+    async def _recover(self, res, method, url, body, headers, hint: Dict[str, float]) -> bool:
+        """Wait for the window to reset: advertised delay if any, else exponential polling.
+
+        An advertised delay longer than max_wait is treated as unusable (bogus
+        header or very long window) and the probe falls back to polling.
+        """
+        advertised = self._advertised(hint)
+        deadline = time.monotonic() + self.max_wait
+        delay = advertised if advertised is not None else 0.5
+        while self._left(res) > 0:
+            if advertised is None and time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+            r = await self._send(res, method, url, body, headers)
+            if r is not None and r.status_code != 429:
+                return True
+            hint = parse_rate_headers(r.headers) if r is not None else {}
+            advertised = self._advertised(hint)
+            delay = advertised if advertised is not None else min(delay * 2, self.max_wait)
+        return False
+
+    async def _probe(self, method, url, json, body_fn, alt_json, alt_headers, name):
+        res = RateLimitResult(name, method)
+        headers = self.session._merge_headers(None) if hasattr(self.session, "_merge_headers") \
+            else dict(getattr(self.session, "headers", {}) or {})
+        counter = [0]
+
+        def body_at(_i):
+            counter[0] += 1
+            return body_fn(counter[0]) if body_fn else json
+
+        t0 = t_burst = time.monotonic()
+        first = await self._send(res, method, url, body_at(0), headers)
+        t_block = time.monotonic()
+        res.headers = parse_rate_headers(first.headers) if first is not None else {}
+        accepted = 0 if first is None or first.status_code == 429 else 1
+        block = first if first is not None and first.status_code == 429 else None
+        rate_ok: Optional[float] = None
+        rate_fail: Optional[float] = None
+
+        if block is None and "limit" in res.headers and "remaining" in res.headers:
+            # Advertised quota: confirm it instead of searching
+            res.source = "headers"
+            n = min(int(res.headers["remaining"]) + 1, self._left(res))
+            res.max_rate_tried = self.max_rate
+            t_burst = time.monotonic()
+            got, block, t_block = await self._burst(res, method, url, body_at, headers,
+                                                    self.max_rate, n)
+            accepted += got
+        elif block is None:
+            rate = self.start_rate
+            while self._left(res) > 0:
+                res.max_rate_tried = rate
+                n = min(max(1, round(rate * self.step)), self._left(res))
+                t_burst = time.monotonic()
+                got, block, t_block = await self._burst(res, method, url, body_at, headers, rate, n)
+                accepted += got
+                if block is not None:
+                    rate_fail = rate
+                    break
+                rate_ok = rate
+                if rate >= self.max_rate:
+                    break
+                rate = min(rate * 2, self.max_rate)
+
+        if block is None:
+            res.sustained_rps = rate_ok
+            res.elapsed_s = time.monotonic() - t0
+            return res
+
+        res.limited = True
+        res.limit = accepted
+        res.retry_after_raw = block.headers.get("Retry-After", "")
+        hint = parse_rate_headers(block.headers)
+        if not res.headers:
+            res.headers = hint
+
+        # Which key is counting: another identity still blocked => per IP
+        if alt_json is not None or alt_headers:
+            alt_h = headers.copy()
+            alt_h.update(alt_headers or {})
+            r = await self._send(res, method, url, alt_json if alt_json is not None else json, alt_h)
+            if r is not None:
+                res.key = "ip" if r.status_code == 429 else "account"
+        # Without a second identity the key stays unknown: nothing separated the cases
+
+        # The window counts from (at most) the burst that tripped the limit, not
+        # from the start of the probe: earlier steps never reached the limit
+        advertised = self._advertised(hint)
+        recovered = await self._recover(res, method, url, body_at(0), headers, hint)
+        if "window" in res.headers:
+            res.window_s = res.headers["window"]
+        elif advertised is not None:
+            res.window_s = t_block - t_burst + advertised
+        elif recovered:
+            res.window_s = time.monotonic() - t_burst
+
+        # Binary search between the last accepted and the first blocked rate
+        if recovered and rate_ok is not None and rate_fail is not None:
+            lo, hi = rate_ok, rate_fail
+            for _ in range(BINARY_STEPS):
+                if self._left(res) <= 0:
+                    break
+                mid = (lo + hi) / 2
+                n = min(max(1, round(mid * self.step)), self._left(res))
+                _got, blk, _t = await self._burst(res, method, url, body_at, headers, mid, n)
+                if blk is None:
+                    lo = mid
+                    continue
+                hi = mid
+                if not await self._recover(res, method, url, body_at(0), headers,
+                                           parse_rate_headers(blk.headers)):
+                    break
+            res.sustained_rps = lo
+        if res.window_s:
+            # A counter per window caps the long-run rate whatever the burst tolerance
+            per_window = res.limit / res.window_s
+            res.sustained_rps = min(res.sustained_rps or per_window, per_window)
+        res.elapsed_s = time.monotonic() - t0
+        return res
+
+
+# === CLI ======================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="FanDreams adaptive rate-limit prober")
+    parser.add_argument("--target", required=True, help="API base URL (ex: https://api.fandreams.app/api/v1)")
+    parser.add_argument("--path", required=True, help="Endpoint path (ex: /auth/login)")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--token", default="", help="Bearer token")
+    parser.add_argument("--body", default=None, help="JSON body")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET,
+                        help=f"Max requests (default: {DEFAULT_BUDGET})")
+    parser.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE,
+                        help=f"Max req/s of the exponential search (default: {DEFAULT_MAX_RATE:.0f})")
+    parser.add_argument("--max-wait", type=float, default=DEFAULT_MAX_WAIT,
+                        help=f"Max seconds waiting for a window reset (default: {DEFAULT_MAX_WAIT:.0f})")
+    args = parser.parse_args()
+
+    s = http_engine.make_session("FanDreams-RateProbe/1.0")
+    if args.token:
+        s.headers["Authorization"] = f"Bearer {args.token}"
+    body = _json.loads(args.body) if args.body else None
+    prober = RateProber(s, budget=args.budget, max_rate=args.max_rate, max_wait=args.max_wait)
+    res = prober.probe(args.method, args.target.rstrip("/") + args.path, json=body, name=args.path)
+    print(f"  {args.method.upper()} {args.path}: {'LIMITADO' if res.limited else 'sem limite'}")
+    print(f"  {res.describe()}")
+    if res.header_names:
+        print(f"  headers: {res.header_names}")
+
+
+if __name__ == "__main__":
+    main()
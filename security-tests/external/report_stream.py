@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- REPORT STREAM (resultados em NDJSON, relatorios em uma passada)
+============================================================================
+
+Os relatorios guardavam cada TestResult em listas e, no fim, percorriam a
+lista uma vez por contador do resumo e montavam MD/TXT/JSON inteiros em
+memoria. Com fuzzing e --load isso vira centenas de milhares de registros.
+
+Aqui cada resultado:
+  1. atualiza contadores correntes (`Tally`: status x severidade e status
+     por categoria) -- score e resumo saem desses contadores em O(1);
+  2. e gravado como uma linha em `<output>.ndjson` (`ResultStream`) no
+     momento em que e produzido -- da para acompanhar com `tail -f`;
+  3. nao fica em memoria.
+
+No fim, `render()` le o NDJSON UMA vez e alimenta todos os relatorios
+(`Sink`) ao mesmo tempo. Secoes que precisam aparecer antes de linhas que
+ainda vao chegar (ex: achados antes da tabela de testes) vao para arquivos
+temporarios e sao concatenadas no fechamento: memoria constante,
+independente do numero de testes.
+
+Listas de status HTTP viram `StatusHistogram` (status -> contagem) e os
+registros (`@slotted`) usam __slots__ em vez de __dict__.
+
+Uso:
+    rpt = PentestReport(target=target, stream=ResultStream(f"{output}.ndjson"))
+    ...                                       # em add(): tally.add(...) + stream.write(asdict(r))
+    render(rpt.stream.close(),
+           JsonSink(f"{output}.json", {"summary": sm, "results": []}),
+           TxtReport(f"{output}.txt", rpt))
+============================================================================
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from dataclasses import dataclass, fields
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STATUSES = ("PASS", "FAIL", "WARN", "SKIP", "ERROR")
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO")
+KIND_KEY = "kind"            # record type in each NDJSON line ("result", "finding", ...)
+FLUSH_EVERY = 64             # records between flushes of the NDJSON file
+
+
+# === Records ==================================================================
+
+def slotted(cls):
+    """@dataclass whose instances use __slots__ (no per-instance __dict__).
+
+    Same as @dataclass(slots=True), which needs Python 3.10+. asdict() and
+    Cls(**d) keep working.
+    """
+    cls = dataclass(cls)
+    names = tuple(f.name for f in fields(cls))
+    ns = {k: v for k, v in cls.__dict__.items()
+          if k not in names and k not in ("__dict__", "__weakref__")}
+    ns["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, ns)
+
+
+# === Aggregates ===============================================================
+
+class StatusHistogram(Counter):
+    """HTTP status -> count, in place of raw status_codes lists."""
+
+    def add(self, status: int, n: int = 1):
+        self[status] += n
+
+    def total(self) -> int:
+        return sum(self.values())
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(k): v for k, v in sorted(self.items())}
+
+    def __str__(self) -> str:
+        return str(dict(sorted(self.items())))
+
+
+class Tally:
+    """Running counters of one report, updated on every result."""
+
+    __slots__ = ("total", "cells", "categories")
+
+    def __init__(self):
+        self.total = 0
+        self.cells: Dict[Tuple[str, str], int] = {}          # (status, severity) -> n
+        self.categories: Dict[str, Dict[str, int]] = {}      # category -> status -> n
+
+    def add(self, status: str, severity: str = "", category: str = ""):
+        self.total += 1
+        key = (status, severity)
+        self.cells[key] = self.cells.get(key, 0) + 1
+        cat = self.categories.setdefault(category, {})
+        cat[status] = cat.get(status, 0) + 1
+
+    def count(self, status: Optional[str] = None, severity: Optional[str] = None) -> int:
+        return sum(n for (st, sev), n in self.cells.items()
+                   if (status is None or st == status) and (severity is None or sev == severity))
+
+    def deduct(self, fail: Dict[str, int], warn: Dict[str, int],
+               fail_default: int = 0, warn_default: int = 0) -> int:
+        """Score penalty: per-severity weights of FAIL and WARN results."""
+        total = 0
+        for (st, sev), n in self.cells.items():
+            if st == "FAIL":
+                total += n * fail.get(sev, fail_default)
+            elif st == "WARN":
+                total += n * warn.get(sev, warn_default)
+        return total
+
+
+# === NDJSON stream ============================================================
+
+class ResultStream:
+    """Append-only NDJSON file: one record per line, written as it is produced."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._f = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict, kind: str = "result"):
+        line = json.dumps({KIND_KEY: kind, **record}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+            self.count += 1
+            if self.count % FLUSH_EVERY == 0:
+                self._f.flush()
+
+    def close(self) -> str:
+        """Flush and close; returns the path for render()."""
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+        return self.path
+
+
+def read_stream(path: str) -> Iterator[Tuple[str, dict]]:
+    """(kind, record) for each line of an NDJSON result stream."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                yield rec.pop(KIND_KEY, "result"), rec
+
+
+# === Renderers ================================================================
+
+class Sink:
+    """One report file rendered from the stream.
+
+    `head()` and `tail()` run once, `row()` once per record. Output goes to
+    named `sections`, concatenated in declaration order on close; only the
+    first is the report file itself, the others are temporary files. A
+    section not declared is created on first write and placed at "*" (or at
+    the end), in creation order -- e.g. one per category.
+    """
+
+    sections: Tuple[str, ...] = ("main",)
+
+    def __init__(self, path: str):
+        self.path = path
+        self._files: Dict[str, object] = {}
+        self._extra: List[str] = []
+
+    def open(self):
+        for i, name in enumerate(self.sections):
+            if name != "*":
+                self._files[name] = (open(self.path, "w", encoding="utf-8") if i == 0 else
+                                     tempfile.TemporaryFile("w+", encoding="utf-8"))
+
+    def has(self, section: str) -> bool:
+        return section in self._files
+
+    def line(self, text: str = "", section: Optional[str] = None):
+        name = section or self.sections[0]
+        f = self._files.get(name)
+        if f is None:
+            f = self._files[name] = tempfile.TemporaryFile("w+", encoding="utf-8")
+            self._extra.append(name)
+        f.write(text + "\n")
+
+    def head(self):
+        pass
+
+    def row(self, kind: str, rec: dict):
+        pass
+
+    def tail(self):
+        pass
+
+    def close(self):
+        order: List[str] = []
+        for name in self.sections:
+            order.extend(self._extra if name == "*" else [name])
+        if "*" not in self.sections:
+            order.extend(self._extra)
+        out = self._files[order[0]]
+        for name in order[1:]:
+            f = self._files[name]
+            f.seek(0)
+            shutil.copyfileobj(f, out)
+            f.close()
+        out.close()
+
+
+def _indent(text: str, level: int) -> str:
+    return text.replace("\n", "\n" + "  " * level)
+
+
+class JsonSink(Sink):
+    """`doc` as indented JSON, with the list keys in `lists` filled from the stream.
+
+    `lists` maps a key of `doc` to the record kind that feeds it (default:
+    "results" <- "result"). Output is identical to json.dump(indent=2).
+    """
+
+    def __init__(self, path: str, doc: dict, lists: Optional[Dict[str, str]] = None):
+        super().__init__(path)
+        self.doc = doc
+        self.lists = lists or {"results": "result"}
+        self.sections = ("main",) + tuple(self.lists)
+        self._kinds = {kind: key for key, kind in self.lists.items()}
+        self._counts = {key: 0 for key in self.lists}
+
+    def row(self, kind: str, rec: dict):
+        key = self._kinds.get(kind)
+        if key is None:
+            return
+        item = _indent(json.dumps(rec, indent=2, ensure_ascii=False, default=str), 2)
+        self._files[key].write((",\n" if self._counts[key] else "") + "    " + item)
+        self._counts[key] += 1
+
+    def close(self):
+        out = self._files["main"]
+        items = list(self.doc.items())
+        out.write("{")
+        for i, (key, value) in enumerate(items):
+            out.write(("," if i else "") + f"\n  {json.dumps(key)}: ")
+            if key not in self.lists:
+                out.write(_indent(json.dumps(value, indent=2, ensure_ascii=False, default=str), 1))
+                continue
+            f = self._files[key]
+            if not self._counts[key]:
+                out.write("[]")
+            else:
+                out.write("[\n")
+                f.seek(0)
+                shutil.copyfileobj(f, out)
+                out.write("\n  ]")
+            f.close()
+        out.write("\n}" if items else "}")
+        out.close()
+
+
+def render(path: str, *sinks: Sink) -> int:
+    """Feed every sink from one pass over the NDJSON stream; returns the record count."""
+    for s in sinks:
+        s.open()
+        s.head()
+    n = 0
+    for kind, rec in read_stream(path):
+        n += 1
+        for s in sinks:
+            s.row(kind, rec)
+    for s in sinks:
+        s.tail()
+        s.close()
+    return n
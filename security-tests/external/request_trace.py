@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- REQUEST TRACE (fases por request, --trace e --self-profile)
+============================================================================
+
+O unico dado de tempo dos scanners era `category_timings` (segundos por
+categoria) e um `duration_ms` ocasional: num scan de 15 minutos nao dava
+para saber se o tempo foi DNS, handshake TCP/TLS, servidor, retries do
+engine ou o proprio scanner.
+
+Com o tracer instalado (`install()`), o http_engine entrega um
+`RequestTiming` por request (GET/POST/g/p/_req, Session, fuzzer, rate
+probe, --load -- tudo que passa pelo AsyncEngine):
+  1. `EndpointStats` por endpoint (metodo + path, ids viram {id}):
+     histograma HDR do tempo total, soma de cada fase, retries e bytes --
+     vira a tabela "endpoints mais lentos" do resumo final;
+  2. com --trace FILE, cada request vira um evento do Chrome trace-event
+     format (chrome://tracing, ui.perfetto.dev) com as fases aninhadas,
+     gravado em stream: memoria constante, como o NDJSON de resultados;
+  3. `category()` (usado pelo CategoryScheduler) rotula as requests feitas
+     dentro da categoria e vira um span na trilha do scanner;
+  4. com --self-profile cprofile|sample, cada categoria e perfilada do lado do
+     scanner: `<dir>/<categoria>.prof` (pstats, snakeviz) ou
+     `<dir>/<categoria>.folded` (stacks amostrados, flamegraph/speedscope).
+     cProfile e por thread e, no Python 3.12+, exclusivo: use --jobs 1.
+
+Fases (`http_engine.RequestTiming`): queued (espera por slot do pool), dns,
+connect (TCP + TLS: o aiohttp reporta o handshake como um passo so), ttfb
+(request enviada -> headers da resposta), transfer (corpo) e retry_wait
+(backoff entre tentativas).
+
+Uso:
+    from request_trace import DEFAULT_TOP, PROFILE_MODES, category, format_slowest, install, traced
+
+    tracer = install(trace=args.trace, profile=args.self_profile,
+                     profile_dir=f"{args.output}.profile")
+    ...
+    with category("test_cat01_info_disclosure"):   # ou traced(fn)(...)
+        ...
+    for line in format_slowest(tracer, args.top):
+        print(line)
+    tracer.close()
+============================================================================
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import http_engine
+from http_engine import RequestTiming
+from load_engine import HdrHistogram
+
+PHASES = ("queued", "dns", "connect", "ttfb", "transfer", "retry_wait")
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_TOP = 10             # rows of the slowest-endpoints table
+MAX_ENDPOINTS = 2000         # distinct endpoint keys before folding into OTHER
+OTHER = "(outros)"
+SAMPLE_INTERVAL = 0.005      # seconds between stack samples (--self-profile sample)
+SAMPLE_DEPTH = 64            # innermost frames kept per sample
+PID_SCANNER = 1              # trace process of the category spans
+PID_HTTP = 2                 # trace process of the requests (one lane per overlap)
+
+_ID_SEGMENT = re.compile(
+    r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{24,}|\d+)(?=/|$)")
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """"GET /posts/{id}/comments": path without query, ids collapsed."""
+    path = urlsplit(url).path or "/"
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+# === Aggregates ===============================================================
+
+class EndpointStats:
+    """Total-time histogram, phase sums, retries and bytes of one endpoint."""
+
+    __slots__ = ("key", "total", "phases", "retries", "errors", "bytes_sent",
+                 "bytes_received")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.total = HdrHistogram()
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.retries = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def record(self, t: RequestTiming):
+        self.total.record(t.total * 1e6)
+        for name, t0, t1 in t.spans:
+            self.phases[name] = self.phases.get(name, 0.0) + (t1 - t0)
+        self.retries += t.retries
+        self.errors += bool(t.error) or t.status == 0 or t.status >= 500
+        self.bytes_sent += t.bytes_sent
+        self.bytes_received += t.bytes_received
+
+    @property
+    def count(self) -> int:
+        return self.total.total
+
+    def avg_ms(self, phase: str) -> float:
+        return self.phases.get(phase, 0.0) * 1000 / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "endpoint": self.key,
+            "requests": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "total": self.total.to_dict(),
+            "avg_phase_ms": {p: round(self.avg_ms(p), 3) for p in self.phases},
+        }
+
+
+# === Chrome trace =============================================================
+
+class ChromeTrace:
+    """Streaming writer of the Chrome trace-event JSON object format."""
+
+    def __init__(self, path: str, origin: float):
+        self.path = path
+        self.origin = origin
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        self._n = 0
+        self._lanes: List[float] = []          # end of the last request on each lane
+        self._tids: Dict[int, int] = {}        # scanner thread ident -> tid
+        self.event(ph="M", pid=PID_SCANNER, tid=0, name="process_name",
+                   args={"name": "scanner (categorias)"})
+        self.event(ph="M", pid=PID_HTTP, tid=0, name="process_name",
+                   args={"name": "http (requests)"})
+
+    def event(self, **ev):
+        self._f.write((",\n" if self._n else "") + json.dumps(ev, ensure_ascii=False, default=str))
+        self._n += 1
+
+    def _us(self, t: float) -> float:
+        return round((t - self.origin) * 1e6, 1)
+
+    def complete(self, name: str, cat: str, pid: int, tid: int, t0: float, t1: float,
+                 args: Optional[dict] = None):
+        ev = {"ph": "X", "name": name, "cat": cat, "pid": pid, "tid": tid,
+              "ts": self._us(t0), "dur": round(max(0.0, t1 - t0) * 1e6, 1)}
+        if args:
+            ev["args"] = args
+        self.event(**ev)
+
+    def thread(self, ident: int, name: str) -> int:
+        tid = self._tids.get(ident)
+        if tid is None:
+            tid = self._tids[ident] = len(self._tids) + 1
+            self.event(ph="M", pid=PID_SCANNER, tid=tid, name="thread_name", args={"name": name})
+        return tid
+
+    def _lane(self, t0: float, t1: float) -> int:
+        # Requests arrive in completion order: a lane is free when its last
+        # request ended before this one started, so lanes never overlap.
+        for i, end in enumerate(self._lanes):
+            if end <= t0:
+                self._lanes[i] = t1
+                return i + 1
+        self._lanes.append(t1)
+        tid = len(self._lanes)
+        self.event(ph="M", pid=PID_HTTP, tid=tid, name="thread_name", args={"name": f"slot {tid:03d}"})
+        return tid
+
+    def request(self, t: RequestTiming, key: str):
+        tid = self._lane(t.start, t.end)
+        args = {"url": t.url, "status": t.status, "retries": t.retries,
+                "bytes_sent": t.bytes_sent, "bytes_received": t.bytes_received}
+        if t.label:
+            args["category"] = t.label
+        if t.error:
+            args["error"] = t.error
+        if t.pipelined:
+            args["pipelined"] = True
+        self.complete(key, "request", PID_HTTP, tid, t.start, t.end, args)
+        for name, t0, t1 in t.spans:
+            self.complete(name, "phase", PID_HTTP, tid, t0, t1)
+
+    def close(self):
+        if not self._f.closed:
+            self._f.write("\n]}\n")
+            self._f.close()
+
+
+# === Scanner-side profiler ====================================================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class CategoryProfiler:
+    """Per-category cProfile or stack sampling (see module docstring)."""
+
+    def __init__(self, mode: str, directory: str):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile mode must be one of {PROFILE_MODES}")
+        self.mode = mode
+        self.directory = directory
+        self.paths: List[str] = []
+        self._lock = threading.Lock()
+        self._threads: Dict[int, str] = {}              # sampled thread ident -> category
+        self._stacks: Dict[str, Counter] = {}           # category -> folded stack -> samples
+        self._warned = False
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str, ext: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w.-]+", "_", name) + ext)
+
+    def start(self, name: str):
+        """Begin profiling the calling thread; returns the token for stop()."""
+        if self.mode == "cprofile":
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                # 3.12+: one cProfile at a time (sys.monitoring)
+                if not self._warned:
+                    self._warned = True
+                    print("[!] --self-profile cprofile com categorias em paralelo: use --jobs 1 "
+                          "(ou --self-profile sample)")
+                return None
+            return prof
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = name
+            self._stacks.setdefault(name, Counter())
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop,
+                                                 name="trace-sampler", daemon=True)
+                self._sampler.start()
+        return ident
+
+    def stop(self, name: str, token):
+        if token is None:
+            return
+        if self.mode == "cprofile":
+            token.disable()
+            path = self._path(name, ".prof")
+            token.dump_stats(path)
+            with self._lock:
+                self.paths.append(path)
+            return
+        with self._lock:
+            self._threads.pop(token, None)
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, name in self._threads.items():
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None and len(stack) < SAMPLE_DEPTH:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    if stack:
+                        self._stacks[name][";".join(reversed(stack))] += 1
+
+    def close(self) -> List[str]:
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join(1)
+            self._sampler = None
+        with self._lock:
+            for name, stacks in self._stacks.items():
+                path = self._path(name, ".folded")
+                with open(path, "w", encoding="utf-8") as f:
+                    for stack, n in stacks.most_common():
+                        f.write(f"{stack} {n}\n")
+                self.paths.append(path)
+            self._stacks.clear()
+            return list(self.paths)
+
+
+# === Tracer ===================================================================
+
+class Tracer:
+    """Timing observer of http_engine: endpoint stats, Chrome trace, category profiles."""
+
+    def __init__(self, trace: Optional[str] = None, profile: Optional[str] = None,
+                 profile_dir: str = "profile"):
+        self.origin = time.perf_counter()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.requests = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.request_time = 0.0
+        self.categories: Dict[str, List[float]] = {}   # name -> [wall_s, requests, request_s]
+        self._lock = threading.Lock()
+        self.trace = ChromeTrace(trace, self.origin) if trace else None
+        self.profiler = CategoryProfiler(profile, profile_dir) if profile else None
+        self._closed = False
+        http_engine.add_timing_observer(self.observe)
+
+    def observe(self, t: RequestTiming):
+        key = endpoint_key(t.method, t.url)
+        with self._lock:
+            ep = self.endpoints.get(key)
+            if ep is None:
+                if len(self.endpoints) >= MAX_ENDPOINTS:
+                    key = OTHER
+                    ep = self.endpoints.get(key)
+                if ep is None:
+                    ep = self.endpoints[key] = EndpointStats(key)
+            ep.record(t)
+            self.requests += 1
+            self.retries += t.retries
+            self.bytes_sent += t.bytes_sent
+            self.bytes_received += t.bytes_received
+            self.request_time += t.total
+            for name, t0, t1 in t.spans:
+                self.phases[name] = self.phases.get(name, 0.0) + (t1 - t0)
+            if t.label:
+                cat = self.categories.setdefault(t.label, [0.0, 0, 0.0])
+                cat[1] += 1
+                cat[2] += t.total
+            if self.trace is not None:
+                self.trace.request(t, key)
+
+    @contextmanager
+    def category(self, name: str):
+        """Label the requests of `name`, record its span and profile it if enabled."""
+        token = http_engine.request_label.set(name)
+        prof = self.profiler.start(name) if self.profiler else None
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            t1 = time.perf_counter()
+            if self.profiler:
+                self.profiler.stop(name, prof)
+            http_engine.request_label.reset(token)
+            with self._lock:
+                cat = self.categories.setdefault(name, [0.0, 0, 0.0])
+                cat[0] += t1 - t0
+                if self.trace is not None:
+                    th = threading.current_thread()
+                    self.trace.complete(name, "category", PID_SCANNER,
+                                        self.trace.thread(th.ident, th.name), t0, t1,
+                                        {"requests": cat[1], "request_s": round(cat[2], 3)})
+
+    def slowest(self, n: int = DEFAULT_TOP) -> List[EndpointStats]:
+        """Endpoints by p95 of total time (then max), slowest first."""
+        with self._lock:
+            eps = list(self.endpoints.values())
+        eps.sort(key=lambda e: (e.total.percentile(95), e.total.max), reverse=True)
+        return eps[:n]
+
+    def to_dict(self, n: int = DEFAULT_TOP) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "phase_seconds": {p: round(v, 3) for p, v in self.phases.items()},
+            "categories": {name: {"wall_s": round(w, 3), "requests": int(n_req),
+                                  "request_s": round(rs, 3)}
+                           for name, (w, n_req, rs) in self.categories.items()},
+            "slowest_endpoints": [e.to_dict() for e in self.slowest(n)],
+        }
+
+    def close(self) -> List[str]:
+        """Stop observing and write the trace/profile files; returns their paths."""
+        if self._closed:
+            return []
+        self._closed = True
+        http_engine.remove_timing_observer(self.observe)
+        paths = []
+        with self._lock:
+            if self.trace is not None:
+                self.trace.close()
+                paths.append(self.trace.path)
+        if self.profiler is not None:
+            paths.extend(self.profiler.close())
+        return paths
+
+
+_TRACER: Optional[Tracer] = None
+
+
+def install(trace: Optional[str] = None, profile: Optional[str] = None,
+            profile_dir: str = "profile") -> Tracer:
+    """Process-wide tracer (replaces a previous one)."""
+    global _TRACER
+    if _TRACER is not None:
+        _TRACER.close()
+    _TRACER = Tracer(trace, profile, profile_dir)
+    # Early sys.exit() still leaves a well-formed trace
+    atexit.register(_TRACER.close)
+    return _TRACER
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _TRACER
+
+
+@contextmanager
+def category(name: str):
+    """Tracer.category() of the installed tracer; no-op without one."""
+    if _TRACER is None or _TRACER._closed:
+        yield
+        return
+    with _TRACER.category(name):
+        yield
+
+
+def traced(fn: Callable) -> Callable:
+    """`fn` run inside category(fn.__name__), for scanners without the scheduler."""
+    @functools.wraps(fn)
+    def _traced(*args, **kwargs):
+        with category(fn.__name__):
+            return fn(*args, **kwargs)
+    return _traced
+
+
+# === Console ==================================================================
+
+def _share(part: float, whole: float) -> str:
+    return f"{part * 100 / whole:.0f}%" if whole else "-"
+
+
+def format_slowest(tracer: Tracer, n: int = DEFAULT_TOP) -> List[str]:
+    """Console lines: top-`n` slowest endpoints, total time and avg phases in ms."""
+    if not tracer.requests or n <= 0:
+        return []
+    lines = [f"{'endpoint':<42} {'req':>5} {'p50':>7} {'p95':>7} {'max':>7} "
+             f"{'dns':>6} {'conn':>6} {'ttfb':>7} {'xfer':>6} {'retry':>5} {'KB in':>7}"]
+    for e in tracer.slowest(n):
+        h = e.total
+        key = e.key if len(e.key) <= 42 else e.key[:39] + "..."
+        lines.append(f"{key:<42} {e.count:>5} {h.percentile(50) / 1000:>7.1f} "
+                     f"{h.percentile(95) / 1000:>7.1f} {h.max / 1000:>7.1f} "
+                     f"{e.avg_ms('dns'):>6.1f} {e.avg_ms('connect'):>6.1f} "
+                     f"{e.avg_ms('ttfb'):>7.1f} {e.avg_ms('transfer'):>6.1f} "
+                     f"{e.retries:>5} {e.bytes_received / 1024:>7.1f}")
+    whole = tracer.request_time
+    lines.append(f"{tracer.requests} requests, {tracer.retries} retries, "
+                 f"{tracer.bytes_sent / 1024:.1f} KB enviados / "
+                 f"{tracer.bytes_received / 1024:.1f} KB recebidos; tempo em request: "
+                 + ", ".join(f"{p} {_share(tracer.phases.get(p, 0.0), whole)}" for p in PHASES))
+    return lines
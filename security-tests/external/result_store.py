@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- RESULT STORE (checkpoint, --resume, --changed-only)
+============================================================================
+
+Guarda cada resultado em um SQLite local (stdlib, sem dependencias) no
+momento em que e produzido. A unidade de trabalho e a funcao de teste
+(`test_catNN_*` nos pentests, `test_*` no full scanner):
+
+  --resume        continua o ultimo scan interrompido do mesmo scanner /
+                  target / conta: unidades concluidas sao reaproveitadas,
+                  a unidade que estava rodando e refeita do zero.
+  --changed-only  cada unidade guarda o fingerprint das respostas que
+                  viu durante a execucao (status, headers relevantes e
+                  hash da FORMA do JSON) + versao do scanner (VERSION e
+                  hash do proprio .py). Entram so GETs com resposta 2xx:
+                  sao os unicos que podem ser repetidos sem efeito
+                  colateral para conferir se algo mudou. Se nada mudou
+                  desde o ultimo scan completo, os resultados anteriores
+                  sao reutilizados sem rodar os testes (com a duracao
+                  gravada em `category_timings`); unidades sem nenhum GET
+                  2xx sempre rodam, assim como as que enviam qualquer
+                  request que altera estado (POST/PUT/PATCH/DELETE): o
+                  handler delas pode ter mudado sem que um GET perceba.
+
+As respostas de cada unidade sao coletadas via
+`http_engine.add_response_observer` (e os metodos via `add_observer`, que
+tambem ve race_engine / rate_probe), por thread, entao funciona com
+`--jobs N`. Caminhos sao normalizados (UUIDs e numeros viram :id) para
+comparar scans que usam UUIDs aleatorios. Os resultados vao para o SQLite
+em lote: um commit por unidade concluida (o que --resume precisa) e um no
+fim do scan.
+
+Uso:
+    store = ResultStore(f"{output}.db", "pentest_fan", VERSION, __file__, target, email,
+                        replay=lambda d: rpt.add(TestResult(**d)),
+                        timings=rpt.category_timings)
+    store.start(s, resume=args.resume, changed_only=args.changed_only)
+    sched.add(store.wrap(test_cat01_fan_to_admin), s, target, rpt)
+    ...
+    store.finish()
+
+    # e em Report.add():
+    checkpoint(asdict(r))
+============================================================================
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import http_engine
+
+# Headers whose change means the endpoint behaves differently
+FINGERPRINT_HEADERS = (
+    "server", "x-powered-by", "content-type", "allow", "cache-control",
+    "access-control-allow-origin", "access-control-allow-credentials",
+    "access-control-allow-methods", "strict-transport-security",
+    "content-security-policy", "x-frame-options", "x-content-type-options",
+    "ratelimit-limit", "x-ratelimit-limit", "www-authenticate",
+)
+
+# Methods a unit may send and still be re-checked by a GET probe
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_ID_RE = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+                    r"[0-9a-fA-F]{12}|\d+)(?=/|$)")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scanner TEXT, version TEXT, target TEXT, account TEXT,
+    started REAL, finished REAL
+);
+CREATE TABLE IF NOT EXISTS units (
+    run_id INTEGER, unit TEXT, done INTEGER DEFAULT 0,
+    endpoints TEXT DEFAULT '{}', fingerprint TEXT, reused_from INTEGER,
+    writes TEXT DEFAULT '[]', duration REAL,
+    PRIMARY KEY (run_id, unit)
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER, unit TEXT, payload TEXT
+);
+"""
+
+_local = threading.local()
+_active: Optional["ResultStore"] = None
+
+
+def checkpoint(result: dict):
+    """Persist one result under the unit running on this thread (no-op without a store)."""
+    unit = getattr(_local, "unit", None)
+    if _active is not None and unit is not None:
+        _active.record(unit, result)
+
+
+# === Fingerprints =============================================================
+
+def endpoint_key(method: str, url: str) -> str:
+    """"GET /users/:id" -- query dropped, ids normalized."""
+    return f"{method.upper()} {_ID_RE.sub('/:id', urlsplit(url).path)}"
+
+
+def _shape(value, depth: int = 0):
+    if depth > 6:
+        return "..."
+    if isinstance(value, dict):
+        return {k: _shape(v, depth + 1) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [_shape(value[0], depth + 1)] if value else []
+    return type(value).__name__
+
+
+def response_fingerprint(r) -> str:
+    """Status + relevant headers + hash of the JSON structure (keys and types, not values)."""
+    headers = getattr(r, "headers", None) or {}
+    try:
+        shape = _shape(r.json())
+    except Exception:
+        shape = f"non-json:{headers.get('Content-Type', '')}"
+    raw = json.dumps([getattr(r, "status_code", 0),
+                      [(h, headers.get(h, "")) for h in FINGERPRINT_HEADERS],
+                      shape], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def scanner_version(version: str, source: Optional[str]) -> str:
+    """VERSION plus the script's own hash: any edit to the scanner invalidates the cache."""
+    if not source:
+        return version
+    try:
+        with open(source, "rb") as f:
+            return f"{version}+{hashlib.sha256(f.read()).hexdigest()[:10]}"
+    except OSError:
+        return version
+
+
+# === Store ====================================================================
+
+class ResultStore:
+    """SQLite-backed checkpoint/cache of one scanner's results (see module docstring)."""
+
+    def __init__(self, path: str, scanner: str, version: str, source: Optional[str],
+                 target: str, account: str = "", replay: Optional[Callable[[dict], None]] = None,
+                 log: Callable[[str], None] = print, timings: Optional[dict] = None):
+        self.path = path
+        self.scanner = scanner
+        self.version = scanner_version(version, source)
+        self.target = target
+        self.account = account
+        self.replay = replay or (lambda d: None)
+        self.log = log
+        self.timings = timings                     # report's category_timings, if any
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        for column in ("writes TEXT DEFAULT '[]'", "duration REAL"):
+            try:
+                # Stores created before the column existed
+                self.db.execute(f"ALTER TABLE units ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass
+        self._lock = threading.Lock()
+        self._fp_cache: Dict[str, str] = {}                     # probes of this run
+        self._seen: Dict[str, Dict[str, Tuple[str, str]]] = {}  # unit -> key -> (url, fp)
+        self._writes: Dict[str, set] = {}                       # unit -> state-changing keys
+        self.session = None
+        self.run_id = 0
+        self.resumed: Dict[str, bool] = {}         # units already done in a resumed run
+        self.baseline: Optional[int] = None        # last complete run for --changed-only
+        self.reused = 0
+
+    # -- lifecycle --
+
+    def _same_scan(self) -> tuple:
+        return (self.scanner, self.target, self.account)
+
+    def start(self, session, resume: bool = False, changed_only: bool = False) -> int:
+        """Open (or resume) a run; `session` is used for fingerprint probes."""
+        global _active
+        self.session = session
+        cur = self.db.cursor()
+        row = None
+        if resume:
+            row = cur.execute(
+                "SELECT id, version FROM runs WHERE scanner=? AND target=? AND account=? "
+                "AND finished IS NULL ORDER BY id DESC LIMIT 1", self._same_scan()).fetchone()
+            if row and row[1] != self.version:
+                self.log(f"Scan interrompido #{row[0]} e de outra versao do scanner — iniciando novo")
+                row = None
+            elif not row:
+                self.log("Nenhum scan interrompido para retomar — iniciando novo")
+        if row:
+            self.run_id = row[0]
+            for unit, in cur.execute("SELECT unit FROM units WHERE run_id=? AND done=1",
+                                     (self.run_id,)):
+                self.resumed[unit] = True
+            self.log(f"Retomando scan #{self.run_id}: {len(self.resumed)} unidades ja concluidas")
+        else:
+            cur.execute("INSERT INTO runs (scanner, version, target, account, started) "
+                        "VALUES (?, ?, ?, ?, ?)", (self.scanner, self.version, self.target,
+                                                   self.account, time.time()))
+            self.run_id = cur.lastrowid
+        if changed_only:
+            row = cur.execute(
+                "SELECT id FROM runs WHERE scanner=? AND target=? AND account=? AND version=? "
+                "AND finished IS NOT NULL AND id != ? ORDER BY id DESC LIMIT 1",
+                self._same_scan() + (self.version, self.run_id)).fetchone()
+            self.baseline = row[0] if row else None
+            if self.baseline is None:
+                self.log("--changed-only: nenhum scan completo desta versao — rodando tudo")
+        self.db.commit()
+        _active = self
+        http_engine.add_observer(self._touch)
+        http_engine.add_response_observer(self._observe)
+        return self.run_id
+
+    def finish(self):
+        """Mark the run complete and commit whatever is still pending."""
+        global _active
+        _active = None
+        http_engine.remove_observer(self._touch)
+        http_engine.remove_response_observer(self._observe)
+        with self._lock:
+            self.db.execute("UPDATE runs SET finished=? WHERE id=?", (time.time(), self.run_id))
+            self.db.commit()
+
+    # -- recording --
+
+    def _touch(self, method: str, url: str):
+        """Remember every state-changing endpoint the running unit sends to."""
+        unit = getattr(_local, "unit", None)
+        if unit is None or method.upper() in SAFE_METHODS:
+            return
+        with self._lock:
+            self._writes.setdefault(unit, set()).add(endpoint_key(method, url))
+
+    def _observe(self, method: str, url: str, resp):
+        """Fingerprint the first 2xx GET of each endpoint the running unit sees."""
+        self._touch(method, url)
+        unit = getattr(_local, "unit", None)
+        if unit is None or method != "GET" or not 200 <= getattr(resp, "status_code", 0) < 300:
+            return
+        key = endpoint_key(method, url)
+        with self._lock:
+            seen = self._seen.setdefault(unit, {})
+            if key in seen:
+                return
+        fp = response_fingerprint(resp)
+        with self._lock:
+            seen.setdefault(key, (url, fp))
+
+    def record(self, unit: str, result: dict):
+        """Queue one result; committed with the unit (see _mark_done) or by finish()."""
+        with self._lock:
+            self.db.execute("INSERT INTO results (run_id, unit, payload) VALUES (?, ?, ?)",
+                            (self.run_id, unit, json.dumps(result, ensure_ascii=False)))
+
+    def _results(self, run_id: int, unit: str) -> List[dict]:
+        with self._lock:
+            rows = self.db.execute("SELECT payload FROM results WHERE run_id=? AND unit=? "
+                                   "ORDER BY id", (run_id, unit)).fetchall()
+        return [json.loads(p) for p, in rows]
+
+    def _mark_done(self, unit: str, endpoints: Dict[str, str], fingerprint: Optional[str] = None,
+                   reused_from: Optional[int] = None, writes: List[str] = (),
+                   duration: Optional[float] = None):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO units (run_id, unit, done, endpoints, "
+                            "fingerprint, reused_from, writes, duration) "
+                            "VALUES (?, ?, 1, ?, ?, ?, ?, ?)",
+                            (self.run_id, unit, json.dumps(endpoints), fingerprint, reused_from,
+                             json.dumps(sorted(writes)), duration))
+            # The unit's results become durable together with its done flag
+            self.db.commit()
+
+    # -- fingerprints --
+
+    def _unit_fingerprint(self, unit: str, fingerprints: Dict[str, str]) -> Optional[str]:
+        """Combine per-endpoint fingerprints; None when the unit saw no 2xx GET."""
+        if not fingerprints:
+            return None
+        parts = sorted(f"{k}={fp}" for k, fp in fingerprints.items())
+        raw = "\n".join([self.version, unit] + parts)
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    def _probe(self, endpoints: Dict[str, str]) -> Dict[str, str]:
+        """Re-GET the baseline endpoints (once per run) and fingerprint them now."""
+        missing = [k for k in endpoints if k not in self._fp_cache]
+        if missing and self.session is not None:
+            responses = self.session.get_many([endpoints[k] for k in missing])
+            with self._lock:
+                for k, r in zip(missing, responses):
+                    ok = 200 <= getattr(r, "status_code", 0) < 300
+                    self._fp_cache[k] = response_fingerprint(r) if ok else ""
+        return {k: self._fp_cache.get(k, "") for k in endpoints}
+
+    def _unchanged(self, unit: str):
+        """(endpoints, fingerprint, duration) of the baseline unit if its endpoints still match."""
+        if self.baseline is None:
+            return None
+        with self._lock:
+            row = self.db.execute("SELECT endpoints, fingerprint, writes, duration FROM units "
+                                  "WHERE run_id=? AND unit=? AND done=1",
+                                  (self.baseline, unit)).fetchone()
+        # No GET to re-probe, or a write no GET can vouch for: the unit has to run
+        if not row or not row[1] or json.loads(row[2] or "[]"):
+            return None
+        endpoints = json.loads(row[0])
+        fp = self._unit_fingerprint(unit, self._probe(endpoints))
+        return (endpoints, fp, row[3]) if fp == row[1] else None
+
+    # -- units --
+
+    def wrap(self, fn: Callable, unit: Optional[str] = None) -> Callable:
+        """Run `fn` as a checkpointed unit: replayed when resumed or unchanged."""
+        unit = unit or fn.__name__
+
+        def _unit(*args, **kwargs):
+            if self.resumed.get(unit):
+                # Already stored in this run: replay without re-recording
+                results = self._replay(unit, self.run_id, "retomado")
+                with self._lock:
+                    row = self.db.execute("SELECT duration FROM units WHERE run_id=? AND unit=?",
+                                          (self.run_id, unit)).fetchone()
+                self._carry_timings(results, row[0] if row else None)
+                return None
+            cached = self._unchanged(unit)
+            _local.unit = unit
+            try:
+                if cached is not None:
+                    with self._lock:
+                        self.db.execute("DELETE FROM results WHERE run_id=? AND unit=?",
+                                        (self.run_id, unit))
+                    results = self._replay(unit, self.baseline, "inalterado")
+                    self._carry_timings(results, cached[2])
+                    self._mark_done(unit, cached[0], cached[1], self.baseline,
+                                    duration=cached[2])
+                    self.reused += 1
+                    return None
+                # A resumed run may hold partial results of this unit: start over
+                with self._lock:
+                    self.db.execute("DELETE FROM results WHERE run_id=? AND unit=?",
+                                    (self.run_id, unit))
+                    self._seen[unit] = {}
+                    self._writes[unit] = set()
+                t0 = time.time()
+                out = fn(*args, **kwargs)
+                duration = round(time.time() - t0, 2)
+                with self._lock:
+                    seen = self._seen.pop(unit, {})
+                    writes = self._writes.pop(unit, set())
+                fps = {k: fp for k, (_url, fp) in seen.items()}
+                self._mark_done(unit, {k: url for k, (url, _fp) in seen.items()},
+                                None if writes else self._unit_fingerprint(unit, fps),
+                                writes=writes, duration=duration)
+                return out
+            finally:
+                _local.unit = None
+
+        _unit.__name__ = fn.__name__
+        _unit.__doc__ = fn.__doc__
+        return _unit
+
+    def _replay(self, unit: str, run_id: int, why: str) -> List[dict]:
+        results = self._results(run_id, unit)
+        for r in results:
+            self.replay(r)
+        self.log(f"{unit}: {len(results)} resultados do scan #{run_id} ({why})")
+        return results
+
+    def _carry_timings(self, results: List[dict], duration: Optional[float]):
+        """Give a reused unit's categories the duration measured when it last ran."""
+        if self.timings is None or duration is None:
+            return
+        for cat in dict.fromkeys(r["category"] for r in results if "category" in r):
+            self.timings[cat] = duration
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- SCAN ORCHESTRATOR (multi-conta, multi-processo)
+============================================================================
+
+Roda todos os scanners para todas as contas de um manifesto em um pool de
+processos e consolida os .json em um unico relatorio -- substitui os
+wrappers fan_/creator_fandreams_full_scanner.py e o passo manual de
+"copie o .json e traga de volta para consolidacao".
+
+  * um processo por job (perfil x scanner): sessao, pool HTTP e result
+    store isolados;
+  * os jobs de um mesmo perfil rodam em sequencia (logout dos testes de
+    token nao derruba outro scanner da mesma conta), perfis diferentes
+    em paralelo (--procs N);
+  * cada perfil tem o proprio orcamento de req/s (rps_budget) aplicado ao
+    pool HTTP do processo -- race/rate/load continuam em rajada;
+  * logins via token_cache.py: o orquestrador autentica cada conta uma
+    vez, os scanners reusam o token ou renovam via /auth/refresh.
+
+Manifesto (JSON):
+    {
+      "target": "https://api.fandreams.app",
+      "rps_budget": 20,
+      "profiles": [
+        {"name": "fan1", "role": "fan", "email": "...", "password": "..."},
+        {"name": "creator1", "role": "creator", "email": "...",
+         "password_env": "CREATOR1_PASSWORD", "scanners": ["full", "pentest_creator"]},
+        {"name": "anon", "role": "unauth"}
+      ],
+      "args": {"pentest_fan": ["--skip-race"]}
+    }
+Scanners padrao: fan -> full, pentest_fan, fancoin; creator -> full,
+pentest_creator; unauth -> blackbox, external.
+
+Uso:
+    python scan_orchestrator.py --manifest profiles.json \\
+        [--output-dir scan_results] [--procs 4] [--rps-budget 20] [--only fan1,anon]
+
+Saida: <output-dir>/<perfil>/<scanner>.{json,md,txt,log} e
+       <output-dir>/consolidated.{json,md}
+============================================================================
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import runpy
+import sys
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import http_engine
+import token_cache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROCS = 4
+DEFAULT_RPS_BUDGET = 20.0
+DEFAULT_OUTPUT_DIR = "scan_results"
+ROLES = ("fan", "creator", "unauth")
+
+# name -> script, roles it supports, needs credentials, wants the /api/v1 base
+SCANNERS = {
+    "full":            {"script": "fandreams_full_scanner.py", "roles": ("fan", "creator"), "auth": True,  "api": True},
+    "pentest_fan":     {"script": "pentest_fan.py",            "roles": ("fan",),           "auth": True,  "api": True},
+    "pentest_creator": {"script": "pentest_creator.py",        "roles": ("creator",),       "auth": True,  "api": True},
+    "fancoin":         {"script": "myfans_fancoin_scanner.py", "roles": ("fan", "creator"), "auth": True,  "api": True},
+    "blackbox":        {"script": "pentest_blackbox.py",       "roles": ("unauth",),        "auth": False, "api": True},
+    "external":        {"script": "fandreams_security_scanner.py", "roles": ("unauth",),    "auth": False, "api": False},
+}
+DEFAULT_SCANNERS = {
+    "fan": ("full", "pentest_fan", "fancoin"),
+    "creator": ("full", "pentest_creator"),
+    "unauth": ("blackbox", "external"),
+}
+
+# Same deductions as the per-scanner scores (ScanReport.compute_summary)
+FAIL_PENALTY = {"CRITICAL": 20, "HIGH": 10, "MEDIUM": 5, "LOW": 2}
+STATUS_RANK = {"ERROR": 4, "FAIL": 3, "WARN": 2, "PASS": 1, "SKIP": 0}
+SEVERITY_ORDER = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO")
+
+
+# === Console Output Helpers (colored) ========================================
+
+class C:
+    """ANSI color codes for terminal output."""
+    R = "\033[91m"    # Red (FAIL)
+    G = "\033[92m"    # Green (PASS)
+    Y = "\033[93m"    # Yellow (WARN)
+    B = "\033[94m"    # Blue (INFO)
+    CY = "\033[96m"   # Cyan
+    BD = "\033[1m"    # Bold
+    RS = "\033[0m"    # Reset
+
+def ok(m):   print(f"  {C.G}[ OK ]{C.RS} {m}", flush=True)
+def fail(m): print(f"  {C.R}[FAIL]{C.RS} {m}", flush=True)
+def warn(m): print(f"  {C.Y}[WARN]{C.RS} {m}", flush=True)
+def info(m): print(f"  {C.B}[INFO]{C.RS} {m}", flush=True)
+def hdr(m):
+    eq = "=" * 72
+    print(f"\n{C.BD}{C.CY}{eq}{C.RS}\n{C.BD}  {m}{C.RS}\n{C.BD}{C.CY}{eq}{C.RS}")
+
+
+# === Manifest =================================================================
+
+class ManifestError(ValueError):
+    """Invalid credentials manifest."""
+
+
+def load_manifest(path: str, target: Optional[str] = None) -> dict:
+    """Read and validate the manifest; resolves password_env and default scanners."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Manifesto ilegivel ({path}): {e}") from e
+    manifest["target"] = (target or manifest.get("target") or "").rstrip("/")
+    if not manifest["target"]:
+        raise ManifestError("Manifesto sem 'target' (ou use --target)")
+    profiles = manifest.get("profiles") or []
+    if not profiles:
+        raise ManifestError("Manifesto sem 'profiles'")
+    seen = set()
+    for i, p in enumerate(profiles):
+        role = p.get("role")
+        if role not in ROLES:
+            raise ManifestError(f"profiles[{i}]: role deve ser um de {ROLES}, recebido {role!r}")
+        p.setdefault("name", f"{role}{i + 1}")
+        if p["name"] in seen:
+            raise ManifestError(f"Perfil duplicado: {p['name']}")
+        seen.add(p["name"])
+        if p.get("password_env"):
+            p["password"] = os.environ.get(p["password_env"], "")
+        if role != "unauth" and not (p.get("email") and p.get("password")):
+            raise ManifestError(f"Perfil {p['name']}: email/password obrigatorios para role={role}")
+        scanners = p.get("scanners") or list(DEFAULT_SCANNERS[role])
+        for sc in scanners:
+            if sc not in SCANNERS:
+                raise ManifestError(f"Perfil {p['name']}: scanner desconhecido {sc!r} "
+                                    f"(disponiveis: {', '.join(SCANNERS)})")
+            if role not in SCANNERS[sc]["roles"]:
+                raise ManifestError(f"Perfil {p['name']}: scanner {sc} nao roda com role={role}")
+        p["scanners"] = scanners
+    return manifest
+
+
+def build_jobs(manifest: dict, out_dir: str, rps_budget: float, cache_path: str) -> Dict[str, deque]:
+    """One queue of jobs per profile, in manifest order."""
+    root = manifest["target"][:-len("/api/v1")] if manifest["target"].endswith("/api/v1") \
+        else manifest["target"]
+    api = root + "/api/v1"
+    extra = manifest.get("args") or {}
+    queues: Dict[str, deque] = {}
+    for p in manifest["profiles"]:
+        pdir = os.path.join(out_dir, p["name"])
+        os.makedirs(pdir, exist_ok=True)
+        env = {http_engine.RPS_BUDGET_ENV: str(p.get("rps_budget", rps_budget))}
+        if p["role"] != "unauth":
+            env[token_cache.CACHE_ENV] = cache_path
+        jobs = deque()
+        for sc in p["scanners"]:
+            spec = SCANNERS[sc]
+            prefix = os.path.join(pdir, sc)
+            argv = [spec["script"], "--target", api if spec["api"] else root]
+            if spec["auth"]:
+                argv += ["--email", p["email"], "--password", p["password"]]
+            if sc == "full":
+                argv += ["--profile", p["role"]]
+            argv += ["--output", prefix]
+            # fandreams_security_scanner.py takes an output directory, not a prefix
+            json_path = os.path.join(prefix, "external_scan_report.json") if sc == "external" \
+                else prefix + ".json"
+            argv += list(extra.get(sc, [])) + list((p.get("args") or {}).get(sc, []))
+            jobs.append({"profile": p["name"], "role": p["role"], "scanner": sc,
+                         "argv": argv, "env": env, "json": json_path, "log": prefix + ".log"})
+        queues[p["name"]] = jobs
+    return queues
+
+
+# === Workers ==================================================================
+
+def run_job(job: dict) -> dict:
+    """Run one scanner in this (fresh) process, console output to the job log."""
+    os.environ.update(job["env"])
+    if os.path.exists(job["json"]):
+        os.remove(job["json"])
+    t0 = time.perf_counter()
+    code = 0
+    with open(job["log"], "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        sys.argv = list(job["argv"])
+        try:
+            runpy.run_path(os.path.join(HERE, job["argv"][0]), run_name="__main__")
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+    return {**{k: job[k] for k in ("profile", "role", "scanner", "json", "log")},
+            "exit_code": code, "elapsed_s": round(time.perf_counter() - t0, 2),
+            "completed": os.path.exists(job["json"])}
+
+
+def warm_tokens(manifest: dict, cache_path: str) -> Dict[str, str]:
+    """Log every account in once (sequentially) so jobs start from the cache."""
+    failed = {}
+    os.environ[token_cache.CACHE_ENV] = cache_path
+    api = manifest["target"] if manifest["target"].endswith("/api/v1") \
+        else manifest["target"] + "/api/v1"
+    s = http_engine.make_session("FanDreams-Orchestrator/1.0")
+    for p in manifest["profiles"]:
+        if p["role"] == "unauth":
+            continue
+        try:
+            r = token_cache.login(s, api, p["email"], p["password"])
+            d = r.json()
+            if r.status_code == 200 and d.get("success"):
+                user = d["data"].get("user", {})
+                ok(f"{p['name']}: {p['email']} (role={user.get('role', '?')}, id={user.get('id')})")
+                continue
+            failed[p["name"]] = f"login {r.status_code}"
+        except (http_engine.RequestError, ValueError) as e:
+            failed[p["name"]] = str(e)
+        fail(f"{p['name']}: {p['email']} -- {failed[p['name']]}")
+    cache = token_cache.get_cache()
+    info(f"Token cache: {cache.hits['cache']} reusados, {cache.hits['refresh']} renovados, "
+         f"{cache.hits['login']} logins")
+    return failed
+
+
+def run_pool(queues: Dict[str, deque], procs: int) -> List[dict]:
+    """Keep at most one job per profile in flight; profiles share `procs` processes."""
+    ctx = multiprocessing.get_context("spawn")
+    done: "queue.Queue" = queue.Queue()
+    results: List[dict] = []
+    total = sum(len(q) for q in queues.values())
+    running = 0
+
+    def _submit(pool, name):
+        nonlocal running
+        job = queues[name].popleft()
+        running += 1
+        info(f"-> {name}/{job['scanner']}")
+        pool.apply_async(run_job, (job,), callback=done.put,
+                         error_callback=lambda e, j=job: done.put(
+                             {**{k: j[k] for k in ("profile", "role", "scanner", "json", "log")},
+                              "exit_code": 1, "elapsed_s": 0.0, "completed": False,
+                              "error": str(e)}))
+
+    with ctx.Pool(procs, maxtasksperchild=1) as pool:
+        for name in queues:
+            if queues[name]:
+                _submit(pool, name)
+        while running:
+            res = done.get()
+            running -= 1
+            results.append(res)
+            mark = ok if res["completed"] else fail
+            mark(f"[{len(results)}/{total}] {res['profile']}/{res['scanner']} "
+                 f"exit={res['exit_code']} {res['elapsed_s']:.1f}s -> {res['log']}")
+            if queues[res["profile"]]:
+                _submit(pool, res["profile"])
+    return results
+
+
+# === Consolidation ============================================================
+
+def normalize(scanner: str, data: dict) -> List[dict]:
+    """Map every scanner's result schema onto one row format."""
+    rows = []
+    if "test_results" in data:       # fandreams_security_scanner.py
+        for f in data.get("findings", []):
+            rows.append({"category": f.get("category", ""), "test_id": "", "name": f.get("title", ""),
+                         "severity": f.get("severity", "INFO"), "status": "FAIL",
+                         "description": f.get("description", ""),
+                         "details": f"{f.get('endpoint', '')} {f.get('evidence', '')}".strip(),
+                         "recommendation": f.get("remediation", "")})
+        for t in data["test_results"]:
+            if t.get("passed"):
+                rows.append({"category": t.get("category", ""), "test_id": "",
+                             "name": t.get("test_name", ""), "severity": "INFO", "status": "PASS",
+                             "description": t.get("details", ""), "details": "",
+                             "recommendation": ""})
+        return rows
+    for r in data.get("results", []):
+        rows.append({"category": r.get("category", r.get("cat", "")),
+                     "test_id": r.get("test_id", ""),
+                     "name": r.get("name", r.get("test_name", "")),
+                     "severity": r.get("severity", r.get("sev", "INFO")),
+                     "status": r.get("status", ""),
+                     "description": r.get("description", r.get("desc", "")),
+                     "details": r.get("details", ""),
+                     "recommendation": r.get("recommendation", r.get("rec", ""))})
+    return rows
+
+
+def _grade(score: int) -> str:
+    if score >= 90: return "A"
+    if score >= 80: return "B"
+    if score >= 70: return "C"
+    if score >= 60: return "D"
+    return "E/F"
+
+
+def consolidate(results: List[dict], target: str, failed_logins: Dict[str, str]) -> dict:
+    """Merge every job's JSON: per-report table, all rows, unique findings, one score."""
+    reports, rows = [], []
+    findings: Dict[tuple, dict] = {}
+    for res in results:
+        entry = {k: res[k] for k in ("profile", "role", "scanner", "exit_code", "elapsed_s",
+                                     "json", "log")}
+        entry.update(score=None, grade=None, total=0, failed=0)
+        if res["completed"]:
+            with open(res["json"]) as f:
+                data = json.load(f)
+            sm = data.get("summary") if isinstance(data.get("summary"), dict) else {}
+            entry["score"] = sm.get("score", data.get("confidence_score"))
+            entry["grade"] = sm.get("grade", data.get("grade"))
+            for row in normalize(res["scanner"], data):
+                row.update(profile=res["profile"], role=res["role"], scanner=res["scanner"])
+                rows.append(row)
+                entry["total"] += 1
+                entry["failed"] += row["status"] == "FAIL"
+                if row["status"] not in ("FAIL", "WARN", "ERROR"):
+                    continue
+                key = (row["scanner"], row["test_id"] or row["name"], row["severity"])
+                f = findings.setdefault(key, {**{k: v for k, v in row.items()
+                                                 if k not in ("profile", "role")},
+                                              "profiles": []})
+                if STATUS_RANK.get(row["status"], 0) > STATUS_RANK.get(f["status"], 0):
+                    f["status"] = row["status"]
+                if res["profile"] not in f["profiles"]:
+                    f["profiles"].append(res["profile"])
+        reports.append(entry)
+
+    score = 100
+    for f in findings.values():
+        if f["status"] == "FAIL":
+            score -= FAIL_PENALTY.get(f["severity"], 0)
+        elif f["status"] == "WARN":
+            score -= 5 if f["severity"] in ("CRITICAL", "HIGH") else 1
+    score = max(0, score)
+    count = lambda st: sum(1 for r in rows if r["status"] == st)
+    unique = sorted(findings.values(), key=lambda f: (
+        SEVERITY_ORDER.index(f["severity"]) if f["severity"] in SEVERITY_ORDER else 9,
+        -STATUS_RANK.get(f["status"], 0), f["scanner"], f["test_id"] or f["name"]))
+    return {
+        "scan_time": datetime.now(timezone.utc).isoformat(),
+        "target": target,
+        "summary": {
+            "score": score, "grade": _grade(score),
+            "profiles": len({r["profile"] for r in results} | set(failed_logins)),
+            "reports": sum(1 for r in reports if r["score"] is not None),
+            "incomplete_jobs": sum(1 for r in results if not r["completed"]),
+            "failed_logins": failed_logins,
+            "total_tests": len(rows), "passed": count("PASS"), "failed": count("FAIL"),
+            "warnings": count("WARN"), "skipped": count("SKIP"), "errors": count("ERROR"),
+            "unique_findings": len(unique),
+            "critical_failures": sum(1 for f in unique if f["status"] == "FAIL" and f["severity"] == "CRITICAL"),
+            "high_failures": sum(1 for f in unique if f["status"] == "FAIL" and f["severity"] == "HIGH"),
+        },
+        "reports": reports,
+        "findings": unique,
+        "results": rows,
+    }
+
+
+def gen_md(cons: dict) -> str:
+    sm = cons["summary"]
+    L = [f"# FanDreams -- Relatorio Consolidado", "",
+         f"- **Target:** {cons['target']}", f"- **Data:** {cons['scan_time']}",
+         f"- **Score:** {sm['score']}/100 (Grade {sm['grade']})",
+         f"- **Perfis:** {sm['profiles']} | **Relatorios:** {sm['reports']} | "
+         f"**Jobs incompletos:** {sm['incomplete_jobs']}",
+         f"- **Testes:** {sm['total_tests']} | Pass: {sm['passed']} | Fail: {sm['failed']} | "
+         f"Warn: {sm['warnings']} | Skip: {sm['skipped']} | Error: {sm['errors']}",
+         f"- **Achados unicos:** {sm['unique_findings']} (Critical: {sm['critical_failures']}, "
+         f"High: {sm['high_failures']})", ""]
+    for name, why in sm["failed_logins"].items():
+        L.append(f"> Perfil **{name}** ignorado: {why}")
+    L += ["", "## Relatorios", "",
+          "| Perfil | Role | Scanner | Score | Testes | Fail | Exit | Tempo |",
+          "|---|---|---|---|---|---|---|---|"]
+    for r in cons["reports"]:
+        score = f"{r['score']} ({r['grade']})" if r["score"] is not None else "—"
+        L.append(f"| {r['profile']} | {r['role']} | {r['scanner']} | {score} | {r['total']} | "
+                 f"{r['failed']} | {r['exit_code']} | {r['elapsed_s']:.1f}s |")
+    L += ["", "## Achados", ""]
+    if not cons["findings"]:
+        L.append("Nenhum FAIL/WARN.")
+    for f in cons["findings"]:
+        tid = f"{f['test_id']} " if f["test_id"] else ""
+        L.append(f"### [{f['status']}] [{f['severity']}] {tid}{f['name']}")
+        L.append(f"- **Scanner:** {f['scanner']} | **Categoria:** {f['category']} | "
+                 f"**Perfis:** {', '.join(f['profiles'])}")
+        if f["description"]:
+            L.append(f"- {f['description']}")
+        if f["details"]:
+            L.append(f"- Detalhes: `{str(f['details'])[:300]}`")
+        if f["recommendation"]:
+            L.append(f"- Recomendacao: {f['recommendation']}")
+        L.append("")
+    return "\n".join(L) + "\n"
+
+
+# === Main =====================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="FanDreams multi-account scan orchestrator")
+    parser.add_argument("--manifest", required=True, help="Credentials manifest (JSON)")
+    parser.add_argument("--target", default=None, help="Override the manifest target")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Reports directory (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--procs", type=int, default=DEFAULT_PROCS,
+                        help=f"Worker processes (default: {DEFAULT_PROCS})")
+    parser.add_argument("--rps-budget", type=float, default=None,
+                        help=f"Requests/s per profile (default: manifest or {DEFAULT_RPS_BUDGET:g}, 0 = no cap)")
+    parser.add_argument("--token-cache", default=None,
+                        help="Token cache file (default: <output-dir>/.token_cache.json)")
+    parser.add_argument("--only", default="", help="Comma-separated profile names to run")
+    args = parser.parse_args()
+
+    try:
+        manifest = load_manifest(args.manifest, args.target)
+    except ManifestError as e:
+        parser.error(str(e))
+    if args.only:
+        wanted = {n.strip() for n in args.only.split(",") if n.strip()}
+        unknown = wanted - {p["name"] for p in manifest["profiles"]}
+        if unknown:
+            parser.error(f"Perfis desconhecidos em --only: {sorted(unknown)}")
+        manifest["profiles"] = [p for p in manifest["profiles"] if p["name"] in wanted]
+
+    out_dir = args.output_dir
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.abspath(args.token_cache or os.path.join(out_dir, ".token_cache.json"))
+    rps_budget = args.rps_budget if args.rps_budget is not None \
+        else float(manifest.get("rps_budget", DEFAULT_RPS_BUDGET))
+
+    hdr("FANDREAMS -- SCAN ORCHESTRATOR")
+    info(f"Target: {manifest['target']} | perfis: {len(manifest['profiles'])} | "
+         f"processos: {args.procs} | {rps_budget:g} req/s por perfil")
+
+    hdr("Autenticacao (token cache)")
+    failed_logins = warm_tokens(manifest, cache_path)
+    manifest["profiles"] = [p for p in manifest["profiles"] if p["name"] not in failed_logins]
+
+    queues = build_jobs(manifest, out_dir, rps_budget, cache_path)
+    hdr(f"Scanners ({sum(len(q) for q in queues.values())} jobs)")
+    t0 = time.perf_counter()
+    results = run_pool(queues, max(1, args.procs))
+    info(f"Scanners concluidos em {time.perf_counter() - t0:.1f}s")
+
+    cons = consolidate(results, manifest["target"], failed_logins)
+    json_path = os.path.join(out_dir, "consolidated.json")
+    md_path = os.path.join(out_dir, "consolidated.md")
+    with open(json_path, "w") as f:
+        json.dump(cons, f, indent=2, ensure_ascii=False)
+    with open(md_path, "w") as f:
+        f.write(gen_md(cons))
+
+    sm = cons["summary"]
+    hdr("RESULTADO CONSOLIDADO")
+    print(f"\n  {C.BD}Score: {sm['score']}/100 (Grade {sm['grade']}){C.RS}")
+    print(f"  Relatorios: {sm['reports']} | Testes: {sm['total_tests']} | "
+          f"Achados unicos: {sm['unique_findings']} | Jobs incompletos: {sm['incomplete_jobs']}")
+    if sm["critical_failures"]:
+        print(f"  {C.R}{C.BD}CRITICAL FAILURES: {sm['critical_failures']}{C.RS}")
+    if sm["high_failures"]:
+        print(f"  {C.R}HIGH FAILURES: {sm['high_failures']}{C.RS}")
+    print(f"\n  Consolidado: {C.CY}{json_path}{C.RS} / {C.CY}{md_path}{C.RS}\n")
+
+    if sm["critical_failures"]:
+        sys.exit(2)
+    if sm["high_failures"] or sm["incomplete_jobs"] or failed_logins:
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
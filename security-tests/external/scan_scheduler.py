@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- CATEGORY SCHEDULER (shared by pentest_*.py)
+============================================================================
+
+Executa as categorias `test_catNN_*` em um pool limitado de threads.
+Categorias independentes rodam em paralelo; categorias sensiveis a ordem
+ou a rate limit (rate limiting, DoS, token security, race conditions,
+uploads que alteram headers da sessao) sao declaradas `exclusive=True` e
+rodam sozinhas, depois que todas as anteriores terminarem.
+
+Determinismo: cada categoria grava sua saida de console e suas chamadas
+`defer()` (PentestReport.add, category_timings) em um buffer proprio. Os
+buffers sao reproduzidos na thread principal, na ordem de declaracao, de
+modo que o console, o stream de resultados (`<output>.ndjson`) e
+`rpt.category_timings` ficam identicos a uma execucao sequencial (`--jobs 1`).
+
+Cada categoria roda dentro de `request_trace.category(<nome da funcao>)`:
+as requests dela ficam rotuladas no --trace e o --self-profile a perfila.
+
+Uso:
+    sched = CategoryScheduler(jobs=args.jobs)
+    sched.add(test_cat01_info_disclosure, s, target, rpt)
+    sched.add(test_cat03_rate_limiting, s, target, rpt, exclusive=True)
+    sched.run()
+============================================================================
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import request_trace
+
+DEFAULT_JOBS = 4
+
+_local = threading.local()
+_flush_lock = threading.Lock()
+
+
+# === Deferred side effects ====================================================
+
+def defer(fn: Callable, *args, **kwargs):
+    """Run `fn` now, or queue it in the current category buffer if inside a worker."""
+    slot = getattr(_local, "slot", None)
+    if slot is None:
+        return fn(*args, **kwargs)
+    slot.append((fn, args, kwargs))
+    return None
+
+
+class TimingTable(dict):
+    """dict for `category_timings` whose writes are replayed in category order."""
+
+    def __setitem__(self, key, value):
+        defer(dict.__setitem__, self, key, value)
+
+
+class _ThreadAwareStdout:
+    """sys.stdout proxy: worker threads write to their category buffer."""
+
+    def __init__(self, real):
+        self._real = real
+
+    def write(self, text):
+        slot = getattr(_local, "slot", None)
+        if slot is None:
+            return self._real.write(text)
+        slot.append((self._real.write, (text,), {}))
+        return len(text)
+
+    def flush(self):
+        if getattr(_local, "slot", None) is None:
+            self._real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+# === Scheduler ================================================================
+
+class _Category:
+    __slots__ = ("fn", "args", "kwargs", "exclusive", "buffer", "future")
+
+    def __init__(self, fn, args, kwargs, exclusive):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.exclusive = exclusive
+        self.buffer: List[tuple] = []
+        self.future = None
+
+
+def _call(cat: _Category):
+    with request_trace.category(getattr(cat.fn, "__name__", "category")):
+        return cat.fn(*cat.args, **cat.kwargs)
+
+
+def _run_buffered(cat: _Category):
+    _local.slot = cat.buffer
+    try:
+        return _call(cat)
+    finally:
+        _local.slot = None
+
+
+def _replay(cat: _Category):
+    with _flush_lock:
+        for fn, args, kwargs in cat.buffer:
+            fn(*args, **kwargs)
+        cat.buffer.clear()
+
+
+class CategoryScheduler:
+    """Bounded-pool runner for pentest categories (see module docstring)."""
+
+    def __init__(self, jobs: int = DEFAULT_JOBS):
+        self.jobs = max(1, int(jobs or 1))
+        self._cats: List[_Category] = []
+
+    def add(self, fn: Callable, *args, exclusive: bool = False, **kwargs):
+        """Declare a category in execution order."""
+        self._cats.append(_Category(fn, args, kwargs, exclusive))
+
+    def _run_batch(self, pool: Optional[ThreadPoolExecutor], batch: List[_Category]):
+        if pool is None or len(batch) == 1:
+            for cat in batch:
+                _call(cat)
+            return
+        for cat in batch:
+            cat.future = pool.submit(_run_buffered, cat)
+        # Replay in declaration order; a later category that finished first
+        # simply waits in its buffer until its predecessors are flushed. A
+        # failure does not drop the buffers of the rest of the batch: they
+        # all ran, so all are replayed before the first error is re-raised.
+        error: Optional[BaseException] = None
+        for cat in batch:
+            try:
+                cat.future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+            finally:
+                _replay(cat)
+        if error is not None:
+            raise error
+
+    def run(self):
+        """Run every declared category; exceptions propagate like in a sequential run."""
+        if self.jobs == 1:
+            self._run_batch(None, self._cats)
+            return
+
+        real_stdout = sys.stdout
+        sys.stdout = _ThreadAwareStdout(real_stdout)
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs,
+                                    thread_name_prefix="pentest-cat") as pool:
+                batch: List[_Category] = []
+                for cat in self._cats:
+                    if cat.exclusive:
+                        self._run_batch(pool, batch)
+                        batch = []
+                        # Runs on the main thread, alone: nothing else is in flight.
+                        _call(cat)
+                    else:
+                        batch.append(cat)
+                self._run_batch(pool, batch)
+        finally:
+            sys.stdout = real_stdout
+        self._cats = []
@@ -0,0 +1,7 @@
+"""Tests of the scanners' shared modules (run from security-tests/external: pytest tests)."""
+
+import os
+import sys
+
+# The scanners are standalone scripts that import their siblings directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,153 @@
+"""Tests for fuzz_engine planning, budgets and response classification."""
+
+import asyncio
+from urllib.parse import unquote
+
+import http_engine
+from fuzz_engine import ACCEPTED, SERVER_ERROR, SQL_ERROR, Fuzzer, Target, _spread
+from http_engine import RequestError, Response
+
+CORPUS = {
+    "sqli": ("'", "' OR 1=1--", "1 AND 1=1", "admin'--"),
+    "nosql": ({"$ne": None}, "' OR 1=1--"),
+    "crlf": ("ok", "bad\r\nX-Fuzz-Injected: 1"),
+}
+
+
+class _Engine:
+    """Answers through `handler(method, url, headers, json) -> Response` (or raises)."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.sent = []
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+    async def request(self, method, url, headers=None, json=None, **_kw):
+        self.sent.append((method, url, json))
+        return self.handler(method, url, headers or {}, json)
+
+
+class _Session:
+    def __init__(self, engine):
+        self.engine = engine
+        self.headers = {}
+
+
+def _fuzz(handler, targets, corpus=CORPUS):
+    engine = _Engine(handler)
+    rep = Fuzzer(_Session(engine), "http://t", corpus=corpus, baseline_n=2).run(targets)
+    return rep, engine
+
+
+def _ok(*_a):
+    return Response(200, {"Content-Type": "application/json"}, b'{"success":false}', "u")
+
+
+def test_plan_dedups_payloads_shared_by_families():
+    fz = Fuzzer(_Session(_Engine(_ok)), "http://t", corpus=CORPUS)
+    cases, generated = fz.plan([Target("GET", "/s", "query", "q", families=("sqli", "nosql"))])
+    assert generated == 6 and len(cases) == 5
+    shared = next(c for c in cases if c.value == "' OR 1=1--")
+    assert shared.families == ["sqli", "nosql"]
+
+
+def test_classification_server_and_sql_errors():
+    def handler(_m, url, _h, _j):
+        if "%27" in url and "OR" not in unquote(url):
+            return Response(500, {}, b"syntax error at or near \"'\"", url)
+        return _ok()
+    rep, _ = _fuzz(handler, [Target("GET", "/s", "query", "q", families=("sqli",), name="s")])
+    assert {h.kind for h in rep.hits()} == {SERVER_ERROR, SQL_ERROR}
+    assert {h.payload for h in rep.hits(SERVER_ERROR)} == {"'", "admin'--"}
+    assert rep.inconclusive() == ""
+
+
+def test_accepted_login_bypass():
+    def handler(_m, _u, _h, body):
+        ok = isinstance(body["email"], dict)
+        return Response(200 if ok else 401, {}, b'{"success": true}' if ok else b"{}", "u")
+    rep, _ = _fuzz(handler, [Target("POST", "/login", "json", "email", body={"password": "x"},
+                                    families=("nosql",), accepted_is_vuln=True, name="login")])
+    assert [h.kind for h in rep.hits()] == [ACCEPTED]
+
+
+def test_body_factory_gives_every_request_its_own_email():
+    emails = set()
+
+    def handler(_m, _u, _h, body):
+        # Registration refuses a taken email before it even looks at the username
+        if body["email"] in emails:
+            return Response(409, {}, b'{"success": false}', "u")
+        emails.add(body["email"])
+        ok = body["username"] != "fuzzuser"
+        return Response(201 if ok else 400, {}, b'{"success": true}' if ok else b"{}", "u")
+    counter = iter(range(1000))
+    corpus = {"cmd": ("; id", "$(whoami)", "`id`")}
+    rep, engine = _fuzz(handler, [Target("POST", "/register", "json", "username",
+                                         body=lambda: {"email": f"u{next(counter)}@test.com"},
+                                         families=("cmd",), benign="fuzzuser",
+                                         accepted_is_vuln=True, name="register")], corpus)
+    assert len(engine.sent) == 2 + 3 and len(emails) == 5
+    assert sorted(h.payload for h in rep.hits(ACCEPTED)) == sorted(corpus["cmd"])
+
+
+def test_429_stops_the_target_and_is_inconclusive():
+    calls = [0]
+
+    def handler(_m, url, _h, _j):
+        calls[0] += 1
+        return Response(429 if calls[0] > 3 else 200, {}, b"{}", url)
+    t = Target("GET", "/s", "query", "q", families=("sqli", "nosql"), name="s")
+    engine = _Engine(handler)
+    rep = Fuzzer(_Session(engine), "http://t", corpus=CORPUS, baseline_n=2, per_host=1).run([t])
+    assert rep.targets["s"].planned == 5
+    assert rep.sent == 2 and rep.statuses() == {200: 1, 429: 1}
+    assert rep.throttled() == 4 and not rep.hits()
+    assert rep.inconclusive("s") == "Inconclusivo: 4/5 casos limitados por 429"
+
+
+def test_only_pre_send_errors_count_as_rejected():
+    def handler(_m, url, headers, _j):
+        value = headers.get("X-H", "")
+        if "\r" in value:
+            try:
+                raise ValueError("Newline or carriage return character detected in header")
+            except ValueError as e:
+                raise RequestError(str(e)) from e
+        if value == "ok":
+            try:
+                raise ConnectionResetError("Connection reset by peer")
+            except ConnectionResetError as e:
+                raise RequestError(str(e)) from e
+        return _ok()
+    rep, _ = _fuzz(handler, [Target("GET", "/h", "header", "X-H", families=("crlf",), name="h")])
+    stats = rep.targets["h"]
+    assert (stats.rejected, stats.errors, stats.sent) == (1, 1, 1)
+
+
+def test_budget_spreads_cases_across_families():
+    assert _spread([[1, 2, 3, 4], ["a", "b"]], 4) == [1, 3, "a", "b"]
+    assert _spread([[1, 2], ["a"]], 5) == [1, 2, "a"]
+    t = Target("POST", "/login", "json", "email", body={}, families=("sqli", "nosql"),
+               name="login", budget=4)
+    rep, engine = _fuzz(_ok, [t])
+    assert len(engine.sent) == 4                     # 1 baseline + 3 payloads
+    assert rep.targets["login"].trimmed == 2
+    assert set(rep.targets["login"].by_family) == {"sqli", "nosql"}
+
+
+def test_real_engine_rejects_crlf_header_before_sending():
+    srv, _accepted = http_engine._start_stub_server(0)
+    engine = http_engine.AsyncEngine()
+    try:
+        s = http_engine.make_session("test", engine=engine)
+        rep = Fuzzer(s, f"http://127.0.0.1:{srv.server_address[1]}", corpus=CORPUS,
+                     baseline_n=1).run([Target("GET", "/h", "header", "X-H", families=("crlf",),
+                                               name="h")])
+        assert (rep.targets["h"].rejected, rep.targets["h"].errors, rep.sent) == (1, 0, 1)
+    finally:
+        engine.close()
+        srv.shutdown()
+        srv.server_close()
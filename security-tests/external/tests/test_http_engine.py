@@ -0,0 +1,85 @@
+"""Tests for http_engine URL helpers, request building, responses and Session pooling."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_engine
+from http_engine import FakeResponse, Response, build_request, encode_url, split_origin
+
+
+def test_encode_url_keeps_dot_segments_and_escapes():
+    assert encode_url("http://h/a/../b?q=%27x y") == "http://h/a/../b?q=%27x%20y"
+
+
+def test_split_origin_defaults():
+    assert split_origin("https://api.test/v1/x?a=1") == ("https", "api.test", 443, "/v1/x?a=1")
+    assert split_origin("http://api.test:8080") == ("http", "api.test", 8080, "/")
+
+
+def test_build_request_sets_length_and_rejects_crlf():
+    raw = build_request("POST", "h", "/p", {"X-A": "1"}, b"{}")
+    assert raw.startswith(b"POST /p HTTP/1.1\r\nHost: h\r\n")
+    assert b"Content-Length: 2\r\n" in raw and raw.endswith(b"\r\n\r\n{}")
+    with pytest.raises(ValueError):
+        build_request("GET", "h", "/", {"X-A": "1\r\nX-Injected: 1"})
+
+
+def test_response_truthiness_matches_requests():
+    assert Response(200, {}, b"{}", "u")
+    assert not Response(404, {}, b"", "u")
+    assert not FakeResponse("boom").ok
+    assert FakeResponse("boom").json() == {"error": "boom"}
+
+
+def test_session_pools_connections_against_stub():
+    srv, accepted = http_engine._start_stub_server(0)
+    engine = http_engine.AsyncEngine()
+    try:
+        base = f"http://127.0.0.1:{srv.server_address[1]}"
+        s = http_engine.make_session("test", engine=engine)
+        codes = [s.get(f"{base}/x/{i}").status_code for i in range(5)]
+        assert codes == [404] * 5
+        assert engine.stats.snapshot()["connections"] == 1
+    finally:
+        engine.close()
+        srv.shutdown()
+
+
+class _RedirectHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/old":
+            self.send_response(302)
+            self.send_header("Location", "/new")
+            self.send_header("Content-Length", "0")
+        else:
+            self.send_response(200)
+            self.send_header("Set-Cookie", "sid=abc; Path=/")
+            self.send_header("Content-Length", "2")
+        self.end_headers()
+        if self.path != "/old":
+            self.wfile.write(b"ok")
+
+    def log_message(self, *a):
+        pass
+
+
+@pytest.mark.parametrize("pipeline", [True, False])
+def test_get_many_follows_redirects_and_stores_cookies(pipeline):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _RedirectHandler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    engine = http_engine.AsyncEngine()
+    try:
+        base = f"http://127.0.0.1:{srv.server_address[1]}"
+        s = http_engine.make_session("test", engine=engine)
+        out = s.get_many([f"{base}/old", f"{base}/new"], pipeline=pipeline)
+        assert [r.status_code for r in out] == [200, 200]
+        assert s.cookies == {"sid": "abc"}
+        raw = s.get_many([f"{base}/old"], pipeline=pipeline, allow_redirects=False)
+        assert raw[0].status_code == 302
+    finally:
+        engine.close()
+        srv.shutdown()
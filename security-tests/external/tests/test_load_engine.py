@@ -0,0 +1,59 @@
+"""Tests for load_engine histograms, mix parsing and rate validation."""
+
+import asyncio
+import random
+
+import pytest
+
+from load_engine import DEFAULT_MIX, EndpointLoad, HdrHistogram, load_async, parse_mix
+
+
+def test_histogram_small_values_are_exact():
+    h = HdrHistogram()
+    for v in range(1, 101):
+        h.record(v)
+    assert (h.min, h.max, h.total) == (1, 100, 100)
+    assert h.percentile(50) == 50
+    assert h.percentile(99) == 99
+    assert h.percentile(100) == 100
+
+
+def test_histogram_percentiles_within_three_significant_figures():
+    rng = random.Random(7)
+    values = sorted(rng.randint(1, 5_000_000) for _ in range(10_000))
+    h = HdrHistogram()
+    for v in values:
+        h.record(v)
+    for p in (50, 90, 99, 99.9):
+        exact = values[max(1, -(-int(p * len(values)) // 100)) - 1]
+        assert exact <= h.percentile(p) <= exact * 1.001 + 1
+
+
+def test_histogram_empty_and_negative():
+    h = HdrHistogram()
+    assert h.percentile(99) == 0 and h.to_dict()["mean_ms"] == 0.0
+    h.record(-5)
+    assert h.min == h.max == 0
+
+
+def test_endpoint_counts_errors_per_second():
+    ep = EndpointLoad("/feed", "GET", "/feed")
+    for second, status in ((0, 200), (0, 503), (1, 0), (1, 200)):
+        ep.record(second, status, 1000, 900)
+    d = ep.to_dict()
+    assert d["errors"] == 2 and d["error_rate"] == 0.5
+    assert [t["errors"] for t in d["timeline"]] == [1, 1]
+
+
+def test_parse_mix_overrides_and_drops_zero_weights():
+    mix = parse_mix("/feed=3,/fancoins/wallet=0")
+    assert mix == (("/feed", "GET", "/feed", 3),)
+    with pytest.raises(ValueError):
+        parse_mix("/nope=1")
+    assert len(parse_mix(",".join(m[0] for m in DEFAULT_MIX))) == len(DEFAULT_MIX)
+
+
+@pytest.mark.parametrize("rps", [0, -1.0, float("nan")])
+def test_load_rejects_non_positive_rps(rps):
+    with pytest.raises(ValueError):
+        asyncio.run(load_async(None, "http://t", {}, DEFAULT_MIX, rps, 1.0, 1.0, 0))
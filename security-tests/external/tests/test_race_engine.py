@@ -0,0 +1,138 @@
+import asyncio
+import json
+import selectors
+import socket
+import threading
+import time
+
+import pytest
+
+import race_engine
+from race_engine import RaceHit, RaceResult, _encode_bodies
+
+
+def _hit(i, status, send_ns=0, recv_ns=0):
+    h = RaceHit(i)
+    h.status, h.send_ns, h.recv_ns = status, send_ns, recv_ns
+    return h
+
+
+def test_race_result_spreads_and_counts():
+    res = RaceResult([_hit(0, 200, 1_000_000, 5_000_000), _hit(1, 409, 1_500_000, 9_000_000),
+                      _hit(2, 0)], payload_bytes=12)
+    assert res.send_skew_ms == pytest.approx(0.5)
+    assert res.recv_spread_ms == pytest.approx(4.0)
+    assert res.count_success() == 1
+    assert res.statuses() == {200: 1, 409: 1, 0: 1}
+    assert "write_skew=0.500ms" in res.describe()
+
+
+def test_encode_bodies_pads_with_json_whitespace():
+    bodies = _encode_bodies(json={"amount": 1}, n=2, pad=10)
+    assert len(bodies) == 2
+    assert len(bodies[0]) == len(json.dumps({"amount": 1})) + 10
+    assert json.loads(bodies[0]) == {"amount": 1}
+
+
+def test_failed_warmup_closes_connection(monkeypatch):
+    # Server accepts, then hangs up without answering the OPTIONS warm-up
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen()
+
+    def _serve():
+        conn, _ = srv.accept()
+        conn.recv(4096)
+        conn.close()
+    threading.Thread(target=_serve, daemon=True).start()
+
+    closed = []
+    real_close = race_engine.RawConnection.close
+
+    def _close(self):
+        closed.append(self)
+        real_close(self)
+
+    monkeypatch.setattr(race_engine.RawConnection, "close", _close)
+    try:
+        with pytest.raises(ConnectionError):
+            asyncio.run(race_engine._open_warm("http", "127.0.0.1", srv.getsockname()[1], "/",
+                                               {}, True, 2, None))
+    finally:
+        srv.close()
+    assert len(closed) == 1 and closed[0].closed
+
+
+def _race_server(n, stop):
+    """Single-threaded keep-alive stub: answers OPTIONS warm-ups and records, per
+    connection, when a POST was partially buffered and when its last byte landed."""
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(n)
+    srv.setblocking(False)
+    sel = selectors.DefaultSelector()
+    sel.register(srv, selectors.EVENT_READ)
+    partial, done = {}, {}
+
+    def _serve():
+        bufs = {}
+        while not stop.is_set():
+            for key, _ in sel.select(0.05):
+                now = time.perf_counter_ns()
+                if key.fileobj is srv:
+                    conn, _ = srv.accept()
+                    bufs[conn] = b""
+                    sel.register(conn, selectors.EVENT_READ)
+                    continue
+                conn = key.fileobj
+                data = conn.recv(65536)
+                if not data:
+                    sel.unregister(conn)
+                    conn.close()
+                    continue
+                bufs[conn] += data
+                while b"\r\n\r\n" in bufs[conn]:
+                    head, rest = bufs[conn].split(b"\r\n\r\n", 1)
+                    length = 0
+                    for line in head.split(b"\r\n")[1:]:
+                        name, _, value = line.partition(b":")
+                        if name.strip().lower() == b"content-length":
+                            length = int(value)
+                    if len(rest) < length:
+                        if head.startswith(b"POST"):
+                            partial.setdefault(conn, now)
+                        break
+                    bufs[conn] = rest[length:]
+                    if head.startswith(b"POST"):
+                        done[conn] = now
+                        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                    else:
+                        conn.sendall(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+        sel.close()
+        srv.close()
+    threading.Thread(target=_serve, daemon=True).start()
+    return srv.getsockname()[1], partial, done
+
+
+def test_race_releases_all_requests_together():
+    n, settle = 5, 0.2
+    stop = threading.Event()
+    port, partial, done = _race_server(n, stop)
+    try:
+        bodies = _encode_bodies(json={"amount": 1}, n=n)
+        res = asyncio.run(race_engine.race_async("POST", f"http://127.0.0.1:{port}/tip", bodies,
+                                                 {"Content-Type": "application/json"},
+                                                 settle=settle, timeout=5))
+    finally:
+        stop.set()
+    assert res.statuses() == {200: n}
+    assert all(h.send_ns and h.recv_ns >= h.send_ns for h in res.hits)
+    # Every request sat buffered minus its last byte until the release loop
+    assert len(partial) == n and len(done) == n
+    release = min(h.send_ns for h in res.hits)
+    assert max(partial.values()) < release
+    # send_ns is stamped right after write(): allow 1ms for the first tail to land first
+    assert all(t >= release - 1_000_000 for t in done.values())
+    # ...and all N completed together: the reported write skew plus scheduler slack
+    arrival_ms = (max(done.values()) - min(done.values())) / 1e6
+    assert arrival_ms <= res.send_skew_ms + 20
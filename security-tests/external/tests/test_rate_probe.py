@@ -0,0 +1,153 @@
+"""Tests for rate_probe header parsing and window recovery."""
+
+import asyncio
+import time
+
+from multidict import CIMultiDict
+
+import rate_probe
+from http_engine import Response
+from rate_probe import RateLimitResult, RateProber, parse_rate_headers
+
+
+def _h(**headers):
+    return CIMultiDict({k.replace("_", "-"): v for k, v in headers.items()})
+
+
+def test_plain_delta_headers():
+    out = parse_rate_headers(_h(X_RateLimit_Limit="10", X_RateLimit_Remaining="7",
+                                X_RateLimit_Reset="60"))
+    assert out == {"limit": 10.0, "remaining": 7.0, "reset": 60.0}
+
+
+def test_reset_as_epoch_seconds():
+    out = parse_rate_headers(_h(X_RateLimit_Reset=str(int(time.time()) + 30)))
+    assert 28 <= out["reset"] <= 30
+
+
+def test_reset_as_epoch_milliseconds():
+    out = parse_rate_headers(_h(X_RateLimit_Reset=str(int(time.time() * 1000) + 30_000)))
+    assert 28 <= out["reset"] <= 30
+
+
+def test_reset_epoch_in_the_past_clamps_to_zero():
+    out = parse_rate_headers(_h(RateLimit_Reset=str(int(time.time() * 1000) - 5_000)))
+    assert out["reset"] == 0.0
+
+
+def test_ietf_combined_and_policy():
+    out = parse_rate_headers(_h(RateLimit="limit=100, remaining=50, reset=30",
+                                RateLimit_Policy="100;w=60"))
+    assert out == {"limit": 100.0, "remaining": 50.0, "reset": 30.0, "window": 60.0}
+
+
+def test_retry_after_seconds():
+    assert parse_rate_headers(_h(Retry_After="12"))["retry_after"] == 12.0
+    assert parse_rate_headers(_h()) == {}
+
+
+class _Engine:
+    """Answers 429 until `ok_after` requests were made, then 200."""
+
+    def __init__(self, ok_after):
+        self.ok_after = ok_after
+        self.calls = 0
+
+    async def request(self, method, url, **_kw):
+        self.calls += 1
+        status = 200 if self.calls >= self.ok_after else 429
+        return Response(status, {"Retry-After": "3600"}, b"", url)
+
+
+class _Session:
+    def __init__(self, engine):
+        self.engine = engine
+
+
+def _recover(ok_after, hint, monkeypatch, max_wait=5.0):
+    slept = []
+
+    async def _sleep(delay):
+        slept.append(delay)
+    monkeypatch.setattr(rate_probe.asyncio, "sleep", _sleep)
+    engine = _Engine(ok_after)
+    prober = RateProber(_Session(engine), budget=20, max_wait=max_wait)
+    ok = asyncio.run(prober._recover(RateLimitResult("x", "GET"), "GET", "http://t/", None, {}, hint))
+    return ok, slept
+
+
+def test_recover_uses_short_advertised_delay(monkeypatch):
+    ok, slept = _recover(1, {"retry_after": 2.0}, monkeypatch)
+    assert ok and slept == [2.0]
+
+
+def test_recover_polls_when_advertised_delay_exceeds_max_wait(monkeypatch):
+    ok, slept = _recover(3, {"reset": 3600.0}, monkeypatch)
+    assert ok and slept == [0.5, 1.0, 2.0]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _WindowEngine:
+    """Fixed window per Authorization header: `limit` requests, then 429 for `reset` s."""
+
+    def __init__(self, clock, limit, reset, retry_after=True):
+        self.clock, self.limit, self.reset, self.retry_after = clock, limit, reset, retry_after
+        self.used, self.blocked_until = {}, {}
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+    async def request(self, method, url, headers=None, **_kw):
+        who = (headers or {}).get("Authorization", "")
+        until = self.blocked_until.get(who)
+        if until is not None and self.clock() >= until:
+            self.used[who], until = 0, None
+            del self.blocked_until[who]
+        self.used[who] = self.used.get(who, 0) + 1
+        if until is None and self.used[who] <= self.limit:
+            return Response(200, {}, b"", url)
+        if until is None:
+            self.blocked_until[who] = self.clock() + self.reset
+        return Response(429, {"Retry-After": str(self.reset)} if self.retry_after else {}, b"", url)
+
+
+def _probe(monkeypatch, retry_after=True, **kw):
+    clock = _Clock()
+    real_sleep = asyncio.sleep
+
+    async def _sleep(delay):
+        clock.now += delay + 1e-6   # a real clock always moves on, even for tiny sleeps
+        await real_sleep(0)
+    monkeypatch.setattr(rate_probe.time, "monotonic", clock)
+    monkeypatch.setattr(rate_probe.asyncio, "sleep", _sleep)
+    engine = _WindowEngine(clock, limit=8, reset=2, retry_after=retry_after)
+    session = _Session(engine)
+    session.headers = {"Authorization": "Bearer a"}
+    return RateProber(session, budget=14, start_rate=5.0).probe("POST", "http://t/login", **kw)
+
+
+def test_probe_window_starts_at_the_tripping_burst(monkeypatch):
+    # The 5 req/s step takes ~1s and stays under the limit; the 10 req/s burst
+    # trips it a few requests in. Counting from the probe start would add that 1s.
+    res = _probe(monkeypatch)
+    assert res.limited and res.limit == 8
+    assert 2 < res.window_s < 2.5
+
+
+def test_probe_window_without_headers_runs_until_recovery(monkeypatch):
+    # Polls 0.5s and 1.5s after the 429 are still blocked, the one at 3.5s passes
+    res = _probe(monkeypatch, retry_after=False)
+    assert 3.5 < res.window_s < 4
+
+
+def test_probe_key_needs_an_alternate_identity(monkeypatch):
+    # Distinct bodies alone do not tell an IP limit from an account one
+    assert _probe(monkeypatch, body_fn=lambda i: {"email": f"u{i}@test.com"}).key == ""
+    assert _probe(monkeypatch, alt_headers={"Authorization": "Bearer b"}).key == "account"
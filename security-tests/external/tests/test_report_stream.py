@@ -0,0 +1,80 @@
+"""Tests for report_stream aggregates, the NDJSON stream and the streaming renderers."""
+
+import json
+
+from report_stream import JsonSink, ResultStream, Sink, StatusHistogram, Tally, read_stream, \
+    render, slotted
+
+
+@slotted
+class _Row:
+    name: str
+    status: str = "PASS"
+
+
+def test_slotted_dataclass_has_no_instance_dict():
+    r = _Row("a")
+    assert not hasattr(r, "__dict__") and r == _Row(name="a", status="PASS")
+
+
+def test_status_histogram():
+    h = StatusHistogram()
+    h.add(429, 117)
+    h.add(200, 3)
+    assert h.total() == 120 and h.to_dict() == {"200": 3, "429": 117}
+
+
+def test_tally_counts_and_deduction():
+    t = Tally()
+    for st, sev in (("FAIL", "HIGH"), ("FAIL", "LOW"), ("WARN", "HIGH"), ("PASS", "HIGH")):
+        t.add(st, sev, "cat")
+    assert t.count("FAIL") == 2 and t.count(severity="HIGH") == 3
+    assert t.categories == {"cat": {"FAIL": 2, "WARN": 1, "PASS": 1}}
+    assert t.deduct({"HIGH": 10}, {"HIGH": 5}, fail_default=1) == 16
+
+
+def _stream(tmp_path, records):
+    rs = ResultStream(str(tmp_path / "r.ndjson"))
+    for kind, rec in records:
+        rs.write(rec, kind)
+    return rs.close()
+
+
+def test_json_sink_matches_json_dump(tmp_path):
+    results = [{"name": "ação", "n": 1, "nested": {"a": [1, 2]}}, {"name": "b", "n": None}]
+    findings = [{"title": "x"}]
+    path = _stream(tmp_path, [("result", r) for r in results] + [("finding", f) for f in findings])
+    doc = {"target": "https://t", "summary": {"score": 90, "tags": []}, "results": [],
+           "findings": [], "empty": {}}
+    out = tmp_path / "r.json"
+    assert render(path, JsonSink(str(out), doc, {"results": "result", "findings": "finding"})) == 3
+    expected = json.dumps(dict(doc, results=results, findings=findings), indent=2,
+                          ensure_ascii=False)
+    assert out.read_text(encoding="utf-8") == expected
+
+
+def test_json_sink_empty_lists_and_doc(tmp_path):
+    path = _stream(tmp_path, [])
+    for doc in ({"results": []}, {}):
+        out = tmp_path / "e.json"
+        render(path, JsonSink(str(out), doc))
+        assert out.read_text() == json.dumps(doc, indent=2)
+
+
+def test_sink_sections_in_declaration_order(tmp_path):
+    class _Md(Sink):
+        sections = ("main", "*", "foot")
+
+        def row(self, kind, rec):
+            self.line(rec["name"], section=rec["cat"])
+
+        def tail(self):
+            self.line("end", "foot")
+            self.line("top")
+
+    path = _stream(tmp_path, [("result", {"name": n, "cat": c})
+                              for n, c in (("a", "x"), ("b", "y"), ("c", "x"))])
+    out = tmp_path / "r.md"
+    render(path, _Md(str(out)))
+    assert out.read_text().split() == ["top", "a", "c", "b", "end"]
+    assert [k for k, _ in read_stream(path)] == ["result"] * 3
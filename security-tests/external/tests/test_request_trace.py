@@ -0,0 +1,69 @@
+"""Tests for request_trace endpoint keys, per-endpoint stats and the Chrome trace."""
+
+import json
+
+import http_engine
+from http_engine import RequestTiming
+from request_trace import ChromeTrace, EndpointStats, Tracer, endpoint_key, format_slowest
+
+
+def _timing(url, start, end, status=200, label="", spans=(), method="GET"):
+    t = RequestTiming(method, url, label)
+    t.start, t.end, t.status = start, end, status
+    t.spans = list(spans)
+    return t
+
+
+def test_endpoint_key_collapses_ids():
+    uuid = "3f2b1c9a-1d2e-4f50-8a6b-0c1d2e3f4a5b"
+    assert endpoint_key("GET", f"http://t/posts/{uuid}/comments?page=2") == "GET /posts/{id}/comments"
+    assert endpoint_key("GET", "http://t/users/42") == "GET /users/{id}"
+    assert endpoint_key("GET", "http://t/o/65f1a2b3c4d5e6f708192a3b") == "GET /o/{id}"
+    assert endpoint_key("POST", "http://t") == "POST /"
+    assert endpoint_key("GET", "http://t/v1/x") == "GET /v1/x"
+
+
+def test_endpoint_stats_phases_and_errors():
+    ep = EndpointStats("GET /x")
+    ep.record(_timing("u", 0.0, 0.010, spans=[("connect", 0.0, 0.004), ("ttfb", 0.004, 0.010)]))
+    ep.record(_timing("u", 0.0, 0.020, status=502, spans=[("ttfb", 0.0, 0.020)]))
+    assert ep.count == 2 and ep.errors == 1
+    assert round(ep.avg_ms("ttfb"), 3) == 13.0 and round(ep.avg_ms("connect"), 3) == 2.0
+    assert ep.to_dict()["total"]["max_ms"] == 20.0
+
+
+def test_chrome_trace_is_valid_json_with_non_overlapping_lanes(tmp_path):
+    path = tmp_path / "t.json"
+    tr = ChromeTrace(str(path), origin=0.0)
+    for t0, t1 in ((0.0, 1.0), (0.5, 1.5), (1.0, 2.0), (1.2, 1.4)):
+        tr.request(_timing("http://t/x", t0, t1, spans=[("ttfb", t0, t1)]), "GET /x")
+    tr.close()
+    events = json.loads(path.read_text())["traceEvents"]
+    reqs = [e for e in events if e.get("cat") == "request"]
+    assert len(reqs) == 4
+    lanes = {}
+    for e in reqs:
+        lanes.setdefault(e["tid"], []).append((e["ts"], e["ts"] + e["dur"]))
+    for spans in lanes.values():
+        spans.sort()
+        assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+    assert len(lanes) == 3
+
+
+def test_tracer_aggregates_observed_timings(tmp_path):
+    tracer = Tracer(trace=str(tmp_path / "t.json"))
+    try:
+        with tracer.category("test_cat01"):
+            assert http_engine.request_label.get() == "test_cat01"
+        tracer.observe(_timing("http://t/users/1", 0.0, 0.050, label="test_cat01"))
+        tracer.observe(_timing("http://t/users/2", 0.0, 0.010, label="test_cat01"))
+        tracer.observe(_timing("http://t/health", 0.0, 0.001))
+        d = tracer.to_dict()
+        assert d["requests"] == 3 and d["categories"]["test_cat01"]["requests"] == 2
+        assert [e.key for e in tracer.slowest(1)] == ["GET /users/{id}"]
+        lines = format_slowest(tracer, 5)
+        assert len(lines) == 4 and lines[1].startswith("GET /users/{id}")
+        assert format_slowest(tracer, 0) == []
+    finally:
+        paths = tracer.close()
+    assert json.loads(open(paths[0]).read())["traceEvents"]
@@ -0,0 +1,167 @@
+"""Tests for result_store resume, --changed-only reuse and fingerprints."""
+
+import json
+import sqlite3
+
+import pytest
+
+import http_engine
+from http_engine import Response
+from result_store import ResultStore, checkpoint, endpoint_key
+
+
+class _Session:
+    """Serves canned JSON bodies; GETs go through the response observers like Session."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.probes = 0
+
+    def _resp(self, url):
+        body = self.bodies.get(url)
+        if body is None:
+            return Response(404, {}, b"", url)
+        return Response(200, {"Content-Type": "application/json"}, json.dumps(body).encode(), url)
+
+    def get(self, url):
+        r = self._resp(url)
+        http_engine._notify_response("GET", url, r)
+        return r
+
+    def post(self, url):
+        r = Response(405, {}, b"", url)
+        http_engine._notify_response("POST", url, r)
+        return r
+
+    def get_many(self, urls):
+        self.probes += len(urls)
+        return [self._resp(u) for u in urls]
+
+
+def _store(path, session, results, resume=False, changed_only=False, timings=None):
+    store = ResultStore(str(path), "test", "1.0", None, "http://t", "a@b",
+                        replay=results.append, log=lambda _m: None, timings=timings)
+    store.start(session, resume=resume, changed_only=changed_only)
+    return store
+
+
+def _unit(session, calls):
+    def test_cat01_profile():
+        calls.append(1)
+        session.get("http://t/users/123")
+        session.get("http://t/users/123/ban")
+        checkpoint({"category": "CAT-01", "name": "profile", "status": "PASS"})
+    return test_cat01_profile
+
+
+@pytest.fixture(autouse=True)
+def _no_leaked_observers():
+    yield
+    http_engine._response_observers.clear()
+    http_engine._observers.clear()
+
+
+def test_endpoint_key_collapses_ids():
+    assert endpoint_key("get", "http://t/users/42/posts/3f2b1c9a-1d2e-4f50-8a6b-0c1d2e3f4a5b?x=1") \
+        == "GET /users/:id/posts/:id"
+
+
+def test_only_2xx_gets_are_fingerprinted(tmp_path):
+    session, calls, results = _Session({"http://t/users/123": {"id": 1, "name": "x"}}), [], []
+    store = _store(tmp_path / "r.db", session, results)
+    store.wrap(_unit(session, calls))()
+    store.finish()
+    row = sqlite3.connect(tmp_path / "r.db").execute("SELECT endpoints, fingerprint FROM units") \
+        .fetchone()
+    assert json.loads(row[0]) == {"GET /users/:id": "http://t/users/123"}
+    assert row[1]
+    assert session.probes == 0          # nothing re-requested after the scan
+
+
+def test_changed_only_reuses_until_the_shape_changes(tmp_path):
+    db = tmp_path / "r.db"
+    session, calls = _Session({"http://t/users/123": {"id": 1, "name": "x"}}), []
+    for _ in range(2):
+        results = []
+        store = _store(db, session, results, changed_only=True)
+        store.wrap(_unit(session, calls))()
+        store.finish()
+    assert len(calls) == 1 and store.reused == 1
+    assert results == [{"category": "CAT-01", "name": "profile", "status": "PASS"}]
+
+    session.bodies["http://t/users/123"] = {"id": 1, "name": "x", "email": "leak"}
+    store = _store(db, session, [], changed_only=True)
+    store.wrap(_unit(session, calls))()
+    store.finish()
+    assert len(calls) == 2 and store.reused == 0
+
+
+def test_changed_only_keeps_the_stored_category_timing(tmp_path):
+    db = tmp_path / "r.db"
+    session, calls = _Session({"http://t/users/123": {"id": 1}}), []
+    store = _store(db, session, [], changed_only=True)
+    store.wrap(_unit(session, calls))()
+    store.finish()
+    stored = sqlite3.connect(db).execute("SELECT duration FROM units").fetchone()[0]
+
+    timings = {}
+    store = _store(db, session, [], changed_only=True, timings=timings)
+    store.wrap(_unit(session, calls))()
+    store.finish()
+    assert store.reused == 1 and timings == {"CAT-01": stored}
+
+
+@pytest.mark.parametrize("send", [
+    lambda s: s.post("http://t/users/123/ban"),
+    lambda s: http_engine.notify("POST", "http://t/fancoins/tip"),   # race_engine / rate_probe
+])
+def test_unit_with_state_changing_request_always_runs(tmp_path, send):
+    db = tmp_path / "r.db"
+    session, calls = _Session({"http://t/users/123": {"id": 1}}), []
+
+    def test_cat04_financial():
+        calls.append(1)
+        session.get("http://t/users/123")
+        send(session)
+    for _ in range(2):
+        store = _store(db, session, [], changed_only=True)
+        store.wrap(test_cat04_financial)()
+        store.finish()
+    assert len(calls) == 2 and store.reused == 0
+    row = sqlite3.connect(db).execute("SELECT writes, fingerprint FROM units").fetchone()
+    assert json.loads(row[0]) and row[1] is None
+
+
+def test_unit_without_2xx_get_always_runs(tmp_path):
+    db = tmp_path / "r.db"
+    session, calls = _Session({}), []
+    for _ in range(2):
+        store = _store(db, session, [], changed_only=True)
+        store.wrap(_unit(session, calls))()
+        store.finish()
+    assert len(calls) == 2
+
+
+def test_resume_replays_done_units_and_reruns_the_interrupted_one(tmp_path):
+    db = tmp_path / "r.db"
+    session, calls = _Session({}), []
+    store = _store(db, session, [])
+    store.wrap(_unit(session, calls))()
+
+    def test_cat02_crash():
+        checkpoint({"name": "partial"})
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        store.wrap(test_cat02_crash)()
+    store.db.close()                    # interrupted: finish() never runs
+
+    results, ran = [], []
+    store = _store(db, session, results, resume=True)
+    store.wrap(_unit(session, calls))()
+    store.wrap(lambda: ran.append(1), unit="test_cat02_crash")()
+    store.finish()
+    assert len(calls) == 1 and ran == [1]
+    assert results == [{"category": "CAT-01", "name": "profile", "status": "PASS"}]
+    partial = sqlite3.connect(db).execute("SELECT COUNT(*) FROM results WHERE payload LIKE "
+                                          "'%partial%'").fetchone()[0]
+    assert partial == 0
@@ -0,0 +1,71 @@
+"""Tests for scan_orchestrator manifests, jobs and report consolidation."""
+
+import json
+
+import pytest
+
+from scan_orchestrator import ManifestError, build_jobs, consolidate, load_manifest, normalize
+
+
+def _manifest(tmp_path, profiles, **extra):
+    path = tmp_path / "m.json"
+    path.write_text(json.dumps(dict({"target": "https://api.x/api/v1/", "profiles": profiles},
+                                    **extra)))
+    return str(path)
+
+
+def test_manifest_defaults_and_password_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAN_PW", "s3cret")
+    m = load_manifest(_manifest(tmp_path, [
+        {"role": "fan", "email": "a@b", "password_env": "FAN_PW"}, {"role": "unauth"}]))
+    assert m["target"] == "https://api.x/api/v1"
+    fan, anon = m["profiles"]
+    assert (fan["name"], fan["password"]) == ("fan1", "s3cret") and fan["scanners"]
+    assert anon["name"] == "unauth2"
+
+
+@pytest.mark.parametrize("profiles", [
+    [],
+    [{"role": "admin"}],
+    [{"role": "fan", "email": "a@b"}],
+    [{"role": "unauth", "name": "x"}, {"role": "unauth", "name": "x"}],
+    [{"role": "unauth", "scanners": ["nope"]}],
+])
+def test_manifest_errors(tmp_path, profiles):
+    with pytest.raises(ManifestError):
+        load_manifest(_manifest(tmp_path, profiles))
+
+
+def test_build_jobs_targets_and_env(tmp_path):
+    m = load_manifest(_manifest(tmp_path, [{"role": "fan", "email": "a@b", "password": "p",
+                                            "rps_budget": 5}]))
+    queues = build_jobs(m, str(tmp_path / "out"), 20.0, str(tmp_path / "tok.json"))
+    jobs = list(queues["fan1"])
+    assert jobs and all(j["env"]["FANDREAMS_TOKEN_CACHE"] == str(tmp_path / "tok.json") for j in jobs)
+    for j in jobs:
+        assert j["argv"][j["argv"].index("--target") + 1] in ("https://api.x", "https://api.x/api/v1")
+        assert "5" in j["env"].values()
+
+
+def test_normalize_both_schemas():
+    ext = normalize("external", {"test_results": [{"category": "c", "test_name": "t", "passed": True}],
+                                 "findings": [{"category": "c", "title": "XSS", "severity": "HIGH"}]})
+    assert [(r["name"], r["status"]) for r in ext] == [("XSS", "FAIL"), ("t", "PASS")]
+    pen = normalize("fan", {"results": [{"cat": "c", "test_id": "1.1", "test_name": "n",
+                                         "sev": "LOW", "status": "WARN"}]})
+    assert pen[0]["severity"] == "LOW" and pen[0]["name"] == "n"
+
+
+def test_consolidate_dedups_findings_across_profiles(tmp_path):
+    results = []
+    for prof in ("fan1", "fan2"):
+        path = tmp_path / f"{prof}.json"
+        path.write_text(json.dumps({"summary": {"score": 80}, "results": [
+            {"category": "c", "test_id": "1.1", "name": "idor", "severity": "HIGH", "status": "FAIL"},
+            {"category": "c", "test_id": "1.2", "name": "ok", "severity": "INFO", "status": "PASS"}]}))
+        results.append({"profile": prof, "role": "fan", "scanner": "fan", "exit_code": 1,
+                        "elapsed_s": 1.0, "json": str(path), "log": "", "completed": True})
+    cons = consolidate(results, "https://api.x", {})
+    assert cons["summary"]["unique_findings"] == 1
+    assert cons["findings"][0]["profiles"] == ["fan1", "fan2"]
+    assert cons["summary"]["score"] == 90 and cons["summary"]["total_tests"] == 4
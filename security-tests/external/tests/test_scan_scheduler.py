@@ -0,0 +1,93 @@
+"""Tests for scan_scheduler: deterministic replay, exclusive categories and errors."""
+
+import threading
+import time
+
+import pytest
+
+from scan_scheduler import CategoryScheduler, TimingTable, defer
+
+
+class _Probe:
+    """Shared state of the fake categories: replayed events and live concurrency."""
+
+    def __init__(self):
+        self.events = []
+        self.timings = TimingTable()
+        self.running = 0
+        self.peak = 0
+        self.alone = {}
+        self._lock = threading.Lock()
+
+    def category(self, name, delay=0.0, fail=False):
+        def fn():
+            with self._lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            try:
+                print(f"start {name}")
+                time.sleep(delay)
+                defer(self.events.append, name)
+                self.timings[name] = delay
+                with self._lock:
+                    self.alone[name] = self.running == 1
+                if fail:
+                    raise RuntimeError(f"{name} failed")
+                print(f"end {name}")
+            finally:
+                with self._lock:
+                    self.running -= 1
+        fn.__name__ = name
+        return fn
+
+
+def _lines(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line]
+
+
+def test_parallel_replay_matches_declaration_order(capsys):
+    probe = _Probe()
+    sched = CategoryScheduler(jobs=3)
+    for name, delay in (("a", 0.15), ("b", 0.05), ("c", 0.0)):
+        sched.add(probe.category(name, delay))
+    sched.run()
+    assert probe.peak > 1
+    assert probe.events == ["a", "b", "c"]
+    assert list(probe.timings) == ["a", "b", "c"]
+    assert _lines(capsys) == ["start a", "end a", "start b", "end b", "start c", "end c"]
+
+
+def test_exclusive_category_runs_alone(capsys):
+    probe = _Probe()
+    sched = CategoryScheduler(jobs=4)
+    sched.add(probe.category("a", 0.05))
+    sched.add(probe.category("b", 0.05))
+    sched.add(probe.category("x", 0.02), exclusive=True)
+    sched.add(probe.category("c", 0.05))
+    sched.add(probe.category("d", 0.05))
+    sched.run()
+    assert probe.alone["x"] and probe.peak == 2
+    assert probe.events == ["a", "b", "x", "c", "d"]
+    capsys.readouterr()
+
+
+def test_failure_keeps_the_rest_of_the_batch(capsys):
+    probe = _Probe()
+    sched = CategoryScheduler(jobs=3)
+    sched.add(probe.category("a", 0.05))
+    sched.add(probe.category("b", 0.0, fail=True))
+    sched.add(probe.category("c", 0.02))
+    sched.add(probe.category("later", 0.0), exclusive=True)
+    with pytest.raises(RuntimeError, match="b failed"):
+        sched.run()
+    assert probe.events == ["a", "b", "c"]          # "later" never ran, like a sequential run
+    assert _lines(capsys) == ["start a", "end a", "start b", "start c", "end c"]
+
+
+def test_sequential_run_writes_directly(capsys):
+    probe = _Probe()
+    sched = CategoryScheduler(jobs=1)
+    sched.add(probe.category("a"))
+    sched.add(probe.category("b"))
+    sched.run()
+    assert probe.events == ["a", "b"] and _lines(capsys)[-1] == "end b"
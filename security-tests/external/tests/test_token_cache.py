@@ -0,0 +1,62 @@
+"""Tests for token_cache JWT expiry and the cache -> refresh -> login order."""
+
+import base64
+import json
+import time
+
+from http_engine import Response
+from token_cache import TokenCache, jwt_exp
+
+
+def _jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).rstrip(b"=").decode()
+    return f"h.{payload}.s"
+
+
+def test_jwt_exp():
+    assert jwt_exp(_jwt(1234567890)) == 1234567890
+    assert jwt_exp("not-a-jwt") == 0.0
+    assert jwt_exp("a.!!!.c") == 0.0
+
+
+class _Session:
+    def __init__(self, me_status=200):
+        self.me_status = me_status
+        self.calls = []
+
+    def get(self, url, **_kw):
+        self.calls.append(("GET", url.rsplit("/", 1)[1]))
+        return Response(self.me_status, {}, b"{}", url)
+
+    def post(self, url, **_kw):
+        path = url.rsplit("/", 1)[1]
+        self.calls.append(("POST", path))
+        tokens = {"accessToken": _jwt(time.time() + 3600), "refreshToken": _jwt(time.time() + 86400)}
+        data = dict(tokens, user={"id": "u1"}) if path == "login" else tokens
+        return Response(200, {}, json.dumps({"success": True, "data": data}).encode(), url)
+
+
+def test_login_then_cache_then_refresh(tmp_path):
+    cache = TokenCache(str(tmp_path / "tokens.json"))
+    s = _Session()
+    first = cache.login(s, "http://t/", "Fan@X.com", "pw")
+    assert first.json()["data"]["user"] == {"id": "u1"}
+    second = cache.login(s, "http://t", "fan@x.com", "pw")
+    assert second.json()["data"]["accessToken"] == first.json()["data"]["accessToken"]
+    assert cache.hits == {"cache": 1, "refresh": 0, "login": 1}
+
+    s.me_status = 401                   # access token revoked: refresh, keep the user
+    third = cache.login(s, "http://t", "fan@x.com", "pw")
+    assert third.json()["data"]["user"] == {"id": "u1"}
+    assert cache.hits["refresh"] == 1
+    assert [c for c in s.calls if c[0] == "POST"] == [("POST", "login"), ("POST", "refresh")]
+
+
+def test_expired_access_token_is_not_probed(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({TokenCache.key("http://t", "a@b"): {
+        "accessToken": _jwt(time.time() + 30), "refreshToken": _jwt(time.time() - 1),
+        "user": {}}}))
+    s = _Session()
+    TokenCache(str(path)).login(s, "http://t", "a@b", "pw")
+    assert s.calls == [("POST", "login")]
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FANDREAMS -- TOKEN CACHE (logins reaproveitados entre scanners/processos)
+============================================================================
+
+Cada scanner fazia o proprio POST /auth/login. Rodando varios scanners por
+conta (scan_orchestrator.py), isso vira N logins por perfil e esbarra no
+rate limit sensivel de /auth/login.
+
+Com FANDREAMS_TOKEN_CACHE apontando para um arquivo JSON, login() procura
+a conta (target + email) no cache, protegido por lock de arquivo:
+  1. access token ainda valido (exp do JWT + GET /auth/me = 200) -> reusa;
+  2. senao, POST /auth/refresh com o refresh token -> grava o par novo
+     (a API rotaciona e invalida o refresh antigo);
+  3. senao, login normal -> grava o par.
+Logout (CAT 18/23 dos pentests) derruba o access token mas nao o refresh:
+o proximo scanner do perfil cai no passo 2.
+
+Sem a variavel, login() e so o POST /auth/login de sempre.
+
+Uso via scanners (mesma resposta de /auth/login):
+    r = token_cache.login(session, base, email, password)
+    d = r.json()
+============================================================================
+"""
+
+import base64
+import json as _json
+import os
+import time
+from contextlib import contextmanager
+
+from http_engine import RequestError, Response
+
+try:
+    import fcntl
+except ImportError:          # Windows: single-process use only
+    fcntl = None
+
+CACHE_ENV = "FANDREAMS_TOKEN_CACHE"
+EXPIRY_MARGIN = 60           # seconds: treat tokens this close to exp as expired
+DEFAULT_TIMEOUT = 15
+
+
+def jwt_exp(token: str) -> float:
+    """`exp` claim of a JWT (unverified), 0 when absent or malformed."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(_json.loads(base64.urlsafe_b64decode(payload)).get("exp", 0))
+    except Exception:
+        return 0.0
+
+
+def _fresh(token: str) -> bool:
+    exp = jwt_exp(token)
+    return bool(token) and (not exp or exp > time.time() + EXPIRY_MARGIN)
+
+
+class TokenCache:
+    """JSON file of {"<base>|<email>": {accessToken, refreshToken, user}}."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = {"cache": 0, "refresh": 0, "login": 0}
+
+    @staticmethod
+    def key(base: str, email: str) -> str:
+        return f"{base.rstrip('/')}|{email.strip().lower()}"
+
+    @contextmanager
+    def _locked(self):
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return _json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries: dict):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            _json.dump(entries, f, indent=2)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    def _store(self, key: str, data: dict, user: dict):
+        entries = self._read()
+        entries[key] = {"accessToken": data.get("accessToken", ""),
+                        "refreshToken": data.get("refreshToken", ""),
+                        "user": user, "updated": time.time()}
+        self._write(entries)
+        return entries[key]
+
+    @staticmethod
+    def _response(base: str, entry: dict) -> Response:
+        body = {"success": True, "data": {"user": entry["user"],
+                                          "accessToken": entry["accessToken"],
+                                          "refreshToken": entry["refreshToken"]}}
+        return Response(200, {}, _json.dumps(body).encode(), f"{base}/auth/login")
+
+    @staticmethod
+    def _alive(session, base: str, token: str, timeout: float) -> bool:
+        try:
+            r = session.get(f"{base}/auth/me", headers={"Authorization": f"Bearer {token}"},
+                            timeout=timeout)
+            return r.status_code == 200
+        except RequestError:
+            return False
+
+    @staticmethod
+    def _refresh(session, base: str, refresh_token: str, timeout: float) -> dict:
+        try:
+            r = session.post(f"{base}/auth/refresh", json={"refreshToken": refresh_token},
+                             headers={"Authorization": None}, timeout=timeout)
+            d = r.json()
+        except (RequestError, ValueError):
+            return {}
+        if r.status_code == 200 and isinstance(d, dict) and d.get("success"):
+            return d.get("data") or {}
+        return {}
+
+    def login(self, session, base: str, email: str, password: str,
+              timeout: float = DEFAULT_TIMEOUT):
+        """Cached token, refreshed token or a real login -- in that order."""
+        base = base.rstrip("/")
+        key = self.key(base, email)
+        with self._locked():
+            entry = self._read().get(key)
+            if entry:
+                if _fresh(entry["accessToken"]) and \
+                        self._alive(session, base, entry["accessToken"], timeout):
+                    self.hits["cache"] += 1
+                    return self._response(base, entry)
+                if _fresh(entry.get("refreshToken", "")):
+                    data = self._refresh(session, base, entry["refreshToken"], timeout)
+                    if data.get("accessToken"):
+                        self.hits["refresh"] += 1
+                        return self._response(base, self._store(key, data, entry["user"]))
+            r = session.post(f"{base}/auth/login", json={"email": email, "password": password},
+                             headers={"Authorization": None}, timeout=timeout)
+            try:
+                d = r.json()
+            except ValueError:
+                d = {}
+            if r.status_code == 200 and isinstance(d, dict) and d.get("success"):
+                self.hits["login"] += 1
+                self._store(key, d["data"], d["data"].get("user", {}))
+            return r
+
+
+_CACHE = None
+
+
+def get_cache():
+    """TokenCache at $FANDREAMS_TOKEN_CACHE (None when unset)."""
+    global _CACHE
+    path = os.environ.get(CACHE_ENV)
+    if not path:
+        return None
+    if _CACHE is None or _CACHE.path != path:
+        _CACHE = TokenCache(path)
+    return _CACHE
+
+
+def login(session, base: str, email: str, password: str, timeout: float = DEFAULT_TIMEOUT):
+    """POST /auth/login, served from the token cache when one is configured."""
+    cache = get_cache()
+    if cache is None:
+        return session.post(f"{base}/auth/login", json={"email": email, "password": password},
+                            timeout=timeout)
+    return cache.login(session, base, email, password, timeout)